@@ -1,15 +1,46 @@
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import requests
 import json
 import os
+from poe2_http import TradeClient, TRADE_API_BASE_URL
+from poe2_json_stream import STREAM_CHUNK_SIZE
+from poe2_replay import install_transport, MODE_LIVE, DEFAULT_CORPUS_FILE, TIMING_ORIGINAL
 
 app = Flask(__name__)
 CORS(app)  # Habilita CORS para todas as rotas
 
-# URL base da API do PoE2
-POE_API_BASE_URL = "https://www.pathofexile.com/api/trade2"
+# URL base da API do PoE2 (POE_API_BASE_URL aponta para outra API compatível, ex.: poe2_fake_trade.py)
+POE_API_BASE_URL = os.environ.get("POE_API_BASE_URL", TRADE_API_BASE_URL)
+
+# Sessão HTTP única (pool keep-alive + rate limit global) para todas as rotas
+trade_client = TradeClient(
+    pool_connections=int(os.environ.get("POE_POOL_CONNECTIONS", "2")),
+    pool_maxsize=int(os.environ.get("POE_POOL_MAXSIZE", "6")),
+    search_cache_ttl=float(os.environ.get("POE_SEARCH_CACHE_TTL", "15")),
+    base_url=POE_API_BASE_URL,
+)
+trade_client.configure(
+    useragent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+    poesessid=os.environ.get("POESESSID"),
+    cf_clearance=os.environ.get("CF_CLEARANCE"),
+    extra_headers={
+        "Accept": "*/*",
+        "Origin": "https://www.pathofexile.com",
+        "Referer": "https://www.pathofexile.com/trade2/search/poe2/Standard"
+    },
+)
+# Gravação/reprodução: POE_REPLAY_MODE=record|replay, POE_REPLAY_CORPUS, POE_REPLAY_TIMING=original|fast
+replay_mode = install_transport(
+    trade_client,
+    os.environ.get("POE_REPLAY_MODE", MODE_LIVE).lower(),
+    os.environ.get("POE_REPLAY_CORPUS", DEFAULT_CORPUS_FILE),
+    os.environ.get("POE_REPLAY_TIMING", TIMING_ORIGINAL).lower(),
+)
+if replay_mode != MODE_LIVE:
+    print(f"Modo {replay_mode} ativo (corpus: {os.environ.get('POE_REPLAY_CORPUS', DEFAULT_CORPUS_FILE)})")
+if not trade_client.offline:
+    trade_client.prewarm()
 
 print("Iniciando servidor na porta 5000...")
 print("Este servidor é necessário para contornar limitações de CORS do navegador")
@@ -24,23 +55,8 @@ def search_items():
         payload = request.json
         print("Payload recebido:", json.dumps(payload, indent=2))
         
-        # Obter cookies e headers do request se disponíveis
-        cookies = {}
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Origin": "https://www.pathofexile.com",
-            "Referer": "https://www.pathofexile.com/trade2/search/poe2/Standard"
-        }
-        
-        # Enviar requisição para a API do PoE2
-        response = requests.post(
-            f"{POE_API_BASE_URL}/search/poe2/Standard",
-            json=payload,
-            headers=headers,
-            cookies=cookies
-        )
+        # Enviar requisição para a API do PoE2 (sessão compartilhada + rate limit global)
+        response = trade_client.search("Standard", payload)
         
         print(f"Status da resposta: {response.status_code}")
         
@@ -48,8 +64,8 @@ def search_items():
             print(f"Erro na API: {response.text}")
             return response.text, response.status_code
         
-        data = response.json()
-        return jsonify(data)
+        # Repassa o corpo como veio da API, sem decodificar e recodificar o JSON
+        return Response(response.content, status=response.status_code, mimetype='application/json')
     
     except Exception as e:
         print(f"Erro no servidor: {str(e)}")
@@ -64,30 +80,26 @@ def fetch_items():
         if not ids or not query_id:
             return jsonify({"error": "IDs de itens ou ID de consulta não fornecidos"}), 400
         
-        # Obter cookies e headers do request se disponíveis
-        cookies = {}
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Origin": "https://www.pathofexile.com",
-            "Referer": "https://www.pathofexile.com/trade2/search/poe2/Standard"
-        }
-        
-        # Enviar requisição para a API do PoE2
-        response = requests.get(
-            f"{POE_API_BASE_URL}/fetch/{ids}?query={query_id}&realm=poe2",
-            headers=headers,
-            cookies=cookies
-        )
+        # Enviar requisição para a API do PoE2 (sessão compartilhada + rate limit global)
+        response = trade_client.fetch(ids.split(","), query_id, stream=True)
         
         print(f"Status da resposta de detalhes: {response.status_code}")
         
         if response.status_code != 200:
             print(f"Erro na API de detalhes: {response.text}")
+            response.close()
             return response.text, response.status_code
         
-        data = response.json()
-        return jsonify(data)
+        # Repassa o corpo em blocos conforme chega da API, sem decodificar o JSON
+        def relay_body():
+            try:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    if chunk: yield chunk
+            finally:
+                response.close()
+        if response.raw is None:  # Modo replay: corpo já em memória
+            return Response(response.content, status=response.status_code, mimetype='application/json')
+        return Response(stream_with_context(relay_body()), status=response.status_code, mimetype='application/json')
     
     except Exception as e:
         print(f"Erro no servidor ao buscar detalhes: {str(e)}")
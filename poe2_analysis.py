@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+"""Normalização e análise de itens (sem dependência de interface).
+
+Cálculo de DPS, análise de potencial de Divine Orb, estimativas de DPS/preço e
+a conversão de um resultado bruto do ``/fetch`` no registro exibido pelas abas
+do tracker ou emitido pelo modo headless (``poe2_engine``).
+"""
+import math
+import re
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Optional
+
+from poe2_analysis_cache import analysis_cache_key
+from poe2_listing import normalize_listing, ListingFields
+from poe2_price_index import price_sort_key
+
+TRADE_SITE_URL = "https://www.pathofexile.com/trade/search/poe2"
+NO_VALUE = float('-inf')   # Chave de ordenação de valores ausentes
+
+# Base de dados simplificada para previsão de preço - será expandida com dados de API
+WEAPON_BASE_INFO = {
+    "Striking Quarterstaff": {"base_pdps": 300, "base_aps": 1.30},
+    "Battle Quarterstaff": {"base_pdps": 290, "base_aps": 1.25},
+    "Engraved Crossbow": {"base_pdps": 300, "base_aps": 1.20},
+    "Corpse Core": {"base_pdps": 310, "base_aps": 1.15},
+    "Exquisite Blade": {"base_pdps": 340, "base_aps": 1.30},
+}
+
+
+def calculate_dps(item_info):
+    """Calcula o DPS total, físico e elemental de um item."""
+    properties = item_info.get("properties", [])
+    extended = item_info.get("extended", {})
+    dps_val = extended.get("dps")
+    pdps_val = extended.get("pdps")
+    edps_val = extended.get("edps")
+    dps_num = float(dps_val) if isinstance(dps_val, (int, float)) else None
+    pdps_num = float(pdps_val) if isinstance(pdps_val, (int, float)) else None
+    edps_num = float(edps_val) if isinstance(edps_val, (int, float)) else None
+
+    # Fallback calculation if pdps is missing
+    if pdps_num is None:
+        phys_dmg_min, phys_dmg_max, atk_speed = None, None, None
+        for prop in properties:
+            if not isinstance(prop, dict): continue
+            prop_name = prop.get("name", "")
+            values = prop.get("values", [])
+            if values and isinstance(values, list) and len(values) > 0 and \
+              isinstance(values[0], list) and len(values[0]) > 0:
+                prop_val_str = str(values[0][0])
+                # Physical Damage check
+                if "physical damage" in prop_name.lower() or \
+                  ("damage" in prop_name.lower() and not any(x in prop_name.lower() for x in ["elemental", "chaos", "spell"])):
+                    try:
+                        if '-' in prop_val_str:
+                            dmg_range = prop_val_str.split("-")
+                            phys_dmg_min, phys_dmg_max = map(float, dmg_range)
+                        else:
+                            phys_dmg_min = phys_dmg_max = float(prop_val_str)
+                    except (ValueError, TypeError): pass
+                # Attack Speed check
+                elif "attacks per second" in prop_name.lower() or \
+                     ("attack speed" in prop_name.lower()):
+                    try:
+                        atk_speed = float(prop_val_str.replace('+',''))
+                    except (ValueError, TypeError): pass
+        if phys_dmg_min is not None and phys_dmg_max is not None and atk_speed is not None and atk_speed > 0:
+            pdps_num = round(((phys_dmg_min + phys_dmg_max) / 2) * atk_speed, 1)
+
+    # Fallback total DPS calculation
+    if dps_num is None and pdps_num is not None and edps_num is not None:
+         dps_num = round(pdps_num + edps_num, 1)
+    elif dps_num is None and pdps_num is not None:
+         dps_num = pdps_num # If only PDPS is available, use it as DPS
+
+    return dps_num, pdps_num, edps_num
+
+
+def estimate_potential_dps(item_data, divine_analysis_results):
+    """Estima o DPS potencial após usar Divine Orbs."""
+    item_info = item_data.get("item", {})
+    current_dps, current_pdps, _ = calculate_dps(item_info)
+
+    if current_pdps is None and current_dps is None:
+        return None, None, None  # Não é possível calcular
+
+    # Encontrar modificadores que afetam o DPS
+    dps_mods = []
+    for result in divine_analysis_results:
+        if result.get('status') == 'ok' and result.get('potential_pct') is not None:
+            mod_text = result.get('text', '').lower()
+            # Verificar se é um modificador relevante para DPS
+            if any(term in mod_text for term in ['damage', 'attack speed', 'critical']):
+                dps_mods.append(result)
+
+    if not dps_mods:
+        return current_dps, current_dps, current_dps  # Sem mods que afetem DPS
+
+    # Calcular fator médio e máximo de melhoria
+    total_potential = sum(mod.get('potential_pct', 0) for mod in dps_mods) / 100  # Converter de % para decimal
+    avg_potential = total_potential / len(dps_mods) if dps_mods else 0
+
+    # Estimar DPS com base no potencial
+    if current_pdps is not None:
+        min_pdps = current_pdps
+        max_pdps = current_pdps * (1 + avg_potential * 0.8)  # Estimativa conservadora do máximo
+        avg_pdps = current_pdps * (1 + avg_potential * 0.4)  # Estimativa média
+
+        return min_pdps, avg_pdps, max_pdps
+    elif current_dps is not None:
+        min_dps = current_dps
+        max_dps = current_dps * (1 + avg_potential * 0.8)
+        avg_dps = current_dps * (1 + avg_potential * 0.4)
+
+        return min_dps, avg_dps, max_dps
+
+    return None, None, None
+
+
+def estimate_price_after_divine(current_price, divine_potential, current_dps, max_dps):
+    """Estima o preço após o uso de Divine Orbs com base no potencial."""
+    if current_price is None or divine_potential is None:
+        return None
+
+    # Fator base baseado no potencial de melhoria (%)
+    base_factor = 1 + (divine_potential / 100) * 0.8
+
+    # Fator adicional baseado na melhoria de DPS (se disponível)
+    dps_factor = 1.0
+    if current_dps is not None and max_dps is not None and current_dps > 0:
+        dps_improvement = (max_dps / current_dps) - 1
+        dps_factor = 1 + dps_improvement * 0.6  # 60% do ganho de DPS
+
+    # Custo do Divine Orb (aproximado em chaos)
+    divine_cost = 150  # Valor aproximado de um Divine Orb
+
+    # Calculamos o preço estimado
+    estimated_price = current_price * base_factor * dps_factor
+
+    # Ajusta deduzindo o custo do Divine
+    final_price = max(estimated_price - divine_cost, current_price)
+
+    return round(final_price, 1)
+
+
+# Padrões das linhas de mod (compilados uma vez por processo)
+CURRENT_VALUE_RE = re.compile(r'([-+]?\d+(?:.\d+)?)')
+ADDS_VALUE_RE = re.compile(r'[aA]dds\s+([-+]?\d+(?:.\d+)?)\s+to\s+([-+]?\d+(?:.\d+)?)')
+TIER_RE = re.compile(r'^[SP]?(\d+)$')
+
+# Regras do potencial de Divine (percentual médio até o máximo do range)
+POTENTIAL_TOLERANCE = 1e-6
+DIVINE_GOOD_PCT = 65.0
+DIVINE_MEDIUM_PCT = 35.0
+DIVINE_WORTH_MIN_PCT = 0.1   # Acima disso o item "vale um Divine"
+
+
+def _format_range_display(min_vals, max_vals):
+    range_parts = []
+    if not isinstance(min_vals, list) or not isinstance(max_vals, list) or len(min_vals) != len(max_vals):
+        return "[Erro Range]"
+    for r_idx in range(len(min_vals)):
+        try:
+            min_v, max_v = min_vals[r_idx], max_vals[r_idx]
+            min_d = f"{min_v:.1f}".rstrip('0').rstrip('.') if isinstance(min_v, float) and not min_v.is_integer() else str(int(min_v))
+            max_d = f"{max_v:.1f}".rstrip('0').rstrip('.') if isinstance(max_v, float) and not max_v.is_integer() else str(int(max_v))
+            range_parts.append(f"{min_d}–{max_d}")
+        except (TypeError, ValueError): range_parts.append("?–?")
+    if len(range_parts) == 2: return f"[{range_parts[0]} to {range_parts[1]}]"
+    elif range_parts: return f"[{' / '.join(range_parts)}]"
+    else: return "[N/A]"
+
+
+def _format_current_display(values):
+    current_display_parts = []
+    if not isinstance(values, list): return "?"
+    for val in values:
+        try:
+            display = f"{val:.1f}".rstrip('0').rstrip('.') if isinstance(val, float) and not val.is_integer() else str(int(val))
+            current_display_parts.append(display)
+        except: current_display_parts.append("?")
+    return ", ".join(current_display_parts) if current_display_parts else "?"
+
+
+class ModLine:
+    """Linha de texto de um mod, analisada uma única vez.
+
+    Guarda os valores numéricos lidos de cada forma usada na análise:
+    ``adds_values`` ("Adds X to Y"), ``context_values`` (números isolados por
+    espaço/sinal/%) e ``display_values`` (o que aparece quando nenhum stat
+    casa com a linha). ``None`` indica que a leitura não se aplica ou falhou.
+    """
+    __slots__ = ("text", "value_count", "has_adds", "adds_values", "context_values", "display_values")
+
+    def __init__(self, text: str):
+        self.text = text
+        matches = list(CURRENT_VALUE_RE.finditer(text))
+        adds_match = ADDS_VALUE_RE.search(text)
+        self.value_count = len(matches)
+        self.has_adds = bool(adds_match) and len(matches) >= 2
+        self.adds_values = None
+        if self.has_adds:
+            try: self.adds_values = [float(adds_match.group(1)), float(adds_match.group(2))]
+            except ValueError: pass
+        self.context_values = []
+        try:
+            for match in matches:
+                start, end = match.span(1)
+                precedes = text[start-1:start] if start > 0 else " "
+                follows = text[end:end+1] if end < len(text) else " "
+                if (precedes.isspace() or precedes in '+-') and (follows.isspace() or follows in '%'):
+                    self.context_values.append(float(match.group(1)))
+        except ValueError:
+            self.context_values = None
+        if self.has_adds:
+            self.display_values = self.adds_values or []
+        else:
+            try: self.display_values = [float(match.group(1)) for match in matches]
+            except ValueError: self.display_values = []
+
+
+def index_mod_lines(text_list) -> dict:
+    """Agrupa as linhas pela quantidade de magnitudes que cada uma pode atender.
+
+    Retorna ``{quantidade: [(índice, valores), ...]}`` em ordem de texto. Uma
+    linha "Adds X to Y" atende stats de 2 magnitudes pelos valores do "Adds";
+    as demais (ou a mesma, para outras quantidades) atendem pela contagem de
+    números com o contexto válido.
+    """
+    by_count = {}
+    for text_idx, line in enumerate(text_list):
+        if line.has_adds and line.adds_values is not None:
+            by_count.setdefault(2, []).append((text_idx, line.adds_values))
+        count = line.value_count
+        if line.has_adds and count == 2: continue
+        if line.context_values is not None and len(line.context_values) == count > 0:
+            by_count.setdefault(count, []).append((text_idx, line.context_values))
+    return by_count
+
+
+def match_divine_mods(item_data):
+    """Casa os stats de ``extended.hashes`` com as linhas de mod do item.
+
+    Cada linha de mod é lida uma vez (``ModLine``) e os stats procuram a linha
+    só entre as candidatas com a mesma quantidade de magnitudes
+    (``index_mod_lines``). Retorna ``(linhas_de_análise, casados)``, onde
+    ``casados`` lista ``(linha, valores_atuais, mínimos, máximos)`` dos mods
+    cujo potencial ainda precisa ser calculado (``score_mod_potential``).
+    """
+    item = item_data.get("item", {})
+    explicit_mods_text = item.get("explicitMods", []) if isinstance(item.get("explicitMods"), list) else []
+    implicit_mods_text = item.get("implicitMods", []) if isinstance(item.get("implicitMods"), list) else []
+    extended_data = item.get("extended", {})
+    extended_mods = extended_data.get("mods", {})
+    extended_hashes = extended_data.get("hashes", {})
+    analysis_results = []
+    matched = []
+    processed_text_indices = {"explicit": set(), "implicit": set()}
+
+    idx_to_details = {"explicit": {}, "implicit": {}}
+    if extended_mods and isinstance(extended_mods, dict):
+         for scope in ["explicit", "implicit"]:
+              scope_mods = extended_mods.get(scope)
+              if isinstance(scope_mods, list):
+                   idx_to_details[scope] = {i: mod for i, mod in enumerate(scope_mods)}
+
+    all_scopes = {"explicit": [ModLine(text) for text in explicit_mods_text],
+                  "implicit": [ModLine(text) for text in implicit_mods_text]}
+    line_index = {scope: index_mod_lines(lines) for scope, lines in all_scopes.items()}
+    if extended_hashes and isinstance(extended_hashes, dict):
+         for scope, text_list in all_scopes.items():
+              scope_hashes = extended_hashes.get(scope)
+              if not isinstance(scope_hashes, list): continue
+              for hash_entry in scope_hashes:
+                   summed_min_vals, summed_max_vals, current_values = [], [], []
+                   component_tiers = []; mod_text_display = "Mod Desconhecido"; tier_str = ""; tag = "divine_unknown"
+                   range_found, text_found = False, False
+                   potential_pct = None; status = "init"; num_magnitudes_expected = 0; pending_score = False
+                   try:
+                        if not isinstance(hash_entry, (list, tuple)) or len(hash_entry) != 2: continue
+                        stat_hash, component_indices = hash_entry
+                        if not stat_hash or not isinstance(component_indices, list) or not component_indices: continue
+                        component_details = [idx_to_details[scope].get(idx) for idx in component_indices if idx_to_details[scope].get(idx)]
+                        if not component_details: continue
+
+                        first_comp_mags = None; is_first_comp = True; valid_range_sum = True
+                        for detail_part in component_details:
+                            magnitudes = detail_part.get("magnitudes")
+                            if not isinstance(magnitudes, list):
+                                valid_range_sum = False; break
+                            tier = detail_part.get("tier"); tier_match = TIER_RE.match(str(tier))
+                            if tier_match: component_tiers.append(f"T{tier_match.group(1)}")
+                            comp_mags_for_hash = [mag for mag in magnitudes if mag.get("hash") == stat_hash]
+                            if not comp_mags_for_hash: continue
+
+                            if is_first_comp:
+                                 num_magnitudes_expected = len(comp_mags_for_hash)
+                                 if num_magnitudes_expected == 0: valid_range_sum = False; break
+                                 summed_min_vals = [0.0] * num_magnitudes_expected
+                                 summed_max_vals = [0.0] * num_magnitudes_expected
+                                 is_first_comp = False
+                            elif len(comp_mags_for_hash) != num_magnitudes_expected:
+                                 valid_range_sum = False; break
+
+                            for i, mag in enumerate(comp_mags_for_hash):
+                                 try:
+                                      min_v, max_v = float(mag.get("min")), float(mag.get("max"))
+                                      if math.isnan(min_v) or math.isnan(max_v): raise ValueError("NaN")
+                                      summed_min_vals[i] += min_v; summed_max_vals[i] += max_v
+                                 except (ValueError, TypeError, AttributeError, KeyError, IndexError) as e_mag:
+                                      valid_range_sum = False; break
+                            if not valid_range_sum: break
+                        if not valid_range_sum or is_first_comp: status = "no_range"; continue
+
+                        range_found = True
+                        tier_str = f" ({'/'.join(sorted(list(set(component_tiers))))})" if component_tiers else ""
+
+                        found_match = None
+                        for text_idx, temp_current_values in line_index[scope].get(num_magnitudes_expected, ()):
+                             if text_idx in processed_text_indices[scope]: continue
+                             values_in_summed_range = True
+                             for val_idx, current_val in enumerate(temp_current_values):
+                                  min_bound = min(summed_min_vals[val_idx], summed_max_vals[val_idx]) - 1e-6
+                                  max_bound = max(summed_min_vals[val_idx], summed_max_vals[val_idx]) + 1e-6
+                                  if not (min_bound <= current_val <= max_bound): values_in_summed_range = False; break
+
+                             if values_in_summed_range:
+                                 found_match = {"text": text_list[text_idx].text, "values": temp_current_values, "index": text_idx}
+                                 break
+                        if found_match:
+                             mod_text_display = found_match["text"]; current_values = found_match["values"]
+                             processed_text_indices[scope].add(found_match["index"])
+                             text_found = True; status = 'ok'
+                        else:
+                             mod_text_display = component_details[0].get("name", f"Stat: {stat_hash}")
+                             if mod_text_display == stat_hash and tier_str: mod_text_display += tier_str
+                             status = 'no_text_match'
+
+                        chance_str = "N/A"; current_display = "?"; range_display = "[N/A]"; tag = "divine_unknown"
+                        if range_found:
+                            range_display = _format_range_display(summed_min_vals, summed_max_vals)
+                            if text_found and current_values:
+                                 current_display = _format_current_display(current_values)
+                                 pending_score = True   # Potencial calculado em score_mod_potential
+                            else: # Range found, no text match
+                                 chance_str = "N/A"; tag = "divine_no_text"; status = 'no_text_match'; potential_pct = None; current_display = "?"
+                        else: # No range found
+                            chance_str, tag, status = "N/A", "divine_unknown", "no_range"; potential_pct = None; range_display = "[N/A]"; current_display = "?"
+
+                        analysis_results.append({
+                            'scope': scope, 'text': mod_text_display, 'current_str': current_display,
+                            'range_str': range_display, 'tier_str': tier_str,
+                            'potential_str': chance_str, 'potential_pct': potential_pct,
+                            'tag': tag, 'status': status, 'hash': stat_hash
+                        })
+                        if pending_score:
+                            matched.append((analysis_results[-1], current_values, summed_min_vals, summed_max_vals))
+                   except Exception as e_hash_proc:
+                        stat_hash_err = hash_entry[0] if isinstance(hash_entry, (list, tuple)) and len(hash_entry)>0 else "Desconhecido"
+                        print(f"Erro CRÍTICO processando hash {stat_hash_err}: {e_hash_proc}\n{traceback.format_exc()}")
+                        analysis_results.append({'scope': scope, 'text': f"Erro análise stat {stat_hash_err}", 'tag': 'error', 'status':'error_processing', 'hash': stat_hash_err})
+
+    # Add unprocessed text mods
+    for scope, text_list in all_scopes.items():
+         for idx, line in enumerate(text_list):
+              if idx not in processed_text_indices[scope]:
+                  numeric_values = line.display_values
+                  analysis_results.append({
+                       'scope': scope, 'text': line.text, 'current_str': _format_current_display(numeric_values) if numeric_values else "?",
+                       'range_str': "[N/A]", 'tier_str': "", 'potential_str': "N/A", 'potential_pct': None,
+                       'tag': 'divine_unknown', 'status': 'unmatched_text', 'hash': None
+                  })
+
+    return analysis_results, matched
+
+
+def score_mod_potential(current_values, min_vals, max_vals):
+    """Potencial de Divine de um mod casado com o texto.
+
+    Retorna ``(potential_str, tag, potential_pct, calculation_valid)``; ``potential_pct``
+    é 0 para mods no máximo e None para mods fixos. ``poe2_divine_batch`` faz a
+    mesma conta em lote e deve continuar idêntico a esta função.
+    """
+    calculation_valid = True
+    total_percentage_potential = 0.0; num_calc = len(current_values)
+    is_maxed = True; all_fixed = True
+    for idx in range(num_calc):
+         try:
+              current, min_v, max_v = current_values[idx], min_vals[idx], max_vals[idx]
+         except IndexError: calculation_valid = False; break
+         if not isinstance(current,(int,float)) or not isinstance(min_v,(int,float)) or not isinstance(max_v,(int,float)) or math.isnan(current) or math.isnan(min_v) or math.isnan(max_v):
+              calculation_valid = False; break
+         range_diff = max_v - min_v; tolerance = POTENTIAL_TOLERANCE
+         is_range_zero = abs(range_diff) < tolerance
+         if not is_range_zero:
+              all_fixed = False
+              if current < max_v - tolerance:
+                   percent_from_max = max(0, ((max_v - current) / range_diff)) * 100
+                   total_percentage_potential += percent_from_max
+                   is_maxed = False
+    if not calculation_valid:
+         return "Erro Calc", "error", None, False
+    if is_maxed:
+         # None para fixo, 0 para mod no máximo (não fixo)
+         return ("FIXO" if all_fixed else "MAX"), "divine_max", (0 if not all_fixed else None), True
+    avg_potential_from_max = total_percentage_potential / num_calc if num_calc > 0 else 0
+    potential_pct = min(avg_potential_from_max, 100.0)
+    return f"{potential_pct:.1f}%", potential_tag(potential_pct), potential_pct, True
+
+
+def potential_tag(potential_pct: float, good_pct: float = DIVINE_GOOD_PCT, medium_pct: float = DIVINE_MEDIUM_PCT) -> str:
+    if potential_pct >= good_pct: return "divine_good"
+    if potential_pct >= medium_pct: return "divine_medium"
+    return "divine_bad"
+
+
+def apply_mod_score(entry: dict, score: tuple):
+    """Grava o resultado de ``score_mod_potential`` na linha de análise do mod."""
+    entry['potential_str'], entry['tag'], entry['potential_pct'], calculation_valid = score
+    if not calculation_valid: entry['status'] = "calc_error"
+
+
+def summarize_divine(analysis_results: list, worth_min_pct: float = DIVINE_WORTH_MIN_PCT):
+    """Potencial geral do item e ordenação das linhas de análise (altera a lista)."""
+    worth_divining = False; max_overall_chance = 0.0; valid_chances = []
+    for res in analysis_results:
+         potential = res.get('potential_pct')
+         if isinstance(potential, (int, float)) and res.get('status') == 'ok':
+              valid_chances.append(potential)
+              if potential > worth_min_pct: worth_divining = True
+    if valid_chances: max_overall_chance = max(valid_chances)
+
+    def sort_key(res):
+        scope_order = 0 if res.get('scope') == 'implicit' else (1 if res.get('scope') == 'explicit' else 2)
+        status_prio = 0 if res.get('status') == 'ok' else (1 if res.get('status') == 'no_text_match' else (2 if res.get('status') == 'unmatched_text' else ( 3 if res.get('status') != 'error' else 4)))
+        potential = res.get('potential_pct', -1)
+        if potential is None: potential = -2
+        return (scope_order, status_prio, -potential) # Sort scope, status, then descending potential
+    analysis_results.sort(key=sort_key)
+
+    return worth_divining, max_overall_chance, analysis_results
+
+
+def analyze_divine_worth(item_data):
+    """Analisa o item para determinar o potencial de ganho com Divine Orb."""
+    analysis_results, matched = match_divine_mods(item_data)
+    for entry, current_values, min_vals, max_vals in matched:
+        apply_mod_score(entry, score_mod_potential(current_values, min_vals, max_vals))
+    return summarize_divine(analysis_results)
+
+
+def analyze_item(item_data: dict) -> tuple:
+    """Parte da análise que depende só do conteúdo do item (memoizável por ``poe2_analysis_cache``).
+
+    Retorna ``((dps, pdps, edps), (worth_divining, max_chance, divine_analysis), (min_dps, avg_dps, max_dps))``.
+    """
+    dps_values = calculate_dps(item_data.get("item", {}))
+    divine_worth = analyze_divine_worth(item_data)
+    potential_dps = estimate_potential_dps(item_data, divine_worth[2])
+    return dps_values, divine_worth, potential_dps
+
+
+def details_analysis(item_details: dict) -> tuple:
+    """Reconstrói o resultado de ``analyze_item`` a partir de um registro já normalizado."""
+    return ((item_details["dps"], item_details["pdps"], item_details["edps"]),
+            (item_details["worth_divining"], item_details["max_divine_chance"], item_details["divine_analysis"]),
+            (item_details["min_dps"], item_details["avg_dps"], item_details["max_dps"]))
+
+
+def normalize_item(item_data: dict, query_id: str, league: str,
+                   on_warning: Optional[Callable[[str], None]] = None, analysis_cache=None,
+                   analysis: Optional[tuple] = None, listing: Optional[ListingFields] = None) -> dict:
+    """Converte um resultado do /fetch no registro de detalhes usado pela interface e pelo modo headless.
+
+    Com ``analysis_cache`` (``AnalysisCache``) itens de conteúdo idêntico reaproveitam a análise;
+    ``analysis`` recebe um resultado de ``analyze_item`` e ``listing`` um de ``normalize_listing``
+    (ex.: de ``normalize_listings``) já obtidos pelo chamador.
+    """
+    item_info = item_data.get("item", {})
+    item_id = item_data.get("id", f"no_id_{time.time()}")
+    if listing is None: listing = normalize_listing(item_data, on_warning)
+
+    # Calcula DPS, Divine Worth e DPS potencial (memoizados pelo conteúdo do item)
+    if analysis is None and analysis_cache is not None:
+        analysis = analysis_cache.get_or_compute(analysis_cache_key(item_info), lambda: analyze_item(item_data))
+    elif analysis is None:
+        analysis = analyze_item(item_data)
+    (dps_num, pdps_num, edps_num), (worth_divining, max_chance, divine_analysis_results), (min_dps, avg_dps, max_dps) = analysis
+
+    # Estima o preço
+    estimated_price = None
+    if listing.price_amount is not None and max_chance > 0:
+        estimated_price = estimate_price_after_divine(listing.price_amount, max_chance, dps_num, max_dps)
+
+    league_url_part = league.replace(" ", "%20")
+    item_details = {
+        "id": item_id, "name": listing.name, "price": listing.price_text, "price_amount": listing.price_amount,
+        "price_currency": listing.price_currency, "seller": listing.seller,
+        "listing_date": listing.listing_date, "listing_timestamp": listing.listed_at,
+        "listing_epoch_ms": listing.indexed_ms,
+        "whisper": listing.whisper, "link": f"{TRADE_SITE_URL}/{league_url_part}/{query_id}/{item_id}",
+        "properties": item_info.get("properties", []),
+        "mods": item_info.get("explicitMods", []),
+        "implicit_mods": item_info.get("implicitMods", []),
+        "item_level": item_info.get("ilvl", "?"),
+        "rarity": item_info.get("rarity", "normal").capitalize(),
+        "frameType": item_info.get("frameType", 0),
+        "dps": dps_num, "pdps": pdps_num, "edps": edps_num,
+        "min_dps": min_dps, "avg_dps": avg_dps, "max_dps": max_dps,
+        "estimated_price": estimated_price,
+        "worth_divining": worth_divining,
+        "max_divine_chance": max_chance,
+        "divine_analysis": divine_analysis_results,
+        "raw_data": item_data
+    }
+    item_details["sort_keys"] = item_sort_keys(item_details)
+    return item_details
+
+
+def item_sort_keys(item_details: dict) -> dict:
+    """Chaves de ordenação tipadas de cada coluna do Treeview, calculadas uma única vez por item."""
+    timestamp = item_details.get("listing_timestamp")
+    epoch_ms = item_details.get("listing_epoch_ms")
+    price_amount = item_details.get("price_amount")
+    return {
+        "nome": str(item_details.get("name", "")).lower(),
+        "preco": price_sort_key(item_details.get("price_normalized"), price_amount, item_details.get("price_currency", "")),
+        "dps": item_details["dps"] if item_details.get("dps") is not None else NO_VALUE,
+        "pdps": item_details["pdps"] if item_details.get("pdps") is not None else NO_VALUE,
+        "divine_potential": item_details["max_divine_chance"] if item_details.get("max_divine_chance") is not None else NO_VALUE,
+        "vendedor": str(item_details.get("seller", "")).lower(),
+        "data_listagem": (epoch_ms / 1000 if epoch_ms is not None else
+                          timestamp.timestamp() if isinstance(timestamp, datetime) else NO_VALUE),
+    }
+
+
+def passes_divine_filter(item_details: dict, divine_potential_min: float) -> bool:
+    """Filtro de potencial mínimo de Divine (0 desativa)."""
+    max_chance = item_details.get("max_divine_chance")
+    return not (divine_potential_min > 0 and (max_chance is None or max_chance < divine_potential_min))
+
+
+def item_row(item_details: dict):
+    """Valores e tag da linha do Treeview para um item normalizado."""
+    dps_num, pdps_num = item_details.get("dps"), item_details.get("pdps")
+    max_chance, estimated_price = item_details.get("max_divine_chance"), item_details.get("estimated_price")
+    dps_display = f"{dps_num:.1f}" if dps_num is not None else "-"
+    pdps_display = f"{pdps_num:.1f}" if pdps_num is not None else "-"
+    dps_pdps_str = f"{dps_display}"
+    if pdps_display != "-" and pdps_display != dps_display: dps_pdps_str += f" / {pdps_display}"
+
+    # Adiciona informação de potencial de divine
+    divine_potential_str = "-"
+    if max_chance is not None:
+        divine_potential_str = f"{max_chance:.1f}%"
+        if estimated_price is not None:
+            divine_potential_str += f" ({estimated_price})"
+
+    tree_values = (item_details["name"], item_details["price"], dps_pdps_str, pdps_display, divine_potential_str,
+                   item_details["seller"], item_details["listing_date"], "Copiar")
+
+    # Define a tag da linha baseado no divine worth
+    row_tag = 'not_worth'
+    if item_details.get("worth_divining"):
+         if max_chance >= 65: row_tag = 'worth_good'
+         elif max_chance >= 35: row_tag = 'worth_medium'
+         else: row_tag = 'worth_bad'
+    return tree_values, row_tag
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Cache da análise de itens (DPS, Divine Orb e DPS potencial).
+
+Em buscas repetidas quase todos os anúncios voltam idênticos, e a análise de
+cada um (``calculate_dps``, ``analyze_divine_worth`` e
+``estimate_potential_dps``) depende só dos mods, das propriedades e do bloco
+``extended`` do item. Este cache guarda o resultado por um hash desse conteúdo,
+com limite de entradas (LRU) e validade (TTL), e é compartilhado entre as abas
+pelo ``SearchEngine``. Preço, vendedor e data não entram na chave: anúncios
+relistados com outro preço reaproveitam a mesma análise.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+DEFAULT_ANALYSIS_CACHE_SIZE = 20000   # Entradas (0 desativa o cache)
+DEFAULT_ANALYSIS_CACHE_TTL = 1800.0   # Segundos
+
+# Campos de ``item`` que alimentam a análise
+ANALYSIS_FIELDS = ("explicitMods", "implicitMods", "properties", "extended")
+
+
+def analysis_cache_key(item_info: dict) -> str:
+    """Hash do conteúdo analisado do item (mods, propriedades e ``extended``)."""
+    content = [item_info.get(field) for field in ANALYSIS_FIELDS]
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Cache LRU/TTL thread-safe de resultados de análise.
+
+    Os valores são compartilhados entre todos os itens com o mesmo conteúdo e
+    devem ser tratados como somente leitura.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_ANALYSIS_CACHE_SIZE, ttl: float = DEFAULT_ANALYSIS_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = max(0.0, float(ttl))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def configure(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        with self._lock:
+            if max_entries is not None: self.max_entries = max(0, int(max_entries))
+            if ttl is not None: self.ttl = max(0.0, float(ttl))
+            self._evict_overflow()
+            if not self.max_entries > 0 or not self.ttl > 0: self._entries.clear()
+
+    def _evict_overflow(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str):
+        """Resultado guardado para a chave (ou None), marcando-o como usado recentemente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            if not self.enabled: return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            self._evict_overflow()
+
+    def get_or_compute(self, key: str, compute: Callable[[], object]):
+        """Devolve o resultado guardado ou calcula (fora do lock) e guarda."""
+        if not self.enabled: return compute()
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expired": self.expired, "entries": len(self._entries),
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Análise de itens em processos separados (opcional).
+
+A normalização/análise de cada resultado do ``/fetch`` (DPS, Divine Orb, DPS
+potencial) é CPU pura e, numa thread, disputa o GIL com o loop do Tk. Com
+``workers > 0`` o ``SearchEngine`` manda os resultados brutos em lotes para um
+``ProcessPoolExecutor``; cada processo devolve os registros já analisados, sem
+o JSON bruto (que o processo principal já tem e religa ao registro). Cada
+processo mantém o próprio ``AnalysisCache`` e calcula o potencial de Divine de
+cada lote com ``poe2_divine_batch``.
+"""
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from poe2_analysis import normalize_item
+from poe2_analysis_cache import AnalysisCache
+from poe2_divine_batch import analyze_items
+from poe2_listing import normalize_listings
+
+DEFAULT_ANALYSIS_WORKERS = 0      # Processos de análise (0 = análise na thread da busca)
+DEFAULT_ANALYSIS_BATCH_SIZE = 20  # Itens por tarefa enviada a um processo
+
+# (item_data, query_id, liga) de cada item enviado
+AnalysisJob = Tuple[dict, str, str]
+# (detalhes sem raw_data ou None, erro ou None, avisos)
+AnalysisRecord = Tuple[Optional[dict], Optional[str], List[str]]
+
+_worker_cache: Optional[AnalysisCache] = None
+
+
+def analyze_jobs(jobs: List[AnalysisJob]) -> List[AnalysisRecord]:
+    """Executado no processo de análise: normaliza um lote de itens."""
+    global _worker_cache
+    if _worker_cache is None: _worker_cache = AnalysisCache()
+    records = []
+    listing_warnings: List[str] = []
+    listings = normalize_listings((item_data for item_data, _, _ in jobs), on_warning=listing_warnings.append)
+    # Com avisos no lote, refaz item a item para associar cada aviso ao item certo (None = normalize_item refaz)
+    if listing_warnings: listings = [None] * len(jobs)
+    # Potencial de Divine do lote inteiro de uma vez (os itens sem análise são refeitos por normalize_item)
+    analyses = analyze_items([item_data for item_data, _, _ in jobs], _worker_cache)
+    for (item_data, query_id, league), listing, analysis in zip(jobs, listings, analyses):
+        warnings: List[str] = []
+        try:
+            details = normalize_item(item_data, query_id, league, on_warning=warnings.append,
+                                     analysis_cache=_worker_cache, analysis=analysis, listing=listing)
+            details.pop("raw_data", None)
+            records.append((details, None, warnings))
+        except Exception as e_process:
+            records.append((None, f"{type(e_process).__name__}: {e_process}", warnings))
+    return records
+
+
+class AnalysisPool:
+    """Pool de processos de análise, iniciado só no primeiro uso."""
+
+    def __init__(self, workers: int = DEFAULT_ANALYSIS_WORKERS, batch_size: int = DEFAULT_ANALYSIS_BATCH_SIZE):
+        self.workers = max(0, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.submitted = 0
+        self.failed = False   # Pool quebrado (processo morto): a análise volta para a thread da busca
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and not self.failed
+
+    def configure(self, workers: Optional[int] = None, batch_size: Optional[int] = None):
+        if batch_size is not None: self.batch_size = max(1, int(batch_size))
+        if workers is not None and max(0, int(workers)) != self.workers:
+            self.shutdown(wait=False)
+            self.workers = max(0, int(workers))
+            self.failed = False
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, jobs: List[AnalysisJob]) -> List[Tuple[Future, List[AnalysisJob]]]:
+        """Divide os itens em lotes de ``batch_size`` e os envia aos processos."""
+        executor = self._get_executor()
+        submitted = []
+        for start in range(0, len(jobs), self.batch_size):
+            chunk = jobs[start:start + self.batch_size]
+            submitted.append((executor.submit(analyze_jobs, chunk), chunk))
+        self.submitted += len(jobs)
+        return submitted
+
+    def mark_failed(self):
+        """Desativa o pool depois de uma falha (ex.: processo encerrado pelo sistema)."""
+        self.failed = True
+        self.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None: return
+        try:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        except TypeError:  # Python < 3.9
+            executor.shutdown(wait=wait)
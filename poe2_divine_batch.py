@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""Potencial de Divine Orb calculado em lote.
+
+``analyze_divine_worth`` calcula o potencial mod a mod em Python puro. Aqui os
+mods já casados com o texto (``match_divine_mods``) de um lote inteiro de
+``/fetch`` ou de todo o histórico do armazenamento local são empacotados em
+arrays (valor atual, mínimo e máximo somados de cada magnitude) e o potencial,
+os flags de máximo/fixo, as tags e o resumo por item saem de poucas operações
+vetorizadas. O casamento com o texto é feito uma vez; recalcular com outras
+regras (``score(good_pct=..., ...)``) reaproveita os arrays.
+
+O NumPy é opcional: sem ele ``score`` usa ``score_mod_potential`` mod a mod,
+com o mesmo resultado. Com as regras padrão, ``results`` é idêntico a chamar
+``analyze_divine_worth`` em cada item.
+
+``analyze_items`` é o ``analyze_item`` de um lote inteiro (usado pelo
+``SearchEngine`` nos itens reaproveitados do armazenamento local e nos
+processos de análise, a cada resposta de ``/fetch``). Para reavaliar o
+histórico com outras regras:
+
+    python poe2_divine_batch.py --store poe2_items.sqlite3 --good 70 --medium 40
+"""
+import argparse
+import os
+from typing import Iterable, List, Optional
+
+from poe2_analysis import (match_divine_mods, score_mod_potential, potential_tag, summarize_divine,
+                           apply_mod_score, calculate_dps, estimate_potential_dps, POTENTIAL_TOLERANCE,
+                           DIVINE_GOOD_PCT, DIVINE_MEDIUM_PCT, DIVINE_WORTH_MIN_PCT)
+from poe2_analysis_cache import analysis_cache_key
+from poe2_item_store import open_item_store, ITEM_STORE_FILE
+from poe2_listing import full_item_name, UNKNOWN_ITEM_NAME
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Códigos das tags no array de resultado
+TAG_LABELS = ["divine_bad", "divine_medium", "divine_good", "divine_max", "error"]
+TAG_BAD, TAG_MEDIUM, TAG_GOOD, TAG_MAX, TAG_ERROR = range(len(TAG_LABELS))
+
+
+class BatchScores:
+    """Resultado de ``DivineBatch.score``: arrays por mod casado e resumo por item.
+
+    Por mod: ``potential`` (NaN para fixo/erro), ``maxed``, ``fixed``, ``valid``
+    e ``tags`` (códigos de ``TAG_LABELS``). Por item: ``worth`` e ``max_chance``.
+    Sem NumPy os arrays são listas.
+    """
+
+    def __init__(self, potential, maxed, fixed, valid, tags, worth, max_chance,
+                 good_pct: float, medium_pct: float, worth_min_pct: float):
+        self.potential = potential
+        self.maxed = maxed
+        self.fixed = fixed
+        self.valid = valid
+        self.tags = tags
+        self.worth = worth
+        self.max_chance = max_chance
+        self.good_pct = good_pct
+        self.medium_pct = medium_pct
+        self.worth_min_pct = worth_min_pct
+
+    def mod_score(self, mod_index: int) -> tuple:
+        """Mesma tupla de ``score_mod_potential`` para um mod do lote."""
+        if not self.valid[mod_index]:
+            return "Erro Calc", "error", None, False
+        if self.maxed[mod_index]:
+            fixed = bool(self.fixed[mod_index])
+            return ("FIXO" if fixed else "MAX"), "divine_max", (None if fixed else 0), True
+        potential = float(self.potential[mod_index])
+        return f"{potential:.1f}%", TAG_LABELS[int(self.tags[mod_index])], potential, True
+
+
+class DivineBatch:
+    """Mods casados de vários itens, empacotados para o cálculo em lote."""
+
+    def __init__(self, item_datas: Iterable[dict]):
+        self._analysis: List[Optional[list]] = []   # Linhas de análise (sem ordenar) de cada item
+        self._entries = []                          # (item, linha) de cada mod casado
+        self.failed: List[int] = []                 # Itens cuja análise levantou exceção
+        owners, currents, mins, maxs = [], [], [], []
+        for item_index, item_data in enumerate(item_datas):
+            try:
+                analysis_results, matched = match_divine_mods(item_data)
+            except Exception:
+                self._analysis.append(None)
+                self.failed.append(item_index)
+                continue
+            self._analysis.append(analysis_results)
+            for entry, current_values, min_vals, max_vals in matched:
+                self._entries.append((item_index, entry))
+                owners.append(item_index)
+                currents.append(current_values); mins.append(min_vals); maxs.append(max_vals)
+        self._currents, self._mins, self._maxs = currents, mins, maxs
+        self._packed = self._pack(owners, currents, mins, maxs) if HAS_NUMPY else None
+
+    @classmethod
+    def from_store(cls, item_store) -> "DivineBatch":
+        """Lote com todo o histórico do armazenamento local (``ItemStore``)."""
+        return cls(item_store.iter_items())
+
+    def __len__(self) -> int:
+        return len(self._analysis)
+
+    @property
+    def mod_count(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _pack(owners, currents, mins, maxs):
+        """Arrays (mods x magnitudes) preenchidos com zero fora da máscara."""
+        count = len(currents)
+        width = max((len(values) for values in currents), default=1)
+        current = np.zeros((count, width)); low = np.zeros((count, width)); high = np.zeros((count, width))
+        mask = np.zeros((count, width), dtype=bool)
+        shape_ok = np.ones(count, dtype=bool)
+        for row, (values, min_vals, max_vals) in enumerate(zip(currents, mins, maxs)):
+            size = len(values)
+            # Menos mínimos/máximos que valores: a conta escalar falha (IndexError)
+            if len(min_vals) < size or len(max_vals) < size:
+                shape_ok[row] = False; continue
+            current[row, :size] = values; low[row, :size] = min_vals[:size]; high[row, :size] = max_vals[:size]
+            mask[row, :size] = True
+        counts = mask.sum(axis=1)
+        return np.asarray(owners, dtype=np.int64), current, low, high, mask, counts, shape_ok
+
+    def score(self, good_pct: float = DIVINE_GOOD_PCT, medium_pct: float = DIVINE_MEDIUM_PCT,
+              worth_min_pct: float = DIVINE_WORTH_MIN_PCT) -> BatchScores:
+        """Potencial de todos os mods do lote com as regras informadas."""
+        if not HAS_NUMPY:
+            return self._score_python(good_pct, medium_pct, worth_min_pct)
+        owners, current, low, high, mask, counts, shape_ok = self._packed
+        tolerance = POTENTIAL_TOLERANCE
+        with np.errstate(invalid='ignore', divide='ignore'):
+            has_nan = ((np.isnan(current) | np.isnan(low) | np.isnan(high)) & mask).any(axis=1)
+            valid = shape_ok & ~has_nan
+            range_diff = high - low
+            active = mask & ~(np.abs(range_diff) < tolerance)
+            below_max = active & (current < high - tolerance)
+            percent = np.where(below_max, np.maximum(0.0, (high - current) / np.where(active, range_diff, 1.0)) * 100, 0.0)
+            # Soma coluna a coluna, na mesma ordem da conta escalar
+            total = np.zeros(len(counts))
+            for column in range(percent.shape[1]):
+                total += percent[:, column]
+            maxed = ~below_max.any(axis=1)
+            fixed = ~active.any(axis=1)
+            potential = np.minimum(total / np.maximum(counts, 1), 100.0)
+        potential = np.where(valid & ~maxed, potential, np.nan)
+        tags = np.select([~valid, maxed, potential >= good_pct, potential >= medium_pct],
+                         [TAG_ERROR, TAG_MAX, TAG_GOOD, TAG_MEDIUM], default=TAG_BAD)
+
+        # Resumo por item: mods "ok" com potencial numérico (máximo conta como 0, fixo não conta)
+        chance_valid = valid & ~(maxed & fixed)
+        chance = np.where(maxed, 0.0, potential)
+        worth = np.zeros(len(self._analysis), dtype=bool)
+        worth[owners[chance_valid & (chance > worth_min_pct)]] = True
+        max_chance = np.zeros(len(self._analysis))
+        np.maximum.at(max_chance, owners[chance_valid], chance[chance_valid])
+        return BatchScores(potential, maxed, fixed, valid, tags, worth, max_chance, good_pct, medium_pct, worth_min_pct)
+
+    def _score_python(self, good_pct, medium_pct, worth_min_pct) -> BatchScores:
+        potential, maxed, fixed, valid, tags = [], [], [], [], []
+        worth = [False] * len(self._analysis)
+        max_chance = [0.0] * len(self._analysis)
+        for (item_index, _), values, min_vals, max_vals in zip(self._entries, self._currents, self._mins, self._maxs):
+            _, tag, pct, calculation_valid = score_mod_potential(values, min_vals, max_vals)
+            is_maxed = tag == "divine_max"
+            valid.append(calculation_valid); maxed.append(is_maxed); fixed.append(is_maxed and pct is None)
+            potential.append(pct if calculation_valid and not is_maxed else float('nan'))
+            if not calculation_valid: tags.append(TAG_ERROR)
+            elif is_maxed: tags.append(TAG_MAX)
+            else: tags.append(TAG_LABELS.index(potential_tag(pct, good_pct, medium_pct)))
+            if calculation_valid and pct is not None:
+                if pct > worth_min_pct: worth[item_index] = True
+                max_chance[item_index] = max(max_chance[item_index], pct)
+        return BatchScores(potential, maxed, fixed, valid, tags, worth, max_chance, good_pct, medium_pct, worth_min_pct)
+
+    def results(self, scores: Optional[BatchScores] = None) -> list:
+        """``(worth_divining, max_chance, analysis_results)`` de cada item, como ``analyze_divine_worth``.
+
+        Itens que falharam na análise aparecem como None.
+        """
+        scores = scores or self.score()
+        copies = [None if analysis is None else {id(entry): dict(entry) for entry in analysis} for analysis in self._analysis]
+        for mod_index, (item_index, entry) in enumerate(self._entries):
+            apply_mod_score(copies[item_index][id(entry)], scores.mod_score(mod_index))
+        output = []
+        for analysis, entry_copies in zip(self._analysis, copies):
+            if analysis is None:
+                output.append(None); continue
+            output.append(summarize_divine([entry_copies[id(entry)] for entry in analysis], scores.worth_min_pct))
+        return output
+
+
+def analyze_items(item_datas: List[dict], analysis_cache=None) -> List[Optional[tuple]]:
+    """``analyze_item`` de um lote, com o potencial de Divine calculado em ``DivineBatch``.
+
+    Com ``analysis_cache`` só os itens ausentes do cache entram no lote (e são
+    guardados). Itens cuja análise falhar aparecem como None: ``normalize_item``
+    refaz a análise e registra o erro.
+    """
+    analyses: List[Optional[tuple]] = [None] * len(item_datas)
+    keys = [None] * len(item_datas)
+    missing = []
+    for index, item_data in enumerate(item_datas):
+        if analysis_cache is not None and analysis_cache.enabled:
+            try:
+                keys[index] = analysis_cache_key(item_data.get("item", {}))
+            except Exception:
+                continue   # Item malformado
+            analyses[index] = analysis_cache.get(keys[index])
+            if analyses[index] is not None: continue
+        missing.append(index)
+    if not missing: return analyses
+
+    batch = DivineBatch(item_datas[index] for index in missing)
+    for index, divine_worth in zip(missing, batch.results()):
+        if divine_worth is None: continue
+        item_data = item_datas[index]
+        try:
+            analysis = (calculate_dps(item_data.get("item", {})), divine_worth,
+                        estimate_potential_dps(item_data, divine_worth[2]))
+        except Exception:
+            continue
+        analyses[index] = analysis
+        if keys[index] is not None: analysis_cache.put(keys[index], analysis)
+    return analyses
+
+
+def _rescore_store(path: str, good_pct: float, medium_pct: float, worth_min_pct: float, top: int):
+    if not os.path.isfile(path):
+        print(f"Armazenamento local '{path}' não encontrado.")
+        return 1
+    item_store = open_item_store(path)
+    if item_store is None: return 1
+    try:
+        item_datas = list(item_store.iter_items())
+    finally:
+        item_store.close()
+    batch = DivineBatch(item_datas)
+    scores = batch.score(good_pct, medium_pct, worth_min_pct)
+    worth_count = sum(1 for worth in scores.worth if worth)
+    print(f"{len(batch)} itens, {batch.mod_count} mods casados ({'NumPy' if HAS_NUMPY else 'Python puro'}); "
+          f"regras: bom >= {good_pct}%, médio >= {medium_pct}%, vale Divine > {worth_min_pct}%")
+    print(f"  {worth_count} valem um Divine, {len(batch.failed)} com erro na análise")
+    ranked = sorted((index for index, worth in enumerate(scores.worth) if worth),
+                    key=lambda index: -float(scores.max_chance[index]))
+    for index in ranked[:top]:
+        item_info = item_datas[index].get("item", {})
+        name = full_item_name(item_info.get("name", ""), item_info.get("typeLine", ""), item_info.get("baseType", UNKNOWN_ITEM_NAME))
+        price = item_datas[index].get("listing", {}).get("price") or {}
+        print(f"  {float(scores.max_chance[index]):5.1f}%  {name}  ({price.get('amount', '?')} {price.get('currency', '')})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reavalia o potencial de Divine do histórico do armazenamento local.")
+    parser.add_argument("--store", default=ITEM_STORE_FILE, help="Arquivo do armazenamento local (ItemStore)")
+    parser.add_argument("--good", type=float, default=DIVINE_GOOD_PCT, help="Potencial mínimo (%%) de um mod 'bom'")
+    parser.add_argument("--medium", type=float, default=DIVINE_MEDIUM_PCT, help="Potencial mínimo (%%) de um mod 'médio'")
+    parser.add_argument("--worth-min", type=float, default=DIVINE_WORTH_MIN_PCT, help="Potencial acima do qual o item vale um Divine")
+    parser.add_argument("--top", type=int, default=20, help="Itens listados (maior potencial primeiro)")
+    args = parser.parse_args()
+    raise SystemExit(_rescore_store(args.store, args.good, args.medium, args.worth_min, max(0, args.top)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,908 @@
+# -*- coding: utf-8 -*-
+"""Motor de busca do tracker, sem dependência de interface.
+
+Reúne o que antes vivia em ``PoeTracker``: construção do payload a partir dos
+filtros, o ciclo de busca (``/search`` + fatiamento por preço + modo delta +
+armazenamento local + pipeline de ``/fetch``) e a normalização/análise de cada
+item. A interface Tk e o modo headless usam o mesmo ``SearchEngine``; cada um
+recebe os eventos do ciclo por um objeto ``EngineHooks``.
+
+Modo headless (servidor sem display): roda as buscas salvas em seções
+``[Search:<nome>]`` do arquivo de configuração e emite os itens como JSON lines::
+
+    python poe2_engine.py --config poe2_config.ini --output resultados.jsonl
+    python poe2_engine.py --once            # um ciclo de cada busca e sai
+"""
+import argparse
+import configparser
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from poe2_analysis import normalize_item, passes_divine_filter, details_analysis
+from poe2_analysis_cache import AnalysisCache, analysis_cache_key, DEFAULT_ANALYSIS_CACHE_SIZE, DEFAULT_ANALYSIS_CACHE_TTL
+from poe2_analysis_pool import AnalysisPool, DEFAULT_ANALYSIS_WORKERS, DEFAULT_ANALYSIS_BATCH_SIZE
+from poe2_divine_batch import analyze_items
+from poe2_fetch_pipeline import FetchPipeline, make_batches_by_query, DEFAULT_MAX_IN_FLIGHT, CONTINUE, ABORT
+from poe2_http import TradeClient, TRADE_API_BASE_URL, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from poe2_item_store import open_item_store, ITEM_STORE_FILE, DEFAULT_MAX_AGE_HOURS
+from poe2_json_stream import iter_fetch_results
+from poe2_price_index import (ExchangeRates, price_sort_key, DEFAULT_BASE_CURRENCY, DEFAULT_RATES_FILE,
+                              DEFAULT_RATES_TTL, SOURCE_FILE)
+from poe2_replay import install_transport, MODE_LIVE, DEFAULT_CORPUS_FILE, TIMING_ORIGINAL
+from poe2_retry import CircuitOpenError, is_auth_failure, is_retryable_status
+from poe2_scheduler import PollingScheduler, PRIORITY_LABELS, PRIORITY_NORMAL, DEFAULT_MAX_CONCURRENT, DEFAULT_JITTER
+from poe2_search_cache import DEFAULT_SEARCH_CACHE_TTL
+from poe2_sharding import PriceShardedSearch, ShardSearchError, API_RESULT_CAP, DEFAULT_MAX_SHARDS, DEFAULT_MAX_SHARDED_ITEMS
+
+CONFIG_FILE = 'poe2_config.ini'
+DEFAULT_LEAGUE = "Dawn of the Hunt"
+DEFAULT_POLLING_INTERVAL = 60
+SEARCH_SECTION_PREFIX = "Search:"
+
+STAT_MAP = {
+    "Maximum Life": "explicit.stat_3299347043", "Increased Life": "explicit.stat_1671376347",
+    "Maximum Mana": "explicit.stat_1050105434", "Increased Mana": "explicit.stat_4220027924",
+    "Fire Resistance": "explicit.stat_3372524247", "Cold Resistance": "explicit.stat_3642289083",
+    "Lightning Resistance": "explicit.stat_1010850144", "Chaos Resistance": "explicit.stat_3795704793",
+    "Increased Physical Damage": "explicit.stat_1509134228", # Hash principal para %Phys
+    "Increased Elemental Damage": "explicit.stat_2974417149",
+    "Increased Spell Damage": "explicit.stat_1368271171", "Attack Speed": "explicit.stat_210067635",
+    "Cast Speed": "explicit.stat_4277795662", "Critical Strike Chance": "explicit.stat_2628039082",
+    "+#% Critical Strike Chance": "explicit.stat_2311243048",
+    "Critical Strike Multiplier": "explicit.stat_2301191210",
+    "+#% Critical Strike Multiplier": "explicit.stat_2301191210",
+    "Critical Damage Bonus": "explicit.stat_2694482655",
+    "Attack Range": "explicit.stat_2469416729",
+    "Strength": "explicit.stat_4080418644", "Dexterity": "explicit.stat_3261801346",
+    "Intelligence": "explicit.stat_4043464511", "All Attributes": "explicit.stat_2026728709",
+    "Movement Speed": "explicit.stat_3848254059",
+    "Accuracy Rating": "explicit.stat_691932474",
+    "+#% Accuracy Rating": "explicit.stat_1069133534",
+    "Physical Damage Leeched as Mana": "explicit.stat_3371059371", "Mana per Enemy Killed": "explicit.stat_105698561",
+    "Reduced Attribute Requirements": "explicit.stat_3639275092",
+    "Bolt Speed": "implicit.stat_1803308202",
+    "Life per Enemy Killed": "explicit.stat_3695891184",
+    "Adds # to # Physical Damage": "explicit.stat_1940865751", # Flat Phys
+    "Adds # to # Fire Damage": "explicit.stat_709508406",    # Flat Fire
+    "Adds # to # Cold Damage": "explicit.stat_2048645075",   # Flat Cold
+    "Adds # to # Lightning Damage": "explicit.stat_1671376347", # Flat Lightning
+    "+# to Level of all Projectile Skills": "explicit.stat_1202301673"
+}
+
+ITEM_CATEGORIES = {
+    "Any": "any", "Any Weapon": "weapon", "Any One-Handed Melee Weapon": "weapon.one", "Unarmed": "weapon.unarmed",
+    "Claw": "weapon.claw", "Dagger": "weapon.dagger", "One-Handed Sword": "weapon.onesword", "One-Handed Axe": "weapon.oneaxe",
+    "One-Handed Mace": "weapon.onemace", "Spear": "weapon.spear", "Flail": "weapon.flail", "Any Two-Handed Melee Weapon": "weapon.two",
+    "Two-Handed Sword": "weapon.twosword", "Two-Handed Axe": "weapon.twoaxe", "Two-Handed Mace": "weapon.twomace",
+    "Quarterstaff": "weapon.warstaff",
+    "Any Ranged Weapon": "weapon.ranged", "Bow": "weapon.bow", "Crossbow": "weapon.crossbow",
+    "Any Caster Weapon": "weapon.caster", "Wand": "weapon.wand", "Sceptre": "weapon.sceptre", "Staff": "weapon.staff",
+    "Fishing Rod": "weapon.fishingrod", "Any Armour": "armour", "Helmet": "armour.helmet", "Body Armour": "armour.chest",
+    "Gloves": "armour.gloves", "Boots": "armour.boots", "Quiver": "armour.quiver", "Shield": "armour.shield",
+    "Focus": "armour.focus", "Buckler": "armour.buckler", "Any Accessory": "accessory", "Amulet": "accessory.amulet",
+    "Belt": "accessory.belt", "Ring": "accessory.ring",
+}
+
+
+class PayloadError(ValueError):
+    """Filtro inválido ao montar o payload (a interface mostra como diálogo)."""
+
+    def __init__(self, message: str, title: str = "Erro de Valor"):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def _optional_float(value, label: str) -> Optional[float]:
+    if value is None or (isinstance(value, str) and not value.strip()): return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise PayloadError(f"Valor inválido para {label}.")
+
+
+def build_search_payload(filters: dict, on_log: Optional[Callable[[str, str], None]] = None,
+                         on_warning: Optional[Callable[[str, str], None]] = None, debug: bool = True) -> dict:
+    """Constrói o payload da API a partir de um dicionário de filtros.
+
+    Chaves aceitas: ``category``, ``currency``, ``price_min``, ``price_max``,
+    ``dps_min``, ``pdps_min`` e ``stats`` (lista de ``(nome, min, max)``).
+    Valores vazios são ignorados; valores inválidos levantam ``PayloadError``.
+    Com ``debug=False`` as mensagens de depuração nem são montadas.
+    """
+    log = on_log or (lambda message, level="info": None)
+    payload = {
+        "query": {
+            "status": {"option": "online"},
+            "stats": [{"type": "and", "filters": []}],
+            "filters": {}
+        },
+        "sort": {"price": "asc"}
+    }
+    stat_filters_list = payload["query"]["stats"][0]["filters"]
+
+    # Filtro de Categoria
+    category_key = filters.get("category")
+    if category_key and category_key in ITEM_CATEGORIES:
+        category_value = ITEM_CATEGORIES[category_key]
+        if category_value != "any":
+            payload["query"]["filters"]["type_filters"] = {"filters": {"category": {"option": category_value}}}
+    elif category_key:
+        if on_warning: on_warning("Categoria Inválida", f"Categoria '{category_key}' não encontrada. Removendo filtro.")
+        log(f"Categoria '{category_key}' não encontrada. Filtro ignorado.", "warning")
+
+    # Filtro de Preço
+    price_min_val = _optional_float(filters.get("price_min"), "Preço Mínimo ou Máximo")
+    price_max_val = _optional_float(filters.get("price_max"), "Preço Mínimo ou Máximo")
+    if price_min_val is not None or price_max_val is not None:
+        price_filter = {"option": filters.get("currency") or "divine"}
+        if price_min_val is not None: price_filter["min"] = price_min_val
+        if price_max_val is not None: price_filter["max"] = price_max_val
+        payload["query"]["filters"]["trade_filters"] = {"filters": {"price": price_filter}}
+
+    # Filtros DPS/PDPS
+    dps_min_val = _optional_float(filters.get("dps_min"), "DPS Mínimo ou PDPS Mínimo")
+    pdps_min_val = _optional_float(filters.get("pdps_min"), "DPS Mínimo ou PDPS Mínimo")
+    equipment_filters_dict = {}
+    if dps_min_val is not None:
+        equipment_filters_dict["dps"] = {"min": dps_min_val}
+        if debug: log(f"Filtro API: dps >= {dps_min_val}", "debug")
+    if pdps_min_val is not None:
+        equipment_filters_dict["pdps"] = {"min": pdps_min_val}
+        if debug: log(f"Filtro API: pdps >= {pdps_min_val}", "debug")
+    if equipment_filters_dict:
+        payload["query"]["filters"]["equipment_filters"] = {"filters": equipment_filters_dict}
+
+    # Filtros de Stats Específicos
+    for stat_name, min_value, max_value in filters.get("stats", []):
+        if not stat_name: continue
+        stat_id = STAT_MAP.get(stat_name)
+        value_filter = {}
+        stat_min = _optional_float(min_value, f"Mín/Máx de '{stat_name}'")
+        stat_max = _optional_float(max_value, f"Mín/Máx de '{stat_name}'")
+        if stat_min is not None: value_filter["min"] = stat_min
+        if stat_max is not None: value_filter["max"] = stat_max
+        if not value_filter: continue
+        if not stat_id:
+            log(f"Aviso: ID da API não encontrado para stat '{stat_name}'. Filtro ignorado.", "warning")
+            continue
+        stat_filters_list.append({"id": stat_id, "value": value_filter, "disabled": False})
+        if debug: log(f"Filtro API: {stat_name} ({stat_id}) = {value_filter}", "debug")
+
+    # Remove a chave "stats" se nenhuma filtro de stat foi adicionado
+    if not stat_filters_list:
+        payload["query"].pop("stats", None)
+
+    if debug: log("Payload construído.", "debug")
+    return payload
+
+
+class EngineHooks:
+    """Eventos de um ciclo de busca. A implementação base ignora todos."""
+
+    def status(self, message: str): pass
+
+    def log(self, message: str, level: str = "info"): pass
+
+    def log_enabled(self, level: str) -> bool:
+        """Permite pular a formatação de mensagens que seriam descartadas."""
+        return True
+
+    def item(self, item_details: dict):
+        """Item normalizado que passou nos filtros locais."""
+
+    def items_removed(self, item_ids: set):
+        """IDs que saíram do resultado (modo delta)."""
+
+    def results_cleared(self):
+        """Resultados anteriores descartados (novo ciclo completo)."""
+
+    def prices_updated(self):
+        """Cotações entre moedas mudaram (preços normalizados já exibidos precisam ser refeitos)."""
+
+    def auth_failure(self, status_code: int, stage: str): pass
+
+    def error(self, title: str, message: str):
+        """Erro que a interface mostra como diálogo (busca manual)."""
+
+
+class SearchSession:
+    """Estado do modo delta de uma busca salva entre ciclos."""
+
+    def __init__(self):
+        self.delta_key = None
+        self.seen_ids = set()
+        self.last_ids = set()
+        self.query_id = None
+
+    def begin(self, delta_key: str, incremental: bool) -> bool:
+        """Inicia um ciclo; retorna True se ele pode ser incremental."""
+        use_delta = bool(incremental and self.delta_key == delta_key and self.seen_ids)
+        self.delta_key = delta_key
+        if not use_delta:
+            self.seen_ids = set()
+            self.last_ids = set()
+        return use_delta
+
+
+class CycleResult:
+    """Resumo de um ciclo de busca."""
+
+    def __init__(self):
+        self.query_id = None
+        self.total = 0
+        self.processed = 0
+        self.kept = 0
+        self.dropped = 0
+        self.delta = False
+        self.interrupted = False
+        self.completed = False
+
+
+class SearchEngine:
+    """Executa ciclos de busca sobre um ``TradeClient`` compartilhado."""
+
+    def __init__(self, client: TradeClient, item_store=None, max_inflight_fetches: int = DEFAULT_MAX_IN_FLIGHT,
+                 max_price_shards: int = DEFAULT_MAX_SHARDS, max_sharded_items: int = DEFAULT_MAX_SHARDED_ITEMS,
+                 analysis_cache: Optional[AnalysisCache] = None, analysis_pool: Optional[AnalysisPool] = None,
+                 exchange_rates: Optional[ExchangeRates] = None):
+        self.client = client
+        # Compartilhados por todas as abas/buscas que usam este motor
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+        self.analysis_pool = analysis_pool
+        self.exchange_rates = exchange_rates   # None: preços sem normalização entre moedas
+        self.item_store = item_store
+        self.max_inflight_fetches = max_inflight_fetches
+        self.max_price_shards = max_price_shards
+        self.max_sharded_items = max_sharded_items
+
+    def run_cycle(self, session: SearchSession, league: str, payload: dict, hooks: EngineHooks,
+                  stop_event: Optional[threading.Event] = None, incremental: bool = False,
+                  divine_potential_min: float = 0.0, full_coverage: bool = False, polling: bool = False) -> CycleResult:
+        """Um ciclo completo: busca, fatias, delta, armazenamento local e detalhes.
+
+        Com ``incremental=True`` (modo delta do monitoramento) mantém os itens já
+        emitidos e busca detalhes apenas dos IDs nunca vistos. ``polling`` só
+        muda o tratamento de erros de rede (registrados em vez de ``hooks.error``).
+        """
+        result = CycleResult()
+        stop_flag = stop_event or threading.Event()
+
+        # Modo delta só vale se os filtros não mudaram desde o último ciclo
+        delta_key = json.dumps([payload, divine_potential_min, full_coverage], sort_keys=True)
+        use_delta = session.begin(delta_key, incremental)
+        result.delta = use_delta
+        if not use_delta:
+            hooks.status("Limpando resultados...")
+            hooks.results_cleared()
+
+        client = self.client
+        league_path = league.replace(" ", "%20")  # Formato para URL
+        on_rate_wait = lambda wait: hooks.status(f"Aguardando limite de requisições ({wait:.0f}s)...")
+
+        # Cotações vencidas são renovadas antes da busca (arquivo local ou /exchange)
+        exchange_rates = self.exchange_rates
+        if exchange_rates is not None and exchange_rates.enabled and exchange_rates.stale:
+            if exchange_rates.refresh_if_stale(client, league_path, stop_event=stop_flag, on_wait=on_rate_wait, log=hooks.log):
+                hooks.prices_updated()
+
+        hooks.log(f"Enviando busca para: {client.base_url}/search/poe2/{league_path}", "info")
+        hooks.status("Enviando requisição...")
+        try:
+            # --- Requisição POST para obter IDs (sessão compartilhada + rate limit global) ---
+            search_response = client.search(league_path, payload, stop_event=stop_flag, on_wait=on_rate_wait)
+            if search_response is None:
+                hooks.log("Busca interrompida pelo usuário.", "info")
+                hooks.status("Busca interrompida.")
+                result.interrupted = True
+                return result
+            hooks.log(f"Resposta da busca recebida (Status: {search_response.status_code})", "info")
+            if hooks.log_enabled("debug"):
+                cache_stats = client.search_cache.stats()
+                hooks.log(f"Cache de buscas: {cache_stats['hits']} reaproveitadas, {cache_stats['coalesced']} agrupadas, {cache_stats['misses']} enviadas.", "debug")
+
+            # Tratamento de Erros da Requisição de Busca
+            if search_response.status_code != 200:
+                self._handle_search_error(search_response, hooks)
+                return result
+
+            # --- Processamento da Resposta da Busca ---
+            search_data = search_response.json()
+            query_id = search_data.get("id")
+            item_ids = search_data.get("result", [])
+            total_results = search_data.get("total", 0)
+            result.total = total_results
+
+            if not query_id:
+                hooks.log("Erro: Resposta da busca sem ID da query.", "error")
+                hooks.status("Erro: Resposta API inválida")
+                return result
+
+            session.query_id = result.query_id = query_id
+            hooks.status(f"ID: {query_id[:8]}.. Total: {total_results}. Buscando detalhes...")
+            hooks.log(f"ID Query: {query_id}. Total API: {total_results}", "info")
+
+            # --- Cobertura completa: fatia a busca por faixas de preço além do limite de 100 IDs ---
+            max_items_to_fetch = API_RESULT_CAP
+            fetch_entries = [(iid, query_id) for iid in item_ids[:max_items_to_fetch]]
+            if full_coverage and total_results > len(item_ids):
+                shard_result = self._run_price_shards(league_path, payload, query_id, item_ids, total_results,
+                                                      hooks, stop_flag, on_rate_wait)
+                if shard_result is None:
+                    result.interrupted = stop_flag.is_set()
+                    return result
+                max_items_to_fetch = self.max_sharded_items
+                fetch_entries = shard_result.entries
+                item_ids = [iid for iid, _ in fetch_entries]
+            item_ids_to_fetch = [iid for iid, _ in fetch_entries]
+
+            # --- Delta: remove itens que saíram do resultado e pula IDs já vistos ---
+            current_result_ids = set(item_ids_to_fetch)
+            seen_ids = session.seen_ids
+            if use_delta:
+                dropped_ids = session.last_ids - current_result_ids
+                if dropped_ids:
+                    hooks.items_removed(dropped_ids)
+                    seen_ids.difference_update(dropped_ids)
+                fetch_entries = [entry for entry in fetch_entries if entry[0] not in seen_ids]
+                item_ids_to_fetch = [iid for iid, _ in fetch_entries]
+                result.kept = len(current_result_ids) - len(item_ids_to_fetch)
+                result.dropped = len(dropped_ids)
+                hooks.log(f"Delta: {len(item_ids_to_fetch)} novos, {result.kept} mantidos, {result.dropped} removidos.", "info")
+            session.last_ids = current_result_ids
+
+            if not item_ids:
+                hooks.status("Nenhum item encontrado.")
+                hooks.log("Nenhum resultado encontrado.", "info")
+                result.completed = True
+                return result
+            if total_results > max_items_to_fetch:
+                hooks.log(f"Limitando detalhes aos primeiros {max_items_to_fetch} de {total_results} itens.", "warning")
+                hooks.status(f"ID: {query_id[:8]}.. Total: {total_results}. Buscando {max_items_to_fetch}...")
+
+            def emit(item_data, entry_query_id, **analyzed):
+                self._emit_item(item_data, entry_query_id, league, divine_potential_min, hooks, **analyzed)
+                seen_ids.add(item_data.get("id"))
+                result.processed += 1
+
+            # --- Análise: na própria thread ou em lotes no pool de processos ---
+            analysis_pool = self.analysis_pool
+            analysis_cache = self.analysis_cache
+            pending = deque()   # (future, lote) enviados ao pool, na ordem de envio
+            pending_keys = {}   # id(item_data) -> chave do cache de análise
+
+            def dispatch(entries):
+                if analysis_pool is None or not analysis_pool.enabled:
+                    # Lotes (ex.: itens do armazenamento local) têm o potencial de Divine calculado de uma vez;
+                    # itens decodificados em stream chegam um a um e são analisados na hora
+                    analyses = (analyze_items([item_data for item_data, _ in entries], analysis_cache)
+                                if len(entries) > 1 else [None] * len(entries))
+                    for (item_data, entry_query_id), analysis in zip(entries, analyses):
+                        if stop_flag.is_set(): return
+                        emit(item_data, entry_query_id, analysis=analysis)
+                    return
+                jobs = []
+                for item_data, entry_query_id in entries:
+                    try:
+                        key = analysis_cache_key(item_data.get("item", {})) if analysis_cache.enabled else None
+                    except Exception:
+                        emit(item_data, entry_query_id); continue   # Item malformado: o erro é registrado por _emit_item
+                    cached = analysis_cache.get(key) if key else None
+                    if cached is not None:
+                        emit(item_data, entry_query_id, analysis=cached)
+                        continue
+                    if key: pending_keys[id(item_data)] = key
+                    jobs.append((item_data, entry_query_id, league))
+                if jobs: pending.extend(analysis_pool.submit(jobs))
+                collect(block=False)
+
+            def collect(block):
+                """Publica os lotes já analisados (todos, com ``block=True``), preservando a ordem."""
+                while pending and (block or pending[0][0].done()):
+                    future, chunk = pending.popleft()
+                    if stop_flag.is_set():
+                        future.cancel(); continue
+                    try:
+                        records = future.result()
+                    except Exception as e_pool:
+                        hooks.log(f"Falha no processo de análise ({e_pool}); analisando na thread da busca.", "warning")
+                        analysis_pool.mark_failed()
+                        records = [None] * len(chunk)
+                    for (item_data, entry_query_id, _), record in zip(chunk, records):
+                        key = pending_keys.pop(id(item_data), None)
+                        if record is None:
+                            emit(item_data, entry_query_id); continue
+                        if key and record[0] is not None:
+                            analysis_cache.put(key, details_analysis(record[0]))
+                        emit(item_data, entry_query_id, analyzed=record)
+
+            # --- Itens já buscados antes (qualquer aba/execução) vêm do armazenamento local ---
+            item_store = self.item_store
+            if item_store and fetch_entries:
+                stored_items = item_store.get_many(iid for iid, _ in fetch_entries)
+                if stored_items:
+                    dispatch([(stored_items[item_id], entry_query_id) for item_id, entry_query_id in fetch_entries
+                              if item_id in stored_items])
+                    fetch_entries = [entry for entry in fetch_entries if entry[0] not in stored_items]
+                    hooks.log(f"Armazenamento local: {len(stored_items)} itens reaproveitados, {len(fetch_entries)} a buscar.", "info")
+
+            # --- Pipeline assíncrono: vários lotes em voo, cada um processado ao chegar ---
+            batches = make_batches_by_query(fetch_entries)
+            progress = {"batches": 0, "critical_error": False}
+
+            def handle_fetch_result(batch, fetch_response, fetch_error):
+                progress["batches"] += 1
+                hooks.status(f"Detalhes: lote {progress['batches']}/{len(batches)} ({result.processed} itens)...")
+                if isinstance(fetch_error, requests.exceptions.Timeout):
+                    hooks.log(f"Timeout ao buscar detalhes {batch.label}.", "error")
+                    return CONTINUE
+                if isinstance(fetch_error, CircuitOpenError):
+                    hooks.log(f"Detalhes pausados ({fetch_error}). Restante fica para o próximo ciclo.", "warning")
+                    return ABORT
+                if fetch_error is not None:
+                    hooks.log(f"Erro rede buscar detalhes {batch.label}: {fetch_error}.", "error")
+                    return CONTINUE
+                if fetch_response is None:
+                    return ABORT
+
+                try:
+                    return process_fetch_response(batch, fetch_response)
+                finally:
+                    fetch_response.close()   # Devolve a conexão ao pool (corpo lido em stream)
+
+            def process_fetch_response(batch, fetch_response):
+                if hooks.log_enabled("debug"):
+                    hooks.log(f"Resposta fetch recebida ({fetch_response.status_code}) - {batch.label}", "debug")
+
+                if fetch_response.status_code != 200:
+                    hooks.log(f"Erro {fetch_response.status_code} buscar detalhes {batch.label}.", "error")
+                    try:
+                        error_details = fetch_response.json()
+                        hooks.log(f"Detalhes erro fetch: {json.dumps(error_details)}", "error")
+                    except ValueError:
+                        hooks.log(f"Resposta erro fetch (não JSON): {fetch_response.text[:200]}", "error")
+
+                    # Falha de autenticação interrompe; 429/5xx (após as novas tentativas) só adia o restante
+                    if is_auth_failure(fetch_response.status_code):
+                        hooks.auth_failure(fetch_response.status_code, "detalhes")
+                        progress["critical_error"] = True
+                        return ABORT # Para a busca atual
+                    if is_retryable_status(fetch_response.status_code):
+                        hooks.log(f"Erro temporário {fetch_response.status_code}; lotes restantes ficam para o próximo ciclo.", "warning")
+                        return ABORT
+                    return CONTINUE # Continua para próximo lote se não for erro crítico
+
+                # --- Processamento dos Detalhes do Lote (decodificados item a item, conforme chegam) ---
+                streamed_items = []
+                immediate = analysis_pool is None or not analysis_pool.enabled
+                try:
+                    for item_detail in iter_fetch_results(fetch_response):
+                        if not item_detail:
+                            hooks.log(f"Item nulo/vazio no {batch.label}.", "warning")
+                            continue
+                        streamed_items.append(item_detail)
+                        # Sem pool, cada item é analisado e exibido antes de o restante do lote chegar
+                        if immediate: dispatch([(item_detail, batch.query_id)])
+                        if stop_flag.is_set(): break
+                except ValueError:
+                    hooks.log(f"Erro decodificar JSON fetch {batch.label}.", "error")
+
+                if not streamed_items:
+                    if not stop_flag.is_set(): hooks.log(f"{batch.label} não retornou itens nos detalhes.", "warning")
+                    return ABORT if stop_flag.is_set() else CONTINUE
+                if item_store:
+                    try:
+                        item_store.put_many(streamed_items)
+                    except Exception as e_store:
+                        hooks.log(f"Falha ao gravar itens no armazenamento local: {e_store}", "warning")
+                if not immediate:
+                    dispatch([(item_detail, batch.query_id) for item_detail in streamed_items])
+                return ABORT if stop_flag.is_set() else CONTINUE
+
+            fetch_stats = FetchPipeline(client, self.max_inflight_fetches, stream=True).run(
+                batches, handle_fetch_result, stop_event=stop_flag, on_wait=on_rate_wait)
+            collect(block=True)
+            if progress["critical_error"]:
+                return result
+            if stop_flag.is_set():
+                hooks.log("Busca interrompida pelo usuário.", "info")
+                result.interrupted = True
+            if batches and fetch_stats.time_to_first_result is not None and hooks.log_enabled("debug"):
+                hooks.log(f"Detalhes: primeiro lote em {fetch_stats.time_to_first_result:.2f}s, "
+                          f"{len(batches)} lotes em {fetch_stats.total_time:.2f}s.", "debug")
+            if hooks.log_enabled("debug") and self.analysis_cache.enabled:
+                analysis_stats = self.analysis_cache.stats()
+                hooks.log(f"Cache de análise: {analysis_stats['hits']} reaproveitadas, {analysis_stats['misses']} calculadas "
+                          f"({analysis_stats['hit_rate']:.0%}), {analysis_stats['entries']} entradas.", "debug")
+
+            # --- Finalização da Busca ---
+            items_processed = result.processed
+            final_status_msg = f"Busca concluída. {items_processed} itens exibidos."
+            if use_delta:
+                final_status_msg = f"Busca incremental concluída. {items_processed} novos, {result.kept} mantidos, {result.dropped} removidos."
+            elif items_processed < total_results:
+                 if items_processed >= max_items_to_fetch:
+                      final_status_msg += f" (Limite {max_items_to_fetch} de {total_results} totais)"
+                 else:
+                      final_status_msg += f" (de {total_results} totais)"
+            # No monitoramento o status de espera do próximo ciclo tem precedência
+            if not polling or stop_flag.is_set():
+                hooks.status(final_status_msg)
+            hooks.log(final_status_msg, "info")
+            result.completed = True
+
+        except CircuitOpenError as circuit_err:
+            # API instável: o disjuntor libera sozinho e o monitoramento continua agendado
+            hooks.status(f"API instável. Retomando em {circuit_err.retry_in:.0f}s...")
+            hooks.log(f"Busca adiada: {circuit_err}", "warning")
+        except requests.exceptions.RequestException as req_err:
+            hooks.status("Erro de Rede")
+            hooks.log(f"Erro de rede: {req_err}", "error")
+            # No monitoramento a falha é só registrada; o próximo ciclo tenta de novo
+            if not polling:
+                hooks.error("Erro de Rede", f"Falha na comunicação com a API:\n{req_err}")
+        except Exception as e:
+            hooks.status("Erro Inesperado na Busca")
+            hooks.log(f"Erro inesperado no ciclo de busca: {e}\n{traceback.format_exc()}", "error")
+            hooks.error("Erro Inesperado", f"Ocorreu um erro inesperado:\n{e}\nVerifique o log da aba para detalhes.")
+        return result
+
+    def _handle_search_error(self, search_response, hooks: EngineHooks):
+        status_code = search_response.status_code
+        error_msg = f"Erro API busca ({status_code})."
+        try:
+            error_details = search_response.json()
+            api_error_msg = error_details.get("error", {}).get("message", "")
+            if api_error_msg: error_msg += f"\nAPI: {api_error_msg}"
+            hooks.log(f"Detalhes erro API (busca): {json.dumps(error_details)}", "error")
+        except ValueError:
+            error_msg += f"\nResposta não JSON: {search_response.text[:200]}"
+            hooks.log(f"Resposta não JSON (busca {status_code}): {search_response.text}", "error")
+        # Adiciona dicas baseadas no status code
+        if status_code == 400: error_msg += "\nVerifique os filtros (payload inválido?)."
+        elif status_code in [401, 403]: error_msg += "\nErro autenticação. Verifique os Cookies."
+        elif status_code == 429: error_msg += "\nLimite de requisições (Rate Limit). Aguarde."
+        elif status_code >= 500: error_msg += "\nErro no servidor da GGG."
+
+        if is_auth_failure(status_code):
+            hooks.auth_failure(status_code, "busca")
+        elif is_retryable_status(status_code):
+            # Tentativas esgotadas: só registra, o próximo ciclo tenta de novo
+            hooks.status(f"Erro temporário {status_code} na busca. Nova tentativa no próximo ciclo.")
+            hooks.log(error_msg.replace("\n", " "), "warning")
+        else:
+            hooks.status(f"Erro {status_code} busca")
+            hooks.error(f"Erro {status_code} - Busca", error_msg)
+
+    def _run_price_shards(self, league_path, payload, query_id, item_ids, total_results, hooks, stop_flag, on_rate_wait):
+        """Expande a busca truncada em fatias de preço. Retorna None se interrompida ou sem autenticação."""
+
+        def search_band(band_payload):
+            response = self.client.search(league_path, band_payload, stop_event=stop_flag, on_wait=on_rate_wait)
+            if response is None: return None
+            if response.status_code != 200:
+                raise ShardSearchError(f"Erro {response.status_code} na fatia", response.status_code,
+                                       fatal=is_auth_failure(response.status_code))
+            try:
+                band_data = response.json()
+            except ValueError:
+                raise ShardSearchError("Resposta não JSON na fatia")
+            if not band_data.get("id"): raise ShardSearchError("Fatia sem ID da query")
+            return band_data["id"], band_data.get("result", []), band_data.get("total", 0)
+
+        def on_progress(progress):
+            hooks.status(f"Cobertura completa: {len(progress.entries)}/{total_results} IDs ({progress.searches} fatias)...")
+
+        hooks.log(f"Total {total_results} acima do limite da API. Fatiando por faixa de preço...", "info")
+        sharder = PriceShardedSearch(search_band, self.max_price_shards, self.max_sharded_items)
+        shard_result = sharder.expand(payload, query_id, item_ids, total_results, on_progress=on_progress)
+
+        if shard_result.fatal_error is not None:
+            hooks.auth_failure(shard_result.fatal_error.status_code, "fatias de preço")
+            return None
+        if shard_result.interrupted or stop_flag.is_set():
+            hooks.log("Busca interrompida pelo usuário.", "info")
+            hooks.status("Busca interrompida.")
+            return None
+        hooks.log(f"Fatiamento: {len(shard_result.entries)} IDs únicos em {shard_result.searches} buscas extras.", "info")
+        if not shard_result.complete:
+            hooks.log(f"Cobertura parcial: {shard_result.failed_bands} fatias com erro, {shard_result.unsplittable_bands} "
+                      f"indivisíveis (mais de {API_RESULT_CAP} itens no mesmo preço), {shard_result.skipped_bands} "
+                      f"fora do limite de {self.max_price_shards} buscas/{self.max_sharded_items} itens.", "warning")
+        return shard_result
+
+    def _emit_item(self, item_data, query_id, league, divine_potential_min, hooks: EngineHooks,
+                   analysis: Optional[tuple] = None, analyzed=None):
+        """Normaliza (ou recebe já normalizado do pool, em ``analyzed``) e publica o item."""
+        item_id_err = item_data.get("id", "ID_DESCONHECIDO") if isinstance(item_data, dict) else "ID_DESCONHECIDO"
+        if analyzed is not None:
+            item_details, error, warnings = analyzed
+            for message in warnings: hooks.log(message, "warning")
+            if item_details is None:
+                hooks.log(f"Erro crítico processando item {item_id_err}: {error}", "error")
+                return
+            item_details["raw_data"] = item_data
+        else:
+            try:
+                item_details = normalize_item(item_data, query_id, league, on_warning=lambda message: hooks.log(message, "warning"),
+                                              analysis_cache=self.analysis_cache, analysis=analysis)
+            except Exception as e_process:
+                hooks.log(f"Erro crítico processando item {item_id_err}: {e_process}\n{traceback.format_exc()}", "error")
+                return
+        if self.exchange_rates is not None:
+            price_normalized = self.exchange_rates.normalize(item_details.get("price_amount"), item_details.get("price_currency"))
+            item_details["price_normalized"] = price_normalized
+            item_details["sort_keys"]["preco"] = price_sort_key(price_normalized, item_details.get("price_amount"),
+                                                                item_details.get("price_currency"))
+        # Pula o item se não atende ao potencial mínimo de Divine
+        if passes_divine_filter(item_details, divine_potential_min):
+            hooks.item(item_details)
+
+
+# --- Modo headless ---
+
+class SavedSearch:
+    """Busca salva lida de uma seção ``[Search:<nome>]``."""
+
+    def __init__(self, name: str, filters: dict, interval: float = DEFAULT_POLLING_INTERVAL,
+                 priority: int = PRIORITY_NORMAL, delta: bool = True, full_coverage: bool = False,
+                 divine_potential_min: float = 0.0, league: Optional[str] = None):
+        self.name = name
+        self.filters = filters
+        self.interval = max(5.0, float(interval))
+        self.priority = priority
+        self.delta = delta
+        self.full_coverage = full_coverage
+        self.divine_potential_min = divine_potential_min
+        self.league = league
+
+    @classmethod
+    def from_section(cls, name: str, section) -> "SavedSearch":
+        stats = []
+        # Uma linha por stat: "nome | min | max" (min ou max podem ficar vazios)
+        for line in section.get('stats', '').splitlines():
+            if not line.strip(): continue
+            parts = [part.strip() for part in line.split('|')] + ['', '']
+            stats.append((parts[0], parts[1], parts[2]))
+        filters = {
+            "category": section.get('category', ''),
+            "currency": section.get('currency', 'divine'),
+            "price_min": section.get('price_min', ''),
+            "price_max": section.get('price_max', ''),
+            "dps_min": section.get('dps_min', ''),
+            "pdps_min": section.get('pdps_min', ''),
+            "stats": stats,
+        }
+        return cls(name, filters,
+                   interval=section.getfloat('interval', DEFAULT_POLLING_INTERVAL),
+                   priority=PRIORITY_LABELS.get(section.get('priority', 'Normal').strip().capitalize(), PRIORITY_NORMAL),
+                   delta=section.getboolean('delta', True),
+                   full_coverage=section.getboolean('full_coverage', False),
+                   divine_potential_min=section.getfloat('divine_potential_min', 0.0),
+                   league=section.get('league') or None)
+
+
+def load_saved_searches(config: configparser.ConfigParser) -> List[SavedSearch]:
+    return [SavedSearch.from_section(section_name[len(SEARCH_SECTION_PREFIX):].strip(), config[section_name])
+            for section_name in config.sections() if section_name.startswith(SEARCH_SECTION_PREFIX)]
+
+
+def _item_record(search_name: str, item_details: dict) -> dict:
+    """Registro serializável de um item (sem o JSON bruto da API)."""
+    record = {"event": "item", "search": search_name}
+    for key, value in item_details.items():
+        if key in ("raw_data", "sort_keys"): continue
+        record[key] = value.isoformat() if hasattr(value, "isoformat") else value
+    return record
+
+
+class JsonLinesSink:
+    """Saída dos resultados em JSON lines (stdout ou arquivo, um objeto por linha)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._stream = open(path, "a", encoding="utf-8") if path and path != "-" else sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self):
+        if self._stream is not sys.stdout: self._stream.close()
+
+
+class _HeadlessHooks(EngineHooks):
+    def __init__(self, monitor: "HeadlessMonitor", search: SavedSearch):
+        self.monitor = monitor
+        self.search = search
+
+    def status(self, message):
+        self.monitor.log(self.search.name, message, "debug")
+
+    def log(self, message, level="info"):
+        self.monitor.log(self.search.name, message, level)
+
+    def log_enabled(self, level):
+        return self.monitor.LOG_LEVELS.get(level, 1) >= self.monitor.min_level
+
+    def item(self, item_details):
+        self.monitor.sink.write(_item_record(self.search.name, item_details))
+
+    def items_removed(self, item_ids):
+        for item_id in item_ids:
+            self.monitor.sink.write({"event": "removed", "search": self.search.name, "id": item_id})
+
+    def auth_failure(self, status_code, stage):
+        self.monitor.log(self.search.name, f"Erro {status_code} de autenticação ({stage}). Busca desativada; atualize POESESSID/cf_clearance.", "error")
+        self.monitor.disable(self.search.name)
+
+    def error(self, title, message):
+        self.monitor.log(self.search.name, f"{title}: {message}".replace("\n", " "), "error")
+
+
+class HeadlessMonitor:
+    """Roda as buscas salvas com o agendador central, sem interface."""
+
+    LOG_LEVELS = {"debug": 0, "info": 1, "warning": 2, "error": 3}
+
+    def __init__(self, config_path: str = CONFIG_FILE, output: Optional[str] = None, verbose: bool = False):
+        self.config = configparser.ConfigParser()
+        self.config.read(config_path, encoding="utf-8")
+        self.min_level = self.LOG_LEVELS["debug" if verbose else "info"]
+        self.sink = JsonLinesSink(output)
+        self.searches = {search.name: search for search in load_saved_searches(self.config)}
+        self.sessions: Dict[str, SearchSession] = {name: SearchSession() for name in self.searches}
+        self.stop_event = threading.Event()
+        self.league = DEFAULT_LEAGUE
+        self.client = TradeClient()
+        self.item_store = None
+        self.analysis_pool = None
+        self.engine = None
+        self.scheduler = None
+        self._configure()
+
+    def log(self, search_name: str, message: str, level: str = "info"):
+        if self.LOG_LEVELS.get(level, 1) < self.min_level: return
+        timestamp = time.strftime("%H:%M:%S")
+        prefix = f"[{search_name}] " if search_name else ""
+        print(f"{timestamp} {level.upper():7s} {prefix}{message}", file=sys.stderr, flush=True)
+
+    def _configure(self):
+        """Aplica as mesmas seções globais usadas pela interface."""
+        config = self.config
+        max_inflight = DEFAULT_MAX_IN_FLIGHT
+        max_shards, max_items = DEFAULT_MAX_SHARDS, DEFAULT_MAX_SHARDED_ITEMS
+        if 'Network' in config:
+            network = config['Network']
+            self.client.configure_pool(network.getint('pool_connections', DEFAULT_POOL_CONNECTIONS),
+                                       network.getint('pool_maxsize', DEFAULT_POOL_MAXSIZE))
+            max_inflight = max(1, network.getint('max_inflight_fetches', DEFAULT_MAX_IN_FLIGHT))
+            self.client.search_cache.set_ttl(network.getfloat('search_cache_ttl', DEFAULT_SEARCH_CACHE_TTL))
+            self.client.set_base_url(network.get('api_base_url', TRADE_API_BASE_URL))
+        if 'Sharding' in config:
+            max_shards = max(0, config['Sharding'].getint('max_shards', DEFAULT_MAX_SHARDS))
+            max_items = max(API_RESULT_CAP, config['Sharding'].getint('max_items', DEFAULT_MAX_SHARDED_ITEMS))
+        self.league = config.get('Authentication', 'league', fallback=DEFAULT_LEAGUE)
+        self.client.configure(useragent=config.get('Authentication', 'useragent', fallback=None),
+                              poesessid=config.get('Authentication', 'poesessid', fallback=''),
+                              cf_clearance=config.get('Authentication', 'cf_clearance', fallback=''))
+
+        replay_mode = MODE_LIVE
+        if 'Replay' in config:
+            replay = config['Replay']
+            replay_mode = install_transport(self.client, replay.get('mode', MODE_LIVE).strip().lower(),
+                                            replay.get('corpus', DEFAULT_CORPUS_FILE),
+                                            replay.get('timing', TIMING_ORIGINAL).strip().lower())
+            if replay_mode != MODE_LIVE: self.log("", f"Modo {replay_mode} ativo.", "warning")
+
+        # Itens vindos do corpus não devem se misturar ao armazenamento real
+        if config.getboolean('Storage', 'enabled', fallback=True) and replay_mode == MODE_LIVE:
+            self.item_store = open_item_store(config.get('Storage', 'item_store', fallback=ITEM_STORE_FILE),
+                                              config.getfloat('Storage', 'max_age_hours', fallback=DEFAULT_MAX_AGE_HOURS))
+            if self.item_store: self.item_store.prune()
+
+        analysis_cache = AnalysisCache(config.getint('Analysis', 'cache_size', fallback=DEFAULT_ANALYSIS_CACHE_SIZE),
+                                       config.getfloat('Analysis', 'cache_ttl', fallback=DEFAULT_ANALYSIS_CACHE_TTL))
+        self.analysis_pool = AnalysisPool(config.getint('Analysis', 'workers', fallback=DEFAULT_ANALYSIS_WORKERS),
+                                          config.getint('Analysis', 'batch_size', fallback=DEFAULT_ANALYSIS_BATCH_SIZE))
+        exchange_rates = ExchangeRates(config.get('Prices', 'base_currency', fallback=DEFAULT_BASE_CURRENCY).strip().lower(),
+                                       config.get('Prices', 'source', fallback=SOURCE_FILE).strip().lower(),
+                                       config.get('Prices', 'rates_file', fallback=DEFAULT_RATES_FILE),
+                                       config.getfloat('Prices', 'ttl', fallback=DEFAULT_RATES_TTL))
+        self.engine = SearchEngine(self.client, self.item_store, max_inflight, max_shards, max_items,
+                                   analysis_cache, self.analysis_pool, exchange_rates)
+        self.max_concurrent = max(1, config.getint('Polling', 'max_concurrent_searches', fallback=DEFAULT_MAX_CONCURRENT))
+        self.jitter = max(0.0, config.getfloat('Polling', 'jitter', fallback=DEFAULT_JITTER))
+
+    def run_search(self, name: str):
+        """Um ciclo de uma busca salva (chamado pelo agendador ou pelo modo --once)."""
+        search = self.searches.get(name)
+        if search is None or self.stop_event.is_set(): return
+        hooks = _HeadlessHooks(self, search)
+        try:
+            payload = build_search_payload(search.filters, on_log=hooks.log, debug=hooks.log_enabled("debug"))
+        except PayloadError as payload_err:
+            self.log(name, f"Filtro inválido: {payload_err}. Busca desativada.", "error")
+            self.disable(name)
+            return
+        result = self.engine.run_cycle(self.sessions[name], search.league or self.league, payload, hooks,
+                                       stop_event=self.stop_event, incremental=search.delta,
+                                       divine_potential_min=search.divine_potential_min,
+                                       full_coverage=search.full_coverage, polling=self.scheduler is not None)
+        if result.completed:
+            self.sink.write({"event": "cycle", "search": name, "query_id": result.query_id, "total": result.total,
+                             "new": result.processed, "kept": result.kept, "removed": result.dropped,
+                             "time": time.time()})
+
+    def disable(self, name: str):
+        self.searches.pop(name, None)
+        if self.scheduler: self.scheduler.remove(name)
+
+    def run_once(self):
+        for name in list(self.searches):
+            self.run_search(name)
+
+    def run_forever(self):
+        """Modo daemon: agenda todas as buscas até SIGINT/SIGTERM."""
+        self.scheduler = PollingScheduler(max_concurrent=self.max_concurrent, jitter=self.jitter)
+        for name, search in list(self.searches.items()):
+            self.scheduler.add(name, search.interval, lambda n=name: self.run_search(n), priority=search.priority)
+        self.log("", f"Monitorando {len(self.searches)} buscas ({self.max_concurrent} simultâneas).", "info")
+        try:
+            while not self.stop_event.wait(1.0):
+                if not self.searches:
+                    self.log("", "Nenhuma busca ativa. Encerrando.", "warning")
+                    break
+        finally:
+            self.stop_event.set()
+            self.scheduler.shutdown(wait=True, timeout=5.0)
+
+    def close(self):
+        self.stop_event.set()
+        if self.analysis_pool: self.analysis_pool.shutdown(wait=False)
+        if self.item_store: self.item_store.close()
+        self.client.close()
+        self.sink.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitoramento headless das buscas salvas do PoE2 Item Tracker.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="Arquivo .ini com as seções globais e as seções [Search:<nome>]")
+    parser.add_argument("--output", default="-", help="Arquivo JSON lines de saída ('-' = stdout)")
+    parser.add_argument("--once", action="store_true", help="Executa um ciclo de cada busca e sai")
+    parser.add_argument("--verbose", action="store_true", help="Inclui mensagens de depuração no log (stderr)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.config):
+        parser.error(f"arquivo de configuração '{args.config}' não encontrado")
+    monitor = HeadlessMonitor(args.config, args.output, args.verbose)
+    if not monitor.searches:
+        parser.error(f"nenhuma seção [{SEARCH_SECTION_PREFIX}<nome>] em '{args.config}'")
+
+    def _request_stop(signum, frame):
+        monitor.stop_event.set()
+    signal.signal(signal.SIGTERM, _request_stop)
+    try:
+        if args.once: monitor.run_once()
+        else: monitor.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
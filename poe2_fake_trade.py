@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""Servidor local que imita ``/api/trade2/search``, ``/fetch`` e ``/exchange``.
+
+Serve itens sintéticos (ou os itens de um corpus gravado com ``poe2_replay``),
+adiciona latência configurável, devolve headers ``X-Rate-Limit-*`` realistas e
+responde 429 (com ``Retry-After`` e penalidade) quando um cliente excede as
+regras. Serve para medir o agendamento e o controle de rate limit do tracker e
+do ``api_server.py`` de forma determinística, sem tocar no site real.
+Também pode responder 503 a uma fração dos ``/fetch`` para exercitar as novas
+tentativas do ``TradeClient``.
+
+    python poe2_fake_trade.py --port 8089 --items 2000 --latency 120
+    python poe2_fake_trade.py --check-fetch-retry
+
+Depois aponte os clientes para ``http://127.0.0.1:8089/api/trade2``
+(``api_base_url`` na seção ``[Network]`` ou ``POE_API_BASE_URL`` no servidor).
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+from poe2_rate_limiter import DEFAULT_RULES, parse_rule_windows
+
+DEFAULT_PORT = 8089
+DEFAULT_ITEM_COUNT = 1000
+SEARCH_RESULT_CAP = 100
+FETCH_MAX_IDS = 10
+QUERY_TTL = 600.0   # Segundos em que um query_id continua válido para /fetch
+
+CURRENCIES = ["exalted", "divine", "chaos"]
+# Valor de referência de cada moeda em exalted (ofertas do /exchange variam em torno dele)
+EXCHANGE_RATES = {"exalted": 1.0, "divine": 380.0, "chaos": 11.0, "regal": 0.6, "alchemy": 0.8,
+                  "annulment": 4.5, "vaal": 1.5, "augmentation": 0.05, "transmutation": 0.02, "gold": 0.001}
+EXCHANGE_OFFERS = 20
+RETRY_CHECK_ERROR_RATE = 0.5   # Fração de /fetch com 503 em --check-fetch-retry
+WEAPON_BASES = [
+    ("Expert Shortbow", 41, 76, 1.25), ("Warmonger Bow", 53, 99, 1.1), ("Dualstring Bow", 35, 65, 1.1),
+    ("Spiked Club", 40, 58, 1.1), ("Expert Quarterstaff", 46, 95, 1.4), ("Ironwood Greathammer", 90, 121, 1.05),
+]
+# (texto, hash, min, max, magnitudes)
+MOD_TEMPLATES = [
+    ("{0}% increased Physical Damage", "explicit.stat_1509134228", 60, 179, 1),
+    ("Adds {0} to {1} Physical Damage", "explicit.stat_1940865751", 8, 36, 2),
+    ("{0}% increased Attack Speed", "explicit.stat_210067635", 5, 25, 1),
+    ("+{0}% to Critical Hit Chance", "explicit.stat_518292764", 1, 5, 1),
+    ("Adds {0} to {1} Fire Damage", "explicit.stat_709508406", 10, 60, 2),
+    ("+{0} to Level of all Projectile Skills", "explicit.stat_1202301673", 1, 4, 1),
+    ("+{0} to maximum Life", "explicit.stat_3299347043", 20, 120, 1),
+    ("+{0}% to Cold Resistance", "explicit.stat_4220027924", 10, 45, 1),
+]
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def synthetic_item(rng: random.Random, index: int, now: float) -> dict:
+    """Gera um anúncio de arma com props, mods e ``extended`` no formato do /fetch."""
+    base, phys_min, phys_max, speed = rng.choice(WEAPON_BASES)
+    explicit, mods, hashes = [], [], []
+    for mod_index, (text, stat_hash, low, high, count) in enumerate(rng.sample(MOD_TEMPLATES, rng.randint(2, 5))):
+        tier = rng.randint(1, 6)
+        span = (high - low) / 6.0
+        tier_low = int(low + span * (6 - tier)); tier_high = int(tier_low + span)
+        if count == 2:
+            lo_val = rng.randint(tier_low // 3 + 1, max(tier_low // 3 + 1, tier_high // 3 + 1))
+            hi_val = rng.randint(tier_low, max(tier_low, tier_high))
+            explicit.append(text.format(lo_val, hi_val))
+            magnitudes = [{"hash": stat_hash, "min": tier_low // 3 + 1, "max": tier_high // 3 + 1},
+                          {"hash": stat_hash, "min": tier_low, "max": tier_high}]
+        else:
+            value = rng.randint(tier_low, max(tier_low, tier_high))
+            explicit.append(text.format(value))
+            magnitudes = [{"hash": stat_hash, "min": tier_low, "max": tier_high}]
+        mods.append({"name": "", "tier": f"P{tier}" if mod_index % 2 == 0 else f"S{tier}", "level": 1, "magnitudes": magnitudes})
+        hashes.append([stat_hash, [mod_index]])
+
+    pdps = round((phys_min + phys_max) / 2 * speed * rng.uniform(1.0, 2.6), 1)
+    edps = round(rng.choice([0, 0, rng.uniform(10, 120)]), 1)
+    amount = round(rng.choice([rng.uniform(1, 20), rng.uniform(1, 200), rng.uniform(20, 2000)]), 1 if rng.random() < 0.5 else 0)
+    listing_id = uuid.UUID(int=rng.getrandbits(128)).hex + uuid.UUID(int=rng.getrandbits(128)).hex
+    return {
+        "id": listing_id,
+        "listing": {
+            "method": "psapi",
+            "indexed": _iso(now - rng.uniform(0, 3 * 86400)),
+            "account": {"name": f"FakeSeller#{index % 97:04d}"},
+            "price": {"type": "~price", "amount": amount, "currency": rng.choice(CURRENCIES)},
+            "whisper": f"@FakeSeller{index % 97} Hi, I would like to buy your {base}",
+        },
+        "item": {
+            "name": f"Fake Edge {index}", "typeLine": base, "baseType": base, "ilvl": rng.randint(65, 82),
+            "identified": True, "rarity": "Rare", "frameType": 2,
+            "properties": [
+                {"name": "Physical Damage", "values": [[f"{phys_min}-{phys_max}", 1]], "displayMode": 0},
+                {"name": "Attacks per Second", "values": [[f"{speed:.2f}", 0]], "displayMode": 0},
+            ],
+            "explicitMods": explicit,
+            "extended": {"dps": round(pdps + edps, 1), "pdps": pdps, "edps": edps,
+                         "mods": {"explicit": mods}, "hashes": {"explicit": hashes}},
+        },
+    }
+
+
+class FakeRateLimit:
+    """Janelas deslizantes por (cliente, política), no mesmo formato dos headers da GGG."""
+
+    def __init__(self, rules: Dict[str, str]):
+        self.rules = {policy: parse_rule_windows(rule) for policy, rule in rules.items()}
+        self.raw_rules = dict(rules)
+        self._hits: Dict[tuple, deque] = {}
+        self._penalty_until: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, client: str, policy: str):
+        """Registra a chamada; retorna (permitido, headers)."""
+        windows = self.rules[policy]
+        longest = max(period for _, period, _ in windows)
+        with self._lock:
+            now = time.monotonic()
+            key = (client, policy)
+            hits = self._hits.setdefault(key, deque())
+            while hits and now - hits[0] >= longest: hits.popleft()
+            penalty_left = max(0.0, self._penalty_until.get(key, 0.0) - now)
+            allowed = penalty_left <= 0
+            if allowed:
+                hits.append(now)
+                for max_hits, period, penalty in windows:
+                    if sum(1 for t in hits if now - t < period) > max_hits:
+                        allowed = False
+                        self._penalty_until[key] = now + penalty
+                        penalty_left = penalty
+                        break
+            states = []
+            for max_hits, period, penalty in windows:
+                current = sum(1 for t in hits if now - t < period)
+                states.append(f"{current}:{int(period)}:{int(round(penalty_left)) if not allowed else 0}")
+        headers = {
+            "X-Rate-Limit-Policy": f"trade-{policy}-request-limit",
+            "X-Rate-Limit-Rules": "Ip",
+            "X-Rate-Limit-Ip": self.raw_rules[policy],
+            "X-Rate-Limit-Ip-State": ",".join(states),
+        }
+        if not allowed: headers["Retry-After"] = str(int(round(penalty_left)) or 1)
+        return allowed, headers
+
+
+class FakeTradeBackend:
+    """Estado do servidor: itens, consultas ativas, latência e rate limit."""
+
+    def __init__(self, items: List[dict], latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 rules: Optional[Dict[str, str]] = None, seed: int = 0, fetch_error_rate: float = 0.0):
+        self.items = sorted(items, key=lambda it: it["listing"]["price"]["amount"])
+        self.by_id = {it["id"]: it for it in self.items}
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.jitter = max(0.0, jitter_ms) / 1000.0
+        self.rate_limit = FakeRateLimit({**{p: r["Ip"] for p, r in DEFAULT_RULES.items()}, **(rules or {})})
+        self._queries: Dict[str, tuple] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.fetch_error_rate = min(1.0, max(0.0, fetch_error_rate))
+        self.requests = {"search": 0, "fetch": 0, "exchange": 0, "429": 0, "503": 0}
+
+    def fetch_fails(self) -> bool:
+        """Sorteia se este /fetch responde 503 (falha transitória simulada)."""
+        if not self.fetch_error_rate: return False
+        with self._lock:
+            failed = self._rng.random() < self.fetch_error_rate
+            if failed: self.requests["503"] += 1
+        return failed
+
+    def delay(self):
+        with self._lock:
+            pause = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if pause > 0: time.sleep(pause)
+
+    def search(self, payload: dict):
+        price = payload.get("query", {}).get("filters", {}).get("trade_filters", {}).get("filters", {}).get("price", {})
+        low, high = price.get("min"), price.get("max")
+        matches = [it["id"] for it in self.items
+                   if (low is None or it["listing"]["price"]["amount"] >= low)
+                   and (high is None or it["listing"]["price"]["amount"] <= high)]
+        query_id = uuid.uuid4().hex[:10]
+        with self._lock:
+            now = time.monotonic()
+            self._queries = {q: v for q, v in self._queries.items() if now - v[0] < QUERY_TTL}
+            self._queries[query_id] = (now, set(matches[:SEARCH_RESULT_CAP]))
+        return {"id": query_id, "complexity": 8, "result": matches[:SEARCH_RESULT_CAP], "total": len(matches)}
+
+    def fetch(self, item_ids: List[str], query_id: str):
+        with self._lock:
+            query = self._queries.get(query_id)
+        if query is None: return None
+        return {"result": [self.by_id.get(item_id) if item_id in query[1] else None for item_id in item_ids]}
+
+    def exchange(self, payload: dict):
+        """Ofertas de quem entrega ``want`` em troca de ``have``, em torno de EXCHANGE_RATES."""
+        query = payload.get("query", {})
+        have, want = (query.get("have") or [None])[0], (query.get("want") or [None])[0]
+        result = {}
+        if have in EXCHANGE_RATES and want in EXCHANGE_RATES and have != want:
+            ratio = EXCHANGE_RATES[want] / EXCHANGE_RATES[have]   # Quanto de ``have`` vale 1 ``want``
+            with self._lock:
+                spreads = [self._rng.uniform(0.95, 1.15) for _ in range(EXCHANGE_OFFERS)]
+            for index, spread in enumerate(sorted(spreads)):
+                # Moedas baratas são vendidas em lotes (preço inteiro por lote)
+                lot = max(1, round(1 / ratio)) if ratio < 1 else 1
+                offer_id = uuid.uuid4().hex[:16]
+                result[offer_id] = {"id": offer_id, "item": None, "listing": {
+                    "indexed": _iso(time.time()), "account": {"name": f"FakeTrader#{index:04d}"},
+                    "offers": [{"exchange": {"currency": have, "amount": round(ratio * lot * spread, 2)},
+                                "item": {"currency": want, "amount": lot, "stock": 100 * lot}}]}}
+        return {"id": uuid.uuid4().hex[:10], "complexity": None, "result": result, "total": len(result)}
+
+
+def load_items_from_corpus(path: str) -> List[dict]:
+    """Itens de todas as respostas de /fetch gravadas num corpus do ``poe2_replay``."""
+    from poe2_replay import load_corpus
+    items = {}
+    for entry in load_corpus(path):
+        if entry.get("endpoint") != "fetch" or entry.get("status") != 200: continue
+        try:
+            for item in json.loads(entry["response"]).get("result", []):
+                if item and item.get("id") and (item.get("listing") or {}).get("price"): items[item["id"]] = item
+        except (ValueError, AttributeError):
+            continue
+    return list(items.values())
+
+
+def make_handler(backend: FakeTradeBackend, quiet: bool = True):
+    search_path = re.compile(r"^/api/trade2/search/poe2/[^/]+$")
+    exchange_path = re.compile(r"^/api/trade2/exchange/poe2/[^/]+$")
+    fetch_path = re.compile(r"^/api/trade2/fetch/([^/?]+)$")
+
+    class FakeTradeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # Keep-alive, como o site real
+
+        def _reply(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items(): self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _limited(self, policy: str):
+            allowed, headers = backend.rate_limit.hit(self.client_address[0], policy)
+            if not allowed:
+                backend.requests["429"] += 1
+                self._reply(429, {"error": {"code": 3, "message": "Rate limit exceeded"}}, headers)
+            return allowed, headers
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            endpoint = "search" if search_path.match(path) else "exchange" if exchange_path.match(path) else None
+            if endpoint is None:
+                return self._reply(404, {"error": {"code": 1, "message": "Resource not found"}})
+            backend.requests[endpoint] += 1
+            allowed, headers = self._limited(endpoint)
+            if not allowed: return
+            try:
+                payload = json.loads(raw_body or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": {"code": 2, "message": "Invalid query"}}, headers)
+            backend.delay()
+            self._reply(200, backend.search(payload) if endpoint == "search" else backend.exchange(payload), headers)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            match = fetch_path.match(parts.path)
+            if not match:
+                return self._reply(404, {"error": {"code": 1, "message": "Resource not found"}})
+            backend.requests["fetch"] += 1
+            allowed, headers = self._limited("fetch")
+            if not allowed: return
+            item_ids = [i for i in match.group(1).split(",") if i]
+            query_id = (parse_qs(parts.query).get("query") or [""])[0]
+            if not item_ids or len(item_ids) > FETCH_MAX_IDS:
+                return self._reply(400, {"error": {"code": 2, "message": "Invalid query"}}, headers)
+            backend.delay()
+            if backend.fetch_fails():
+                return self._reply(503, {"error": {"code": 6, "message": "Service unavailable"}}, headers)
+            result = backend.fetch(item_ids, query_id)
+            if result is None:
+                return self._reply(400, {"error": {"code": 2, "message": "Invalid query"}}, headers)
+            self._reply(200, result, headers)
+
+        def do_HEAD(self):
+            self.send_response(200); self.send_header("Content-Length", "0"); self.end_headers()
+
+        def log_message(self, format, *args):
+            if not quiet: super().log_message(format, *args)
+
+    return FakeTradeHandler
+
+
+def create_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT, items: Optional[List[dict]] = None,
+                  item_count: int = DEFAULT_ITEM_COUNT, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                  rules: Optional[Dict[str, str]] = None, seed: int = 0, quiet: bool = True,
+                  fetch_error_rate: float = 0.0):
+    """Cria (sem iniciar) o servidor; ``server.backend`` expõe o estado para benchmarks."""
+    if items is None:
+        rng = random.Random(seed)
+        now = time.time()
+        items = [synthetic_item(rng, i, now) for i in range(item_count)]
+    backend = FakeTradeBackend(items, latency_ms, jitter_ms, rules, seed, fetch_error_rate)
+    server = ThreadingHTTPServer((host, port), make_handler(backend, quiet))
+    server.daemon_threads = True
+    server.backend = backend
+    return server
+
+
+def check_fetch_retry(seed: int = 0) -> bool:
+    """Roda um /fetch com 503s pelo ``FetchPipeline`` e confere que as novas tentativas entregam todos os itens."""
+    from poe2_fetch_pipeline import FetchPipeline, make_batches
+    from poe2_http import TradeClient
+    from poe2_rate_limiter import RateLimiter, POLICY_FETCH
+    from poe2_retry import RetryPolicy
+
+    server = create_server(port=0, item_count=200, seed=seed, fetch_error_rate=RETRY_CHECK_ERROR_RATE)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    # max_attempts alto: com 50% de falhas, nenhum lote deve esgotar as tentativas
+    client = TradeClient(rate_limiter=RateLimiter(), retry_policy=RetryPolicy(max_attempts=12, base_delay=0.05, max_delay=0.2),
+                         base_url=f"http://{host}:{port}/api/trade2")
+    client.breakers[POLICY_FETCH].failure_threshold = 1000   # O disjuntor não deve interromper a checagem
+    try:
+        search = client.search("Standard", {"query": {}}).json()
+        received, errors = [], []
+
+        def on_result(batch, response, error):
+            if error is not None or response is None or response.status_code != 200:
+                errors.append(f"{batch.label}: {error or (response.status_code if response is not None else 'interrompido')}")
+                return
+            received.extend(item["id"] for item in response.json()["result"] if item)
+
+        stop_event = threading.Event()
+        FetchPipeline(client, max_in_flight=3).run(make_batches(search["result"], search["id"]), on_result, stop_event)
+        failures = server.backend.requests["503"]
+        ok = not errors and sorted(received) == sorted(search["result"]) and failures > 0
+        print(f"/fetch com novas tentativas: {len(received)}/{len(search['result'])} itens, "
+              f"{failures} respostas 503 repetidas, erros: {errors or 'nenhum'} -> {'OK' if ok else 'FALHOU'}")
+        return ok
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local imitando a API de trade2 do PoE2.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEM_COUNT, help="Quantidade de itens sintéticos")
+    parser.add_argument("--corpus", help="Usa os itens de um corpus gravado (poe2_replay) no lugar dos sintéticos")
+    parser.add_argument("--latency", type=float, default=80.0, help="Latência média por resposta (ms)")
+    parser.add_argument("--jitter", type=float, default=20.0, help="Variação da latência (± ms)")
+    parser.add_argument("--search-rules", default=DEFAULT_RULES["search"]["Ip"], help="Regras de /search (max:periodo:penalidade,...)")
+    parser.add_argument("--fetch-rules", default=DEFAULT_RULES["fetch"]["Ip"], help="Regras de /fetch")
+    parser.add_argument("--exchange-rules", default=DEFAULT_RULES["exchange"]["Ip"], help="Regras de /exchange")
+    parser.add_argument("--fetch-error-rate", type=float, default=0.0, help="Fração de /fetch respondidos com 503 (0 a 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-fetch-retry", action="store_true",
+                        help="Só confere as novas tentativas de /fetch pelo FetchPipeline (servidor temporário) e sai")
+    parser.add_argument("--verbose", action="store_true", help="Registra cada requisição")
+    args = parser.parse_args()
+    if args.check_fetch_retry:
+        sys.exit(0 if check_fetch_retry(args.seed) else 1)
+
+    items = load_items_from_corpus(args.corpus) if args.corpus else None
+    server = create_server(args.host, args.port, items, args.items, args.latency, args.jitter,
+                           {"search": args.search_rules, "fetch": args.fetch_rules, "exchange": args.exchange_rules}, args.seed, quiet=not args.verbose,
+                           fetch_error_rate=args.fetch_error_rate)
+    print(f"API trade2 falsa em http://{args.host}:{args.port}/api/trade2 "
+          f"({len(server.backend.items)} itens, latência {args.latency:.0f}±{args.jitter:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requisições: {server.backend.requests}")
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
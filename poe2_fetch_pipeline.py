@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Pipeline assíncrono da fase de /fetch.
+
+Mantém vários lotes de ``/fetch`` em voo ao mesmo tempo (o ritmo real continua
+sendo ditado pelo rate limiter do ``TradeClient``) e entrega cada resposta ao
+callback assim que ela chega, de modo que o parse e a análise de um lote
+acontecem enquanto os próximos ainda estão na rede.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+FETCH_BATCH_SIZE = 10          # Limite da API por chamada de /fetch
+DEFAULT_MAX_IN_FLIGHT = 3      # Lotes simultâneos em voo
+ANY_EVENT_POLL = 0.1           # Fatia (s) de espera de _AnyEvent.wait
+
+# Valores de retorno do callback on_result
+CONTINUE = "continue"
+ABORT = "abort"
+
+
+class FetchBatch:
+    """Lote de até 10 IDs de um mesmo query_id."""
+    __slots__ = ("index", "item_ids", "query_id")
+
+    def __init__(self, index: int, item_ids: List[str], query_id: str):
+        self.index = index
+        self.item_ids = item_ids
+        self.query_id = query_id
+
+    @property
+    def label(self) -> str:
+        return f"Lote {self.index + 1}"
+
+
+def make_batches(item_ids: List[str], query_id: str, batch_size: int = FETCH_BATCH_SIZE) -> List[FetchBatch]:
+    """Divide a lista de IDs em lotes de ``batch_size``."""
+    return [FetchBatch(n, item_ids[i:i + batch_size], query_id)
+            for n, i in enumerate(range(0, len(item_ids), batch_size))]
+
+
+def make_batches_by_query(entries: List[Tuple[str, str]], batch_size: int = FETCH_BATCH_SIZE) -> List[FetchBatch]:
+    """Agrupa pares (item_id, query_id) em lotes; cada lote usa um único query_id."""
+    groups = {}
+    for item_id, query_id in entries:
+        groups.setdefault(query_id, []).append(item_id)
+    batches = []
+    for query_id, item_ids in groups.items():
+        for i in range(0, len(item_ids), batch_size):
+            batches.append(FetchBatch(len(batches), item_ids[i:i + batch_size], query_id))
+    return batches
+
+
+class _AnyEvent:
+    """Combina vários Events: is_set() é verdadeiro se qualquer um estiver setado."""
+
+    def __init__(self, *events):
+        self._events = [e for e in events if e is not None]
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self._events)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Como ``Event.wait``: espera em fatias curtas até algum evento ser setado ou o tempo acabar."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0: return False
+            wait_slice = ANY_EVENT_POLL if remaining is None else min(ANY_EVENT_POLL, remaining)
+            if self._events: self._events[0].wait(wait_slice)
+            else: time.sleep(wait_slice)
+        return True
+
+
+class FetchStats:
+    """Métricas de latência de uma execução do pipeline."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_result_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.batches_done = 0
+        self.aborted = False
+
+    @property
+    def time_to_first_result(self) -> Optional[float]:
+        return None if self.first_result_at is None else self.first_result_at - self.started
+
+    @property
+    def total_time(self) -> Optional[float]:
+        return None if self.finished_at is None else self.finished_at - self.started
+
+
+class FetchPipeline:
+    """Executa lotes de /fetch concorrentes e entrega os resultados conforme chegam.
+
+    ``on_result(batch, response, error)`` roda na thread chamadora (a do event
+    loop) e pode retornar ``ABORT`` para cancelar os lotes restantes. Com
+    ``stream=True`` as respostas chegam só com os cabeçalhos lidos: o corpo é
+    consumido (e a resposta fechada) por ``on_result``.
+    """
+
+    def __init__(self, client, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, stream: bool = False):
+        self.client = client
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.stream = stream
+
+    def run(self, batches: List[FetchBatch], on_result: Callable, stop_event: Optional[threading.Event] = None,
+            on_wait: Optional[Callable[[float], None]] = None) -> FetchStats:
+        """Executa o pipeline de forma bloqueante (chamar de uma thread de trabalho)."""
+        return asyncio.run(self._run(batches, on_result, stop_event, on_wait))
+
+    async def _run(self, batches, on_result, stop_event, on_wait) -> FetchStats:
+        stats = FetchStats()
+        if not batches:
+            stats.finished_at = time.monotonic()
+            return stats
+
+        loop = asyncio.get_running_loop()
+        abort_event = threading.Event()
+        cancel = _AnyEvent(stop_event, abort_event)
+        slots = asyncio.Semaphore(self.max_in_flight)
+        pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="poe2-fetch")
+
+        async def fetch_one(batch):
+            async with slots:
+                if cancel.is_set(): return batch, None, None
+                request = partial(self.client.fetch, batch.item_ids, batch.query_id,
+                                  stop_event=cancel, on_wait=on_wait, stream=self.stream)
+                try:
+                    return batch, await loop.run_in_executor(pool, request), None
+                except Exception as error:
+                    return batch, None, error
+
+        tasks = [asyncio.ensure_future(fetch_one(batch)) for batch in batches]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                batch, response, error = await next_done
+                if cancel.is_set():
+                    if response is not None: response.close()
+                    stats.aborted = True
+                    break
+                if stats.first_result_at is None and response is not None:
+                    stats.first_result_at = time.monotonic()
+                stats.batches_done += 1
+                if on_result(batch, response, error) == ABORT:
+                    stats.aborted = True
+                    break
+        finally:
+            abort_event.set()
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Não espera requisições já em andamento: as threads terminam sozinhas
+            pool.shutdown(wait=False)
+            stats.finished_at = time.monotonic()
+        return stats
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""Cliente HTTP compartilhado para a API de trade2.
+
+Mantém uma única ``requests.Session`` com pool de conexões keep-alive para
+todo o tráfego com pathofexile.com, evitando um handshake TCP+TLS por
+requisição. Cookies e User-Agent são vinculados à sessão uma única vez.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from poe2_rate_limiter import RATE_LIMITER, POLICY_SEARCH, POLICY_FETCH, POLICY_EXCHANGE
+from poe2_search_cache import SearchCache, search_cache_key, DEFAULT_SEARCH_CACHE_TTL
+from poe2_retry import RetryPolicy, CircuitBreaker, is_retryable_status, is_auth_failure
+
+TRADE_HOST = "https://www.pathofexile.com"
+TRADE_API_BASE_URL = f"{TRADE_HOST}/api/trade2"
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+# Padrões do pool (podem ser alterados na seção [Network] do arquivo de config)
+DEFAULT_POOL_CONNECTIONS = 2   # Quantidade de hosts distintos mantidos no pool
+DEFAULT_POOL_MAXSIZE = 6       # Conexões simultâneas por host
+DEFAULT_PREWARM_CONNECTIONS = 2
+SEARCH_TIMEOUT = 45
+FETCH_TIMEOUT = 30
+EXCHANGE_TIMEOUT = 30
+
+
+class TradeClient:
+    """Sessão HTTP única (pool + keep-alive) usada em todas as chamadas de trade2."""
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, rate_limiter=RATE_LIMITER,
+                 search_cache_ttl: float = DEFAULT_SEARCH_CACHE_TTL, retry_policy: Optional[RetryPolicy] = None,
+                 base_url: str = TRADE_API_BASE_URL):
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip("/")
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = {policy: CircuitBreaker(policy) for policy in (POLICY_SEARCH, POLICY_FETCH, POLICY_EXCHANGE)}
+        self.search_cache = SearchCache(search_cache_ttl)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.transport_mode = "live"
+        self._transport_factory = None
+        self._lock = threading.Lock()
+        self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # pool_block=True: se todas as conexões do host estiverem ocupadas,
+        # espera uma liberar em vez de abrir conexões descartáveis
+        adapter_factory = self._transport_factory or HTTPAdapter
+        adapter = adapter_factory(pool_connections=self.pool_connections,
+                                  pool_maxsize=self.pool_maxsize, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def configure_pool(self, pool_connections: int, pool_maxsize: int):
+        """Recria o pool com novos limites, preservando headers e cookies."""
+        with self._lock:
+            if pool_connections == self.pool_connections and pool_maxsize == self.pool_maxsize:
+                return
+            self.pool_connections, self.pool_maxsize = pool_connections, pool_maxsize
+            old_session = self._replace_session()
+        old_session.close()
+
+    def set_transport(self, adapter_factory: Optional[Callable[..., object]], mode: str = "live"):
+        """Troca o transporte HTTP (ex.: gravação/reprodução de ``poe2_replay``); None volta ao real."""
+        with self._lock:
+            self._transport_factory = adapter_factory
+            self.transport_mode = mode
+            old_session = self._replace_session()
+        old_session.close()
+
+    @property
+    def offline(self) -> bool:
+        """True quando as respostas vêm de um corpus gravado (cookies não são necessários)."""
+        return self.transport_mode == "replay"
+
+    def _replace_session(self) -> requests.Session:
+        old_session = self.session
+        new_session = self._create_session()
+        new_session.headers.update(old_session.headers)
+        new_session.cookies.update(old_session.cookies)
+        self.session = new_session
+        return old_session
+
+    def configure(self, useragent: Optional[str] = None, poesessid: Optional[str] = None,
+                  cf_clearance: Optional[str] = None, extra_headers: Optional[Dict[str, str]] = None):
+        """Vincula credenciais e headers à sessão (feito uma vez, não por requisição)."""
+        with self._lock:
+            if useragent:
+                self.session.headers["User-Agent"] = useragent
+            if extra_headers:
+                self.session.headers.update(extra_headers)
+            for cookie_name, cookie_value in (("POESESSID", poesessid), ("cf_clearance", cf_clearance)):
+                if cookie_value is None: continue
+                if cookie_value:
+                    self.session.cookies.set(cookie_name, cookie_value, domain=".pathofexile.com")
+                else:
+                    self.session.cookies.pop(cookie_name, None)
+
+    def set_base_url(self, base_url: Optional[str]):
+        """Aponta o cliente para outra API compatível (ex.: ``poe2_fake_trade``); vazio volta ao site real."""
+        self.base_url = (base_url or TRADE_API_BASE_URL).rstrip("/")
+
+    @property
+    def host_url(self) -> str:
+        parts = urlsplit(self.base_url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def prewarm(self, connections: int = DEFAULT_PREWARM_CONNECTIONS, background: bool = True):
+        """Abre conexões TLS antecipadamente para que a primeira busca não pague o handshake."""
+        def _warm_one():
+            try:
+                self.session.head(self.host_url, timeout=10, allow_redirects=False)
+            except requests.exceptions.RequestException:
+                pass
+
+        workers = [threading.Thread(target=_warm_one, daemon=True)
+                   for _ in range(max(1, min(connections, self.pool_maxsize)))]
+        for worker in workers: worker.start()
+        if not background:
+            for worker in workers: worker.join()
+
+    def _rate_limited(self, policy_name: str, stop_event: Optional[threading.Event],
+                      on_wait: Optional[Callable[[float], None]]) -> bool:
+        if self.rate_limiter is None: return True
+        if on_wait is not None:
+            expected_wait = self.rate_limiter.estimated_wait(policy_name)
+            if expected_wait > 1.0: on_wait(expected_wait)
+        return self.rate_limiter.acquire(policy_name, stop_event=stop_event)
+
+    def search(self, league: str, payload: dict, stop_event: Optional[threading.Event] = None,
+               on_wait: Optional[Callable[[float], None]] = None, timeout: float = SEARCH_TIMEOUT,
+               headers: Optional[Dict[str, str]] = None, use_cache: bool = True) -> Optional[requests.Response]:
+        """POST /search. Retorna None se interrompido enquanto aguardava o rate limit.
+
+        Payloads idênticos (mesma liga) dentro do TTL reaproveitam a mesma
+        resposta e buscas idênticas simultâneas viram uma única requisição.
+        """
+        do_search = lambda: self._post_search(league, payload, stop_event, on_wait, timeout, headers)
+        if not use_cache or self.search_cache.ttl <= 0:
+            return do_search()
+        response, _source = self.search_cache.get_or_search(search_cache_key(league, payload), do_search, stop_event)
+        return response
+
+    def _post_search(self, league, payload, stop_event, on_wait, timeout, headers) -> Optional[requests.Response]:
+        url = f"{self.base_url}/search/poe2/{league}"
+        return self._send(POLICY_SEARCH, lambda: self.session.post(url, json=payload, timeout=timeout, headers=headers),
+                          stop_event, on_wait)
+
+    def _send(self, policy_name: str, do_request: Callable[[], requests.Response],
+              stop_event: Optional[threading.Event], on_wait: Optional[Callable[[float], None]]) -> Optional[requests.Response]:
+        """Executa a requisição com rate limit, novas tentativas e disjuntor do endpoint.
+
+        429/5xx e falhas de rede são repetidos (Retry-After ou backoff com
+        jitter); esgotadas as tentativas, devolve a última resposta (ou relança
+        o erro de rede). Levanta CircuitOpenError se o endpoint estiver em pausa.
+        """
+        breaker = self.breakers[policy_name]
+        breaker.check()
+        attempt = 0
+        while True:
+            attempt += 1
+            if not self._rate_limited(policy_name, stop_event, on_wait):
+                breaker.release()
+                return None
+            try:
+                response = do_request()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                breaker.record_failure()
+                if attempt >= self.retry_policy.max_attempts: raise
+                delay = self.retry_policy.delay_for(attempt)
+            except Exception:
+                breaker.release()
+                raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update_from_response(policy_name, response.headers, response.status_code)
+                if not is_retryable_status(response.status_code):
+                    if is_auth_failure(response.status_code): breaker.release()
+                    else: breaker.record_success()
+                    return response
+                delay = self.retry_policy.delay_for(attempt, response.headers)
+                breaker.record_failure(min_open=delay)
+                if attempt >= self.retry_policy.max_attempts: return response
+                response.close()   # Libera a conexão (respostas em stream) antes de repetir
+
+            if on_wait is not None and delay > 1.0: on_wait(delay)
+            if stop_event is not None and stop_event.wait(delay):
+                breaker.release()
+                return None
+            if stop_event is None: time.sleep(delay)
+            breaker.check()
+
+    def fetch(self, item_ids: List[str], query_id: str, stop_event: Optional[threading.Event] = None,
+              on_wait: Optional[Callable[[float], None]] = None, timeout: float = FETCH_TIMEOUT,
+              headers: Optional[Dict[str, str]] = None, stream: bool = False) -> Optional[requests.Response]:
+        """GET /fetch de um lote de IDs. Retorna None se interrompido.
+
+        Com ``stream=True`` o corpo não é baixado antecipadamente: quem chama lê
+        (ex.: ``iter_fetch_results``) e fecha a resposta.
+        """
+        url = f"{self.base_url}/fetch/{','.join(item_ids)}?query={query_id}&realm=poe2"
+        return self._send(POLICY_FETCH, lambda: self.session.get(url, timeout=timeout, headers=headers, stream=stream),
+                          stop_event, on_wait)
+
+    def exchange(self, league: str, payload: dict, stop_event: Optional[threading.Event] = None,
+                 on_wait: Optional[Callable[[float], None]] = None, timeout: float = EXCHANGE_TIMEOUT,
+                 headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """POST /exchange (ofertas de troca entre moedas). Retorna None se interrompido."""
+        url = f"{self.base_url}/exchange/poe2/{league}"
+        return self._send(POLICY_EXCHANGE, lambda: self.session.post(url, json=payload, timeout=timeout, headers=headers),
+                          stop_event, on_wait)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Registro compacto dos itens mantidos em memória pelas abas.
+
+O dicionário devolvido por ``normalize_item`` carrega o JSON bruto do
+``/fetch`` (``raw_data``), a análise de Divine como lista de dicionários e
+várias strings repetidas entre anúncios (moeda, vendedor, textos de mods). Com
+milhares de anúncios por aba e várias abas, isso vira kilobytes por item. O
+``ItemRecord`` guarda os mesmos campos em ``__slots__``, com as strings
+repetidas internadas, a análise em ``AnalysisLine`` e o JSON bruto apenas
+comprimido (ou, no modo ``store``, nem isso: é relido do armazenamento local),
+decodificado sob demanda em ``raw_data``. No modo ``store`` o JSON se perde se
+a linha for removida do armazenamento (``prune`` ou outro processo), por isso
+o padrão é ``compressed``.
+
+Os dois tipos aceitam ``get``/``[]`` como um dicionário, então o código que lê
+os detalhes do item continua igual.
+"""
+import json
+import sys
+import zlib
+from typing import Optional
+
+# Origem do JSON bruto mantido pelo registro
+RAW_COMPRESSED = "compressed"   # zlib em memória
+RAW_STORE = "store"             # Só no armazenamento local (lido por ID quando necessário)
+RAW_NONE = "none"               # Descartado
+
+RAW_COMPRESSION_LEVEL = 6
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class _SlotMapping:
+    """Leitura estilo dicionário sobre ``__slots__`` (campos ausentes usam o padrão)."""
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        if key not in self.__slots__: return default
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__: raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__ and hasattr(self, key)
+
+
+class AnalysisLine(_SlotMapping):
+    """Uma linha de ``divine_analysis`` (mesmas chaves do dicionário original)."""
+    __slots__ = ("scope", "text", "current_str", "range_str", "tier_str", "potential_str",
+                 "potential_pct", "tag", "status", "hash")
+
+    def __init__(self, result: dict):
+        for key, value in result.items():
+            if key in self.__slots__: setattr(self, key, _intern(value))
+
+
+class ItemRecord(_SlotMapping):
+    """Detalhes de um item normalizado, sem o dicionário e sem o JSON bruto expandido."""
+    __slots__ = ("id", "name", "price", "price_amount", "price_currency", "seller", "listing_date",
+                 "listing_timestamp", "listing_epoch_ms", "whisper", "link", "properties", "mods", "implicit_mods",
+                 "item_level", "rarity", "frameType", "dps", "pdps", "edps", "min_dps", "avg_dps",
+                 "max_dps", "estimated_price", "worth_divining", "max_divine_chance", "divine_analysis",
+                 "_raw", "_raw_store")
+
+    # Campos com poucos valores distintos entre anúncios
+    _INTERNED = ("price_currency", "seller", "rarity", "listing_date")
+
+    @classmethod
+    def from_details(cls, details: dict, raw_mode: str = RAW_COMPRESSED, item_store=None) -> "ItemRecord":
+        record = cls.__new__(cls)
+        for key in cls.__slots__:
+            if key.startswith("_") or key not in details: continue
+            value = details[key]
+            if key in cls._INTERNED: value = _intern(value)
+            elif key in ("mods", "implicit_mods") and isinstance(value, list):
+                value = tuple(_intern(mod) for mod in value)
+            elif key == "divine_analysis" and isinstance(value, list):
+                value = tuple(AnalysisLine(result) for result in value if isinstance(result, dict))
+            setattr(record, key, value)
+        record._raw = None
+        record._raw_store = None
+        raw_data = details.get("raw_data")
+        if raw_data is not None:
+            if raw_mode == RAW_STORE and item_store is not None:
+                record._raw_store = item_store
+            elif raw_mode in (RAW_COMPRESSED, RAW_STORE):
+                encoded = json.dumps(raw_data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+                record._raw = zlib.compress(encoded, RAW_COMPRESSION_LEVEL)
+        return record
+
+    @property
+    def raw_data(self) -> Optional[dict]:
+        """JSON bruto do ``/fetch``, decodificado a cada acesso (None se não foi mantido)."""
+        if self._raw is not None:
+            return json.loads(zlib.decompress(self._raw).decode("utf-8"))
+        if self._raw_store is not None:
+            # Sem o filtro de validade: o item pode continuar na tela além dela
+            return self._raw_store.get_raw(self.id)
+        return None
+
+    def get(self, key, default=None):
+        if key == "raw_data":
+            raw_data = self.raw_data
+            return default if raw_data is None else raw_data
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        if key == "raw_data": return self.raw_data
+        return super().__getitem__(key)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento local persistente dos detalhes de itens (SQLite).
+
+Cada anúncio retornado por ``/fetch`` é gravado pela chave do listing ID junto
+com o timestamp ``indexed`` da listagem e um hash do conteúdo. Antes de cada
+``/fetch`` as abas consultam este armazenamento e só vão à rede buscar os IDs
+que ainda não existem localmente, o que vale entre abas e entre execuções.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+ITEM_STORE_FILE = 'poe2_items.sqlite3'
+DEFAULT_MAX_AGE_HOURS = 24.0   # Detalhes mais antigos que isso são buscados novamente
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    indexed TEXT,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_indexed ON items (indexed);
+CREATE INDEX IF NOT EXISTS idx_items_fetched_at ON items (fetched_at);
+"""
+
+# Limite de parâmetros por consulta "IN (...)" (SQLite antigo aceita 999)
+_QUERY_CHUNK = 500
+
+
+def item_content_hash(item_data: dict) -> str:
+    """Hash estável do conteúdo de um resultado de /fetch."""
+    canonical = json.dumps(item_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ItemStore:
+    """Cache de itens em disco compartilhado por todas as abas (thread-safe)."""
+
+    def __init__(self, path: str = ITEM_STORE_FILE, max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age = max(0.0, float(max_age_hours)) * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, item_ids: Iterable[str]) -> Dict[str, dict]:
+        """Retorna {id: item_data} dos IDs presentes e dentro da validade."""
+        item_ids = list(item_ids)
+        found = {}
+        min_fetched_at = time.time() - self.max_age if self.max_age > 0 else 0.0
+        with self._lock:
+            for i in range(0, len(item_ids), _QUERY_CHUNK):
+                chunk = item_ids[i:i + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM items WHERE id IN ({placeholders}) AND fetched_at >= ?",
+                    (*chunk, min_fetched_at)).fetchall()
+                for item_id, data in rows:
+                    try:
+                        found[item_id] = json.loads(data)
+                    except ValueError:
+                        continue
+            self.hits += len(found)
+            self.misses += len(item_ids) - len(found)
+        return found
+
+    def get_raw(self, item_id: str) -> Optional[dict]:
+        """JSON guardado de um item, mesmo fora da validade (None se não existir ou o armazenamento fechou)."""
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT data FROM items WHERE id = ?", (item_id,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None: return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put_many(self, items: List[dict]):
+        """Grava (ou atualiza, se o conteúdo mudou) os resultados de um /fetch."""
+        now = time.time()
+        rows = []
+        for item_data in items:
+            if not item_data or not item_data.get("id"): continue
+            indexed = (item_data.get("listing") or {}).get("indexed")
+            data = json.dumps(item_data, separators=(",", ":"), ensure_ascii=False)
+            rows.append((item_data["id"], indexed, item_content_hash(item_data), now, data))
+        if not rows: return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Conteúdo igual: só renova fetched_at; conteúdo novo: regrava tudo
+                self._conn.executemany(
+                    "INSERT INTO items (id, indexed, content_hash, fetched_at, data) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET fetched_at = excluded.fetched_at, "
+                    "indexed = CASE WHEN items.content_hash = excluded.content_hash THEN items.indexed ELSE excluded.indexed END, "
+                    "data = CASE WHEN items.content_hash = excluded.content_hash THEN items.data ELSE excluded.data END, "
+                    "content_hash = excluded.content_hash", rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def iter_items(self, chunk_size: int = 1000) -> Iterator[dict]:
+        """Percorre todos os itens guardados (em blocos, sem carregar a tabela inteira)."""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute("SELECT rowid, data FROM items WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                          (last_rowid, chunk_size)).fetchall()
+            if not rows: return
+            for rowid, data in rows:
+                last_rowid = rowid
+                try:
+                    yield json.loads(data)
+                except ValueError:
+                    continue
+
+    def prune(self, older_than_hours: Optional[float] = None) -> int:
+        """Remove itens buscados há mais de ``older_than_hours`` (padrão: a validade)."""
+        max_age = self.max_age if older_than_hours is None else float(older_than_hours) * 3600
+        if max_age <= 0: return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM items WHERE fetched_at < ?", (time.time() - max_age,))
+            return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_item_store(path: str = ITEM_STORE_FILE, max_age_hours: float = DEFAULT_MAX_AGE_HOURS) -> Optional[ItemStore]:
+    """Abre o armazenamento; retorna None (cache desativado) se o arquivo não puder ser usado."""
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory and not os.path.isdir(directory): os.makedirs(directory, exist_ok=True)
+        return ItemStore(path, max_age_hours)
+    except (sqlite3.Error, OSError) as e_store:
+        print(f"Aviso: armazenamento local de itens indisponível ({e_store}).")
+        return None
@@ -1,80 +1,39 @@
 # -*- coding: utf-8 -*-
-import requests
-import json
 import time
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, simpledialog
 import threading
 import configparser
-import re
-from datetime import datetime, timezone
+from datetime import datetime
 import traceback
-import math
 import uuid
 import webbrowser
+import multiprocessing
 from typing import Dict, List, Optional, Tuple, Union, Any
+from poe2_analysis import item_row
+from poe2_engine import SearchEngine, SearchSession, EngineHooks, PayloadError, build_search_payload, STAT_MAP, ITEM_CATEGORIES
+from poe2_listing import CURRENCIES
+from poe2_http import TradeClient, TRADE_API_BASE_URL, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, DEFAULT_PREWARM_CONNECTIONS
+from poe2_search_cache import DEFAULT_SEARCH_CACHE_TTL
+from poe2_analysis_cache import AnalysisCache, DEFAULT_ANALYSIS_CACHE_SIZE, DEFAULT_ANALYSIS_CACHE_TTL
+from poe2_item_record import ItemRecord, RAW_STORE, RAW_COMPRESSED, RAW_NONE
+from poe2_analysis_pool import AnalysisPool, DEFAULT_ANALYSIS_WORKERS, DEFAULT_ANALYSIS_BATCH_SIZE
+from poe2_price_index import (ExchangeRates, PriceIndex, price_sort_key, DEFAULT_BASE_CURRENCY, DEFAULT_RATES_FILE,
+                              DEFAULT_RATES_TTL, SOURCE_FILE, RATE_SOURCES)
+from poe2_fetch_pipeline import DEFAULT_MAX_IN_FLIGHT
+from poe2_item_store import open_item_store, ITEM_STORE_FILE, DEFAULT_MAX_AGE_HOURS
+from poe2_replay import install_transport, MODE_LIVE, DEFAULT_CORPUS_FILE, TIMING_ORIGINAL
+from poe2_sharding import API_RESULT_CAP, DEFAULT_MAX_SHARDS, DEFAULT_MAX_SHARDED_ITEMS
+from poe2_log_buffer import TabLogBuffer, LOG_LEVEL_LABELS, DEFAULT_LOG_LEVEL, DEFAULT_LOG_CAPACITY, DEFAULT_VISIBLE_LINES
+from poe2_results_view import ResultsModel, VirtualTreeview
+from poe2_ui_queue import UIUpdateQueue, DEFAULT_FRAME_MS, EVENT_CALL, EVENT_LOG, EVENT_ROW, EVENT_REMOVE_ROWS
+from poe2_scheduler import PollingScheduler, PRIORITY_LABELS, PRIORITY_NORMAL, DEFAULT_MAX_CONCURRENT, DEFAULT_JITTER
 
 # --- Constantes e Configurações ---
 CONFIG_FILE = 'poe2_config.ini'
 VERSION = "1.0.0"
-STAT_MAP = {
-    "Maximum Life": "explicit.stat_3299347043", "Increased Life": "explicit.stat_1671376347",
-    "Maximum Mana": "explicit.stat_1050105434", "Increased Mana": "explicit.stat_4220027924",
-    "Fire Resistance": "explicit.stat_3372524247", "Cold Resistance": "explicit.stat_3642289083",
-    "Lightning Resistance": "explicit.stat_1010850144", "Chaos Resistance": "explicit.stat_3795704793",
-    "Increased Physical Damage": "explicit.stat_1509134228", # Hash principal para %Phys
-    "Increased Elemental Damage": "explicit.stat_2974417149",
-    "Increased Spell Damage": "explicit.stat_1368271171", "Attack Speed": "explicit.stat_210067635",
-    "Cast Speed": "explicit.stat_4277795662", "Critical Strike Chance": "explicit.stat_2628039082",
-    "+#% Critical Strike Chance": "explicit.stat_2311243048", 
-    "Critical Strike Multiplier": "explicit.stat_2301191210",
-    "+#% Critical Strike Multiplier": "explicit.stat_2301191210",
-    "Critical Damage Bonus": "explicit.stat_2694482655",
-    "Attack Range": "explicit.stat_2469416729",
-    "Strength": "explicit.stat_4080418644", "Dexterity": "explicit.stat_3261801346",
-    "Intelligence": "explicit.stat_4043464511", "All Attributes": "explicit.stat_2026728709",
-    "Movement Speed": "explicit.stat_3848254059",
-    "Accuracy Rating": "explicit.stat_691932474",
-    "+#% Accuracy Rating": "explicit.stat_1069133534",
-    "Physical Damage Leeched as Mana": "explicit.stat_3371059371", "Mana per Enemy Killed": "explicit.stat_105698561",
-    "Reduced Attribute Requirements": "explicit.stat_3639275092",
-    "Bolt Speed": "implicit.stat_1803308202",
-    "Life per Enemy Killed": "explicit.stat_3695891184",
-    "Adds # to # Physical Damage": "explicit.stat_1940865751", # Flat Phys
-    "Adds # to # Fire Damage": "explicit.stat_709508406",    # Flat Fire
-    "Adds # to # Cold Damage": "explicit.stat_2048645075",   # Flat Cold
-    "Adds # to # Lightning Damage": "explicit.stat_1671376347", # Flat Lightning
-    "+# to Level of all Projectile Skills": "explicit.stat_1202301673"
-}
-
-ITEM_CATEGORIES = {
-    "Any": "any", "Any Weapon": "weapon", "Any One-Handed Melee Weapon": "weapon.one", "Unarmed": "weapon.unarmed",
-    "Claw": "weapon.claw", "Dagger": "weapon.dagger", "One-Handed Sword": "weapon.onesword", "One-Handed Axe": "weapon.oneaxe",
-    "One-Handed Mace": "weapon.onemace", "Spear": "weapon.spear", "Flail": "weapon.flail", "Any Two-Handed Melee Weapon": "weapon.two",
-    "Two-Handed Sword": "weapon.twosword", "Two-Handed Axe": "weapon.twoaxe", "Two-Handed Mace": "weapon.twomace",
-    "Quarterstaff": "weapon.warstaff",
-    "Any Ranged Weapon": "weapon.ranged", "Bow": "weapon.bow", "Crossbow": "weapon.crossbow",
-    "Any Caster Weapon": "weapon.caster", "Wand": "weapon.wand", "Sceptre": "weapon.sceptre", "Staff": "weapon.staff",
-    "Fishing Rod": "weapon.fishingrod", "Any Armour": "armour", "Helmet": "armour.helmet", "Body Armour": "armour.chest",
-    "Gloves": "armour.gloves", "Boots": "armour.boots", "Quiver": "armour.quiver", "Shield": "armour.shield",
-    "Focus": "armour.focus", "Buckler": "armour.buckler", "Any Accessory": "accessory", "Amulet": "accessory.amulet",
-    "Belt": "accessory.belt", "Ring": "accessory.ring",
-}
-
-CURRENCIES = [
-    "divine", "exalted", "chaos", "alchemy", "annulment", "regal", "vaal",
-    "augmentation", "transmutation", "mirror", "gold"
-]
-
-# Base de dados simplificada para previsão de preço - será expandida com dados de API
-WEAPON_BASE_INFO = {
-    "Striking Quarterstaff": {"base_pdps": 300, "base_aps": 1.30},
-    "Battle Quarterstaff": {"base_pdps": 290, "base_aps": 1.25},
-    "Engraved Crossbow": {"base_pdps": 300, "base_aps": 1.20},
-    "Corpse Core": {"base_pdps": 310, "base_aps": 1.15},
-    "Exquisite Blade": {"base_pdps": 340, "base_aps": 1.30},
-}
+CHEAPEST_ITEMS_COUNT = 20   # Itens listados em "Mais Baratos (Todas)"
 
 # --- Definições de Cores (Temas) ---
 LIGHT_COLORS = {
@@ -182,6 +141,46 @@ DARK_COLORS = {
     "tree_not_worth_bg": "#2D3748", 
 }
 
+class _TabHooks(EngineHooks):
+    """Liga os eventos do ``SearchEngine`` ao status, log e Treeview de uma aba."""
+
+    def __init__(self, tracker, tab_id):
+        self.tracker = tracker
+        self.tab_id = tab_id
+        self.tab_name = tracker.search_tabs_data[tab_id]['name']
+
+    def status(self, message):
+        self.tracker.update_status(f"[{self.tab_name}] {message}")
+
+    def log(self, message, level="info"):
+        self.tracker.log_message(message, level, tab_id=self.tab_id)
+
+    def log_enabled(self, level):
+        return self.tracker.log_enabled(level, self.tab_id)
+
+    def item(self, item_details):
+        self.tracker._add_result_row(self.tab_id, item_details)
+
+    def items_removed(self, item_ids):
+        self.tracker._remove_result_rows(self.tab_id, item_ids)
+
+    def results_cleared(self):
+        # Limpa a interface DA ABA antes da busca (agendado antes das novas linhas)
+        tab_data = self.tracker.search_tabs_data.get(self.tab_id)
+        if tab_data: tab_data['_item_details_cache'].clear()
+        self.tracker.price_index.clear_tab(self.tab_id)
+        self.tracker._run_on_ui(lambda: self.tracker._clear_tab_results(self.tab_id))
+
+    def prices_updated(self):
+        self.tracker._run_on_ui(self.tracker._apply_exchange_rates)
+
+    def auth_failure(self, status_code, stage):
+        self.tracker._handle_auth_failure(self.tab_id, status_code, stage)
+
+    def error(self, title, message):
+        self.tracker._show_dialog("error", title, message)
+
+
 class PoeTracker:
     def __init__(self, root):
         self.root = root
@@ -200,6 +199,51 @@ class PoeTracker:
         self.search_notebook = None 
         self.active_tab_id = None
 
+        # --- Sessão HTTP compartilhada (pool keep-alive para a API de trade) ---
+        self.trade_client = TradeClient()
+        self.prewarm_connections = DEFAULT_PREWARM_CONNECTIONS
+        self.max_inflight_fetches = DEFAULT_MAX_IN_FLIGHT
+
+        # --- Agendador único de monitoramento (substitui uma thread por aba) ---
+        self.polling_max_concurrent = DEFAULT_MAX_CONCURRENT
+        self.polling_jitter = DEFAULT_JITTER
+        self.scheduler = None
+
+        # --- Cobertura completa (fatiamento por faixa de preço) ---
+        self.max_price_shards = DEFAULT_MAX_SHARDS
+        self.max_sharded_items = DEFAULT_MAX_SHARDED_ITEMS
+
+        # --- Armazenamento local de itens (SQLite, compartilhado entre abas e execuções) ---
+        self.item_store_enabled = True
+        self.item_store_path = ITEM_STORE_FILE
+        self.item_store_max_age_hours = DEFAULT_MAX_AGE_HOURS
+        self.item_store = None
+        # JSON bruto dos itens exibidos: comprimido em memória, só no armazenamento local ou descartado
+        self.raw_data_mode = RAW_COMPRESSED
+
+        # --- Cache da análise de itens (compartilhado entre as abas, seção [Analysis]) ---
+        self.analysis_cache = AnalysisCache()
+        # Processos de análise opcionais: tiram o cálculo pesado do GIL compartilhado com o Tk
+        self.analysis_pool = AnalysisPool()
+
+        # --- Cotações entre moedas e preços normalizados de todas as abas (seção [Prices]) ---
+        self.exchange_rates = ExchangeRates()
+        self.price_index = PriceIndex(self.exchange_rates)
+
+        # --- Gravação/reprodução das respostas da API (seção [Replay]) ---
+        self.replay_mode = MODE_LIVE
+        self.replay_corpus = DEFAULT_CORPUS_FILE
+        self.replay_timing = TIMING_ORIGINAL
+
+        # --- Fila única de atualizações da interface (esvaziada pelo Tk a cada quadro) ---
+        self.ui_queue = UIUpdateQueue()
+        self.ui_frame_ms = DEFAULT_FRAME_MS
+
+        # --- Log das abas: buffer circular em memória + final visível no widget ---
+        self.log_level = DEFAULT_LOG_LEVEL
+        self.log_buffer_lines = DEFAULT_LOG_CAPACITY
+        self.log_visible_lines = DEFAULT_VISIBLE_LINES
+
         # --- Título e Geometria ---
         self.root.title(f"Path of Exile 2 - Item Tracker v{VERSION} - Dawn of the Hunt")
         self.root.geometry("1550x850")
@@ -209,6 +253,22 @@ class PoeTracker:
         self.create_ui()
         self.load_config()
         self.apply_theme()
+        self.scheduler = PollingScheduler(max_concurrent=self.polling_max_concurrent, jitter=self.polling_jitter)
+        if self.item_store_enabled:
+            self.item_store = open_item_store(self.item_store_path, self.item_store_max_age_hours)
+            if self.item_store:
+                pruned = self.item_store.prune()
+                self.log_message(f"Armazenamento local: {self.item_store.count()} itens ({pruned} expirados removidos).", "info", use_global_log=True)
+
+        self._apply_replay_mode()
+        self.search_engine = SearchEngine(self.trade_client, self.item_store, self.max_inflight_fetches,
+                                          self.max_price_shards, self.max_sharded_items, self.analysis_cache,
+                                          self.analysis_pool, self.exchange_rates)
+        self._pump_ui_queue()
+
+        # Pré-aquece as conexões TLS em segundo plano
+        if self.prewarm_connections > 0 and not self.trade_client.offline:
+            self.trade_client.prewarm(self.prewarm_connections)
         
         # Ícone da aplicação (se disponível)
         try:
@@ -297,6 +357,9 @@ IMPORTANTE:
 
         rename_tab_button = ttk.Button(tab_control_frame, text="Renomear Busca", command=self.rename_search_tab, style='TButton')
         rename_tab_button.pack(side=tk.LEFT, padx=5)
+
+        cheapest_button = ttk.Button(tab_control_frame, text="Mais Baratos (Todas)", command=self.show_cheapest_items, style='TButton')
+        cheapest_button.pack(side=tk.LEFT, padx=5)
         
         # Botão para abrir o site da liga atual
         open_league_site = ttk.Button(
@@ -395,13 +458,24 @@ IMPORTANTE:
         # Botões de Ação da Aba
         control_frame = ttk.Frame(filters_frame, style='TFrame')
         control_frame.grid(row=3, column=0, columnspan=6, pady=(10, 2), sticky="w")
-        ttk.Button(control_frame, text="Buscar Itens", command=lambda tid=tab_id: self.search_items(tid), style='TButton').pack(side=tk.LEFT, padx=5)
+        tab_data['search_button'] = ttk.Button(control_frame, text="Buscar Itens", command=lambda tid=tab_id: self.start_manual_search(tid), style='TButton')
+        tab_data['search_button'].pack(side=tk.LEFT, padx=5)
         tab_data['start_polling_button'] = ttk.Button(control_frame, text="Monitorar", command=lambda tid=tab_id: self.start_polling(tid), style='TButton')
         tab_data['start_polling_button'].pack(side=tk.LEFT, padx=5)
-        tab_data['stop_polling_button'] = ttk.Button(control_frame, text="Parar", command=lambda tid=tab_id: self.stop_polling(tid), state=tk.DISABLED, style='TButton')
+        tab_data['stop_polling_button'] = ttk.Button(control_frame, text="Parar", command=lambda tid=tab_id: self.stop_tab_job(tid), state=tk.DISABLED, style='TButton')
         tab_data['stop_polling_button'].pack(side=tk.LEFT, padx=5)
         ttk.Label(control_frame, text="Intervalo (s):", style='TLabel').pack(side=tk.LEFT, padx=(15, 0))
         ttk.Entry(control_frame, textvariable=tab_data['polling_interval'], width=5, style='TEntry').pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Checkbutton(control_frame, text="Somente novos", variable=tab_data['delta_polling'], style='TCheckbutton').pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(control_frame, text="Cobertura completa", variable=tab_data['full_coverage'], style='TCheckbutton').pack(side=tk.LEFT, padx=5)
+        ttk.Label(control_frame, text="Prioridade:", style='TLabel').pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(control_frame, textvariable=tab_data['polling_priority'], values=list(PRIORITY_LABELS.keys()),
+                     width=7, state="readonly", style='TCombobox').pack(side=tk.LEFT, padx=(2, 5))
+        tab_data['polling_priority'].trace_add('write', lambda *_, tid=tab_id: self._on_polling_priority_change(tid))
+        ttk.Label(control_frame, text="Log:", style='TLabel').pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(control_frame, textvariable=tab_data['log_level'], values=LOG_LEVEL_LABELS,
+                     width=8, state="readonly", style='TCombobox').pack(side=tk.LEFT, padx=(2, 5))
+        tab_data['log_level'].trace_add('write', lambda *_, tid=tab_id: self._on_log_level_change(tid))
 
         # -- Frame de Filtros de Stats Específicos --
         stats_frame_container = ttk.LabelFrame(top_controls_frame, text="Filtros de Stats", style='TLabelframe')
@@ -420,6 +494,7 @@ IMPORTANTE:
         columns = ('nome', 'preco', 'dps', 'pdps', 'divine_potential', 'vendedor', 'data_listagem', 'whisper')
         results_tree = ttk.Treeview(results_frame, columns=columns, show='headings', style='Treeview')
         tab_data['results_tree'] = results_tree
+        tab_data['results_frame'] = results_frame
         
         # Configuração dos headings
         results_tree.heading('nome', text='Nome', command=lambda c='nome': self.sort_treeview(c))
@@ -441,11 +516,19 @@ IMPORTANTE:
         results_tree.column('data_listagem', width=100, anchor=tk.CENTER)
         results_tree.column('whisper', width=60, anchor=tk.CENTER)
         
-        # Scrollbars
-        vsb = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=results_tree.yview, style='Vertical.TScrollbar')
+        # Scrollbars (a vertical rola a lista virtual, não o Treeview)
+        vsb = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, style='Vertical.TScrollbar')
         hsb = ttk.Scrollbar(results_frame, orient=tk.HORIZONTAL, command=results_tree.xview, style='Horizontal.TScrollbar')
-        results_tree.configure(yscroll=vsb.set, xscroll=hsb.set)
+        results_tree.configure(xscroll=hsb.set)
         results_tree.grid(row=0, column=0, sticky='nsew'); vsb.grid(row=0, column=1, sticky='ns'); hsb.grid(row=1, column=0, sticky='ew')
+        tab_data['results_view'] = VirtualTreeview(results_tree, vsb, tab_data['results_model'])
+
+        # Filtro de texto (nome/vendedor) aplicado sobre todas as linhas, não só as visíveis
+        filter_frame = ttk.Frame(results_frame, style='TFrame')
+        filter_frame.grid(row=2, column=0, columnspan=2, sticky='ew', pady=(4, 0))
+        ttk.Label(filter_frame, text="Filtrar:", style='TLabel').pack(side=tk.LEFT, padx=(2, 2))
+        ttk.Entry(filter_frame, textvariable=tab_data['result_filter'], width=30, style='TEntry').pack(side=tk.LEFT, padx=2)
+        tab_data['result_filter'].trace_add('write', lambda *_, tid=tab_id: self._on_result_filter_change(tid))
         results_tree.bind("<Double-1>", lambda e, tid=tab_id: self.on_item_double_click(e, tid))
 
         # --- Área de Detalhes / Log da Aba ---
@@ -526,22 +609,34 @@ IMPORTANTE:
             'pdps_min': tk.StringVar(),
             'divine_potential_min': tk.StringVar(),
             'polling_interval': tk.StringVar(value="30"),
+            'delta_polling': tk.BooleanVar(value=True),
+            'polling_priority': tk.StringVar(value="Normal"),
+            'full_coverage': tk.BooleanVar(value=False),
             'stat_entries': [],
             'stat_min_values': [],
             'stat_max_values': [],
             'is_polling': False,
-            'polling_thread': None,
+            'is_searching': False,
+            'worker_thread': None,
             'stop_polling_flag': threading.Event(),
             '_item_details_cache': {},
+            'results_model': ResultsModel(),
+            'result_filter': tk.StringVar(),
+            'search_session': SearchSession(),
             'query_id': None,
-            'log_messages': [],
+            'log_level': tk.StringVar(value=self.log_level),
+            'log_buffer': TabLogBuffer(self.log_buffer_lines, self.log_level),
+            '_log_dirty': False,
             # Referências aos widgets importantes da aba 
             'category_combo_widget': None,
             'stats_frame_container_widget': None,
             'add_stat_button': None,
             'results_tree': None,
+            'results_view': None,
+            'results_frame': None,
             'details_text': None,
             'analysis_text': None,
+            'search_button': None,
             'start_polling_button': None,
             'stop_polling_button': None,
         }
@@ -631,11 +726,15 @@ IMPORTANTE:
                      return
             else:
                 return
+        elif tab_data.get('is_searching', False):
+            # Busca manual em andamento: apenas sinaliza a parada
+            tab_data['stop_polling_flag'].set()
 
         # Procede com a remoção
         try:
              self.search_notebook.forget(tab_data['tab_frame'])
              del self.search_tabs_data[tab_to_remove_id]
+             self.price_index.clear_tab(tab_to_remove_id)
              self.log_message(f"Aba de busca '{tab_name}' removida.", "info", use_global_log=True)
              
              if self.search_tabs_data:
@@ -683,6 +782,9 @@ IMPORTANTE:
 
             if new_active_id:
                 self.active_tab_id = new_active_id
+                # O log de abas em segundo plano só é desenhado quando a aba aparece
+                if self.search_tabs_data[new_active_id].get('_log_dirty'):
+                    self._render_log_tail(new_active_id)
             else:
                 self.active_tab_id = None
 
@@ -709,13 +811,92 @@ IMPORTANTE:
                 if 'Preferences' in config:
                     dark_mode_pref = config['Preferences'].getboolean('DarkMode', False)
                     self.dark_mode_enabled.set(dark_mode_pref)
+                    self.ui_frame_ms = max(10, config['Preferences'].getint('ui_frame_ms', DEFAULT_FRAME_MS))
+                    self.log_level = config['Preferences'].get('log_level', DEFAULT_LOG_LEVEL).strip().lower()
+                    if self.log_level not in LOG_LEVEL_LABELS: self.log_level = DEFAULT_LOG_LEVEL
+                    self.log_buffer_lines = max(100, config['Preferences'].getint('log_buffer_lines', DEFAULT_LOG_CAPACITY))
+                    self.log_visible_lines = max(50, config['Preferences'].getint('log_visible_lines', DEFAULT_VISIBLE_LINES))
+                    # A primeira aba é criada antes da leitura da configuração
+                    for existing_tab in self.search_tabs_data.values():
+                        existing_tab['log_buffer'].resize(self.log_buffer_lines)
+                        existing_tab['log_level'].set(self.log_level)
                     self.log_message(f"Preferência de tema carregada (Modo Escuro: {dark_mode_pref}).", "info", use_global_log=True)
 
+                if 'Polling' in config:
+                    self.polling_max_concurrent = max(1, config['Polling'].getint('max_concurrent_searches', DEFAULT_MAX_CONCURRENT))
+                    self.polling_jitter = max(0.0, config['Polling'].getfloat('jitter', DEFAULT_JITTER))
+
+                if 'Sharding' in config:
+                    self.max_price_shards = max(0, config['Sharding'].getint('max_shards', DEFAULT_MAX_SHARDS))
+                    self.max_sharded_items = max(API_RESULT_CAP, config['Sharding'].getint('max_items', DEFAULT_MAX_SHARDED_ITEMS))
+
+                if 'Storage' in config:
+                    storage = config['Storage']
+                    self.item_store_enabled = storage.getboolean('enabled', True)
+                    self.item_store_path = storage.get('item_store', ITEM_STORE_FILE)
+                    self.item_store_max_age_hours = storage.getfloat('max_age_hours', DEFAULT_MAX_AGE_HOURS)
+                    self.raw_data_mode = storage.get('raw_data', RAW_COMPRESSED).strip().lower()
+                    if self.raw_data_mode not in (RAW_STORE, RAW_COMPRESSED, RAW_NONE): self.raw_data_mode = RAW_COMPRESSED
+
+                if 'Analysis' in config:
+                    self.analysis_cache.configure(config['Analysis'].getint('cache_size', DEFAULT_ANALYSIS_CACHE_SIZE),
+                                                  config['Analysis'].getfloat('cache_ttl', DEFAULT_ANALYSIS_CACHE_TTL))
+                    self.analysis_pool.configure(config['Analysis'].getint('workers', DEFAULT_ANALYSIS_WORKERS),
+                                                 config['Analysis'].getint('batch_size', DEFAULT_ANALYSIS_BATCH_SIZE))
+                    if self.analysis_pool.enabled:
+                        self.log_message(f"Análise em {self.analysis_pool.workers} processos (lotes de {self.analysis_pool.batch_size} itens).", "info", use_global_log=True)
+
+                if 'Prices' in config:
+                    prices = config['Prices']
+                    rate_source = prices.get('source', SOURCE_FILE).strip().lower()
+                    if rate_source not in RATE_SOURCES: rate_source = SOURCE_FILE
+                    self.exchange_rates.configure(prices.get('base_currency', DEFAULT_BASE_CURRENCY).strip().lower(),
+                                                  rate_source, prices.get('rates_file', DEFAULT_RATES_FILE),
+                                                  prices.getfloat('ttl', DEFAULT_RATES_TTL))
+
+                if 'Replay' in config:
+                    self.replay_mode = config['Replay'].get('mode', MODE_LIVE).strip().lower()
+                    self.replay_corpus = config['Replay'].get('corpus', DEFAULT_CORPUS_FILE)
+                    self.replay_timing = config['Replay'].get('timing', TIMING_ORIGINAL).strip().lower()
+
+                if 'Network' in config:
+                    network = config['Network']
+                    self.trade_client.configure_pool(
+                        network.getint('pool_connections', DEFAULT_POOL_CONNECTIONS),
+                        network.getint('pool_maxsize', DEFAULT_POOL_MAXSIZE))
+                    self.prewarm_connections = network.getint('prewarm_connections', DEFAULT_PREWARM_CONNECTIONS)
+                    self.max_inflight_fetches = max(1, network.getint('max_inflight_fetches', DEFAULT_MAX_IN_FLIGHT))
+                    self.trade_client.search_cache.set_ttl(network.getfloat('search_cache_ttl', DEFAULT_SEARCH_CACHE_TTL))
+                    self.trade_client.set_base_url(network.get('api_base_url', TRADE_API_BASE_URL))
+                    if self.trade_client.base_url != TRADE_API_BASE_URL:
+                        self.log_message(f"API de trade alternativa: {self.trade_client.base_url}", "warning", use_global_log=True)
+                    self.log_message(f"Pool HTTP: {self.trade_client.pool_maxsize} conexões por host.", "info", use_global_log=True)
+
             except Exception as e:
                 messagebox.showerror("Erro ao Carregar", f"Falha ao ler arquivo de configuração:\n{e}")
                 self.log_message(f"Falha ao carregar config: {e}", "error", use_global_log=True)
         else:
             self.log_message(f"Arquivo '{CONFIG_FILE}' não encontrado. Usando padrões.", "info", use_global_log=True)
+        self._bind_session_credentials()
+
+    def _apply_replay_mode(self):
+        """Liga o transporte de gravação/reprodução configurado em [Replay]."""
+        if self.replay_mode == MODE_LIVE: return
+        try:
+            mode = install_transport(self.trade_client, self.replay_mode, self.replay_corpus, self.replay_timing)
+            self.log_message(f"Modo {mode} ativo (corpus: {self.replay_corpus}, tempo: {self.replay_timing}).", "warning", use_global_log=True)
+            # Itens vindos do corpus não devem se misturar ao armazenamento real
+            if mode != MODE_LIVE and self.item_store:
+                self.item_store.close(); self.item_store = None
+        except (OSError, ValueError) as e_replay:
+            self.log_message(f"Falha ao ativar modo {self.replay_mode}: {e_replay}. Usando API real.", "error", use_global_log=True)
+            self.replay_mode = MODE_LIVE
+
+    def _bind_session_credentials(self):
+        """Vincula cookies e User-Agent da configuração à sessão HTTP compartilhada."""
+        self.trade_client.configure(useragent=self.useragent.get(),
+                                    poesessid=self.poesessid.get(),
+                                    cf_clearance=self.cf_clearance.get())
 
     def save_config(self):
         """Salva configurações globais (cookies, tema)."""
@@ -733,6 +914,51 @@ IMPORTANTE:
 
         if 'Preferences' not in config: config['Preferences'] = {}
         config['Preferences']['DarkMode'] = str(self.dark_mode_enabled.get())
+        config['Preferences']['ui_frame_ms'] = str(self.ui_frame_ms)
+        config['Preferences']['log_level'] = self.log_level
+        config['Preferences']['log_buffer_lines'] = str(self.log_buffer_lines)
+        config['Preferences']['log_visible_lines'] = str(self.log_visible_lines)
+
+        if 'Network' not in config: config['Network'] = {}
+        config['Network']['pool_connections'] = str(self.trade_client.pool_connections)
+        config['Network']['pool_maxsize'] = str(self.trade_client.pool_maxsize)
+        config['Network']['prewarm_connections'] = str(self.prewarm_connections)
+        config['Network']['max_inflight_fetches'] = str(self.max_inflight_fetches)
+        config['Network']['search_cache_ttl'] = str(self.trade_client.search_cache.ttl)
+        config['Network']['api_base_url'] = self.trade_client.base_url
+
+        if 'Polling' not in config: config['Polling'] = {}
+        config['Polling']['max_concurrent_searches'] = str(self.polling_max_concurrent)
+        config['Polling']['jitter'] = str(self.polling_jitter)
+
+        if 'Sharding' not in config: config['Sharding'] = {}
+        config['Sharding']['max_shards'] = str(self.max_price_shards)
+        config['Sharding']['max_items'] = str(self.max_sharded_items)
+
+        if 'Storage' not in config: config['Storage'] = {}
+        config['Storage']['enabled'] = str(self.item_store_enabled)
+        config['Storage']['item_store'] = self.item_store_path
+        config['Storage']['max_age_hours'] = str(self.item_store_max_age_hours)
+        config['Storage']['raw_data'] = self.raw_data_mode
+
+        if 'Analysis' not in config: config['Analysis'] = {}
+        config['Analysis']['cache_size'] = str(self.analysis_cache.max_entries)
+        config['Analysis']['cache_ttl'] = str(self.analysis_cache.ttl)
+        config['Analysis']['workers'] = str(self.analysis_pool.workers)
+        config['Analysis']['batch_size'] = str(self.analysis_pool.batch_size)
+
+        if 'Prices' not in config: config['Prices'] = {}
+        config['Prices']['base_currency'] = self.exchange_rates.base
+        config['Prices']['source'] = self.exchange_rates.source
+        config['Prices']['rates_file'] = self.exchange_rates.path
+        config['Prices']['ttl'] = str(self.exchange_rates.ttl)
+
+        if 'Replay' not in config: config['Replay'] = {}
+        config['Replay']['mode'] = self.replay_mode
+        config['Replay']['corpus'] = self.replay_corpus
+        config['Replay']['timing'] = self.replay_timing
+
+        self._bind_session_credentials()
 
         try:
             with open(CONFIG_FILE, 'w') as configfile:
@@ -764,19 +990,159 @@ IMPORTANTE:
              if self.root.winfo_exists():
                   messagebox.showinfo("Instruções Cookies", f"Vá para a aba 'Configuração'.\n(Erro ao focar: {e})")
 
+    def _run_on_ui(self, callback, delay_ms=0):
+        """Agenda ``callback`` na thread do Tk (seguro para chamar de threads de trabalho).
+
+        Sem atraso, o callback entra na fila de atualizações e roda no próximo
+        quadro, na mesma ordem das linhas e logs publicados antes dele. Com
+        atraso, também passa pela fila: o ``after`` é agendado pela própria
+        thread do Tk, ``delay_ms`` depois do quadro que aplicar o evento.
+        """
+        if delay_ms <= 0:
+            self.ui_queue.call(callback)
+            return
+        self.ui_queue.call(lambda: self._schedule_after(delay_ms, callback))
+
+    def _schedule_after(self, delay_ms, callback):
+        """``root.after`` (só na thread do Tk)."""
+        try:
+            if self.root.winfo_exists():
+                self.root.after(delay_ms, callback)
+        except (tk.TclError, RuntimeError): pass
+
+    def _pump_ui_queue(self):
+        """Aplica os eventos acumulados desde o último quadro e agenda o próximo."""
+        try:
+            status, batches = self.ui_queue.drain()
+            if status is not None and hasattr(self, 'status_label') and self.status_label.winfo_exists():
+                self.status_label.config(text=status)
+            for kind, target, payloads in batches:
+                try:
+                    if kind == EVENT_ROW: self._apply_row_batch(target, payloads)
+                    elif kind == EVENT_LOG: self._apply_log_batch(target, payloads)
+                    elif kind == EVENT_REMOVE_ROWS: self._apply_row_removals(target, payloads)
+                    elif kind == EVENT_CALL:
+                        for callback in payloads: callback()
+                except tk.TclError as e_tcl:
+                    if "invalid command name" not in str(e_tcl): print(f"Erro Tcl ao atualizar interface ({kind}): {e_tcl}")
+                except Exception as e_apply:
+                    print(f"Erro ao atualizar interface ({kind}): {e_apply}\n{traceback.format_exc()}")
+        except tk.TclError: pass
+        try:
+            if self.root.winfo_exists():
+                # Sobrou fila do limite por quadro: continua logo em seguida
+                delay = 1 if self.ui_queue.backlog else self.ui_frame_ms
+                self.root.after(delay, self._pump_ui_queue)
+        except (tk.TclError, RuntimeError): pass
+
+    def _apply_row_batch(self, tab_id, rows):
+        """Insere/atualiza de uma vez as linhas publicadas para o Treeview da aba."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        tree = tab_data.get('results_tree') if tab_data else None
+        if not tree or not tree.winfo_exists(): return
+        model = tab_data['results_model']
+        for item_id, tree_values, row_tag, sort_keys in rows:
+            # Com uma coluna de ordenação ativa a linha entra direto na posição certa (bisect)
+            model.upsert(item_id, tree_values, row_tag, sort_keys)
+        if self.sort_column is not None and not model.index.matches(self.sort_column, self.sort_reverse):
+            # Aba ordenada por outra coluna (ou ainda na ordem de chegada): reordena uma vez
+            self.sort_treeview(self.sort_column, tab_id, toggle=False)
+        self._refresh_results_view(tab_id)
+
+    def _refresh_results_view(self, tab_id):
+        """Redesenha a janela visível da lista e o contador de itens da aba."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        view = tab_data.get('results_view') if tab_data else None
+        if not view or not view.tree.winfo_exists(): return
+        view.render()
+        model = tab_data['results_model']
+        shown, total = len(model.view()), len(model)
+        title = f"Itens Encontrados ({total})" if shown == total else f"Itens Encontrados ({shown} de {total})"
+        results_frame = tab_data.get('results_frame')
+        if results_frame and str(results_frame.cget('text')) != title: results_frame.configure(text=title)
+
+    def _on_result_filter_change(self, tab_id):
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        tab_data['results_model'].set_filter(tab_data['result_filter'].get())
+        tab_data['results_view'].offset = 0
+        self._refresh_results_view(tab_id)
+
+    def _apply_row_removals(self, tab_id, id_groups):
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        tab_data['results_model'].remove(item_id for group in id_groups for item_id in group)
+        self._refresh_results_view(tab_id)
+
+    def _apply_log_batch(self, tab_id, entries):
+        """Escreve as linhas de log da aba num único ``insert`` do widget."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        log_widget = tab_data.get('details_text') if tab_data else None
+        if not log_widget or not log_widget.winfo_exists():
+            for level, timestamp, message in entries:
+                print(f"LOG UI ({level}) [Aba:{tab_id}] - Widget não existe mais: {message}")
+            return
+        if tab_id != self.active_tab_id:
+            # Aba em segundo plano: as linhas ficam no buffer até a aba ser exibida
+            tab_data['_log_dirty'] = True
+            return
+        entries = entries[-self.log_visible_lines:]
+        colors = DARK_COLORS if self.dark_mode_enabled.get() else LIGHT_COLORS
+        chunks = []
+        for level, timestamp, message in entries:
+            # Usa tag de nível ou fallback para 'info'
+            tag = level if f"tag_{level}" in colors else "info"
+            chunks.extend((f"[{timestamp}] ", ("debug",), f"{message}\n", (tag,))) # Timestamp sempre debug
+        original_state = str(log_widget.cget('state'))
+        if original_state == tk.DISABLED:
+            log_widget.config(state=tk.NORMAL)
+        log_widget.insert(tk.END, *chunks)
+        # Mantém no widget só o final visível (o restante continua no buffer da aba)
+        excess = int(log_widget.index('end-1c').split('.')[0]) - self.log_visible_lines
+        if excess > 0:
+            log_widget.delete(1.0, f"{excess + 1}.0")
+        log_widget.see(tk.END) # Rola para o final
+        if original_state == tk.DISABLED:
+            log_widget.config(state=tk.DISABLED)
+
+    def _show_dialog(self, kind, title, message):
+        """Mostra um messagebox ('error', 'warning', 'info') sempre a partir da thread do Tk."""
+        show = {"error": messagebox.showerror, "warning": messagebox.showwarning}.get(kind, messagebox.showinfo)
+        if threading.current_thread() is threading.main_thread():
+            show(title, message)
+        else:
+            self._run_on_ui(lambda: show(title, message))
+
+    def _clear_tab_results(self, tab_id):
+        """Limpa o Treeview e os painéis de detalhes/análise da aba."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        try:
+            tab_data['results_model'].clear()
+            self._refresh_results_view(tab_id)
+
+            colors = DARK_COLORS if self.dark_mode_enabled.get() else LIGHT_COLORS
+            for widget_key in ['details_text', 'analysis_text']:
+                widget = tab_data.get(widget_key)
+                if widget and widget.winfo_exists():
+                    try:
+                        widget.config(state=tk.NORMAL, bg=colors["log_bg"])
+                        widget.delete(1.0, tk.END)
+                        widget.config(state=tk.DISABLED)
+                    except Exception as e: print(f"Erro limpando {widget_key}: {e}")
+        except Exception as e_clear:
+            self.log_message(f"Erro ao limpar UI da aba: {e_clear}", "error", tab_id=tab_id)
+
     def update_status(self, message):
-        """Atualiza a barra de status global."""
-        def _update():
-            try:
-                if hasattr(self, 'status_label') and self.status_label.winfo_exists():
-                    self.status_label.config(text=message)
-            except tk.TclError: pass
-            except AttributeError: pass
-        if hasattr(self, 'root') and self.root.winfo_exists():
-            self.root.after(0, _update)
+        """Atualiza a barra de status global (só a última mensagem de cada quadro é exibida)."""
+        self.ui_queue.set_status(message)
 
     def log_message(self, message, level="info", tab_id=None, use_global_log=False):
-        """Loga mensagem no painel de detalhes da aba ativa/especificada ou globalmente (console)."""
+        """Loga mensagem no painel de detalhes da aba ativa/especificada ou globalmente (console).
+
+        Mensagens abaixo do nível de log da aba são descartadas; as demais vão
+        para o buffer circular da aba e, em lote, para o final do widget.
+        """
         log_widget = None
 
         # Determina onde logar
@@ -799,33 +1165,38 @@ IMPORTANTE:
             print(f"LOG ({level}) [Aba:{target_tab_id} - Widget Nulo 2]: {message}")
             return
 
-        # Garante que a atualização da UI ocorra na thread principal
-        def _log_to_widget():
-            if not log_widget or not log_widget.winfo_exists():
-                print(f"LOG UI ({level}) [Aba:{target_tab_id}] - Widget não existe mais: {message}")
-                return
-            try:
-                colors = DARK_COLORS if self.dark_mode_enabled.get() else LIGHT_COLORS
-                # Usa tag de nível ou fallback para 'info'
-                tag = level if f"tag_{level}" in colors else "info"
-                original_state = str(log_widget.cget('state'))
-                if original_state == tk.DISABLED:
-                    log_widget.config(state=tk.NORMAL)
-
-                now = datetime.now().strftime("%H:%M:%S")
-                log_widget.insert(tk.END, f"[{now}] ", ("debug",)) # Timestamp sempre debug
-                log_widget.insert(tk.END, f"{message}\n", (tag,)) # Mensagem com tag de nível
-
-                log_widget.see(tk.END) # Rola para o final
-                if original_state == tk.DISABLED:
-                    log_widget.config(state=tk.DISABLED)
-            except tk.TclError:
-                pass
-            except Exception as e:
-                print(f"Erro ao logar na UI [Aba:{target_tab_id}]: {e}\nMensagem ({level}): {message}")
-
-        if hasattr(self, 'root') and self.root.winfo_exists():
-            self.root.after(0, _log_to_widget)
+        log_buffer = tab_data['log_buffer']
+        if not log_buffer.enabled(level): return
+        entry = (level, datetime.now().strftime("%H:%M:%S"), message)
+        log_buffer.append(entry)
+        # Aplicado na thread principal, junto com as demais linhas do quadro
+        self.ui_queue.post(EVENT_LOG, target_tab_id, entry)
+
+    def log_enabled(self, level, tab_id=None):
+        """Indica se ``level`` passa no nível de log da aba (evita formatar mensagens descartadas)."""
+        tab_data = self.search_tabs_data.get(tab_id if tab_id else self.active_tab_id)
+        return bool(tab_data) and tab_data['log_buffer'].enabled(level)
+
+    def _on_log_level_change(self, tab_id):
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        tab_data['log_buffer'].set_level(tab_data['log_level'].get())
+        self._render_log_tail(tab_id)
+
+    def _render_log_tail(self, tab_id):
+        """Redesenha o widget de log da aba com o final do buffer (thread do Tk)."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        log_widget = tab_data.get('details_text') if tab_data else None
+        if not log_widget or not log_widget.winfo_exists(): return
+        tab_data['_log_dirty'] = False
+        log_buffer = tab_data['log_buffer']
+        entries = log_buffer.tail(self.log_visible_lines, min_level=log_buffer.level)
+        try:
+            log_widget.config(state=tk.NORMAL)
+            log_widget.delete(1.0, tk.END)
+            log_widget.config(state=tk.DISABLED)
+            if entries: self._apply_log_batch(tab_id, entries)
+        except tk.TclError: pass
 
     def build_search_payload(self, tab_id):
         """Constrói o payload da API usando os filtros da aba especificada."""
@@ -833,100 +1204,36 @@ IMPORTANTE:
              self.log_message(f"Erro: Tentando construir payload para aba inexistente ID {tab_id}", "error", use_global_log=True)
              return None
         tab_data = self.search_tabs_data[tab_id]
-
-        payload = {
-            "query": {
-                "status": {"option": "online"},
-                "stats": [{"type": "and", "filters": []}],
-                "filters": {}
-            },
-            "sort": {"price": "asc"}
+        filters = {
+            "category": tab_data['selected_category'].get(),
+            "currency": tab_data['selected_currency'].get(),
+            "price_min": tab_data['price_min'].get(),
+            "price_max": tab_data['price_max'].get(),
+            "dps_min": tab_data['dps_min'].get(),
+            "pdps_min": tab_data['pdps_min'].get(),
+            "stats": [(stat_var.get(), min_var.get(), max_var.get()) for stat_var, min_var, max_var
+                      in zip(tab_data['stat_entries'], tab_data['stat_min_values'], tab_data['stat_max_values'])],
         }
-        stat_filters_list = payload["query"]["stats"][0]["filters"]
-
-        # Filtro de Categoria
-        category_key = tab_data['selected_category'].get()
-        if category_key and category_key in ITEM_CATEGORIES:
-            category_value = ITEM_CATEGORIES[category_key]
-            if category_value != "any":
-                if "type_filters" not in payload["query"]["filters"]:
-                    payload["query"]["filters"]["type_filters"] = {"filters": {}}
-                payload["query"]["filters"]["type_filters"]["filters"]["category"] = {"option": category_value}
-        elif category_key:
-            messagebox.showwarning("Categoria Inválida", f"Categoria '{category_key}' não encontrada. Removendo filtro.")
-            payload["query"]["filters"].pop("type_filters", None)
-
-        # Filtro de Preço
-        price_filter = {"option": tab_data['selected_currency'].get()}
-        price_min_val, price_max_val = None, None
-        try:
-            if tab_data['price_min'].get():
-                price_min_val = float(tab_data['price_min'].get())
-                price_filter["min"] = price_min_val
-            if tab_data['price_max'].get():
-                price_max_val = float(tab_data['price_max'].get())
-                price_filter["max"] = price_max_val
-            if price_min_val is not None or price_max_val is not None:
-                if "trade_filters" not in payload["query"]["filters"]:
-                    payload["query"]["filters"]["trade_filters"] = {"filters": {}}
-                payload["query"]["filters"]["trade_filters"]["filters"]["price"] = price_filter
-        except ValueError:
-            messagebox.showerror("Erro de Valor", "Valor inválido para Preço Mínimo ou Máximo.")
-            self.log_message("Erro de valor em Preço.", "error", tab_id=tab_id)
-            return None
-
-        # Filtros DPS/PDPS
         try:
-            dps_min_val = float(tab_data['dps_min'].get()) if tab_data['dps_min'].get() else None
-            pdps_min_val = float(tab_data['pdps_min'].get()) if tab_data['pdps_min'].get() else None
-            equipment_filters_dict = {}
-            if dps_min_val is not None:
-                equipment_filters_dict["dps"] = {"min": dps_min_val}
-                self.log_message(f"Filtro API: dps >= {dps_min_val}", "debug", tab_id=tab_id)
-            if pdps_min_val is not None:
-                equipment_filters_dict["pdps"] = {"min": pdps_min_val}
-                self.log_message(f"Filtro API: pdps >= {pdps_min_val}", "debug", tab_id=tab_id)
-            if equipment_filters_dict:
-                if "filters" not in payload["query"]: payload["query"]["filters"] = {}
-                if "equipment_filters" not in payload["query"]["filters"]:
-                    payload["query"]["filters"]["equipment_filters"] = {"filters": {}}
-                payload["query"]["filters"]["equipment_filters"]["filters"].update(equipment_filters_dict)
-        except ValueError:
-            messagebox.showerror("Erro de Valor", "Valor inválido para DPS Mínimo ou PDPS Mínimo.")
-            self.log_message("Erro de valor em DPS/PDPS.", "error", tab_id=tab_id)
+            return build_search_payload(
+                filters,
+                on_log=lambda message, level="info": self.log_message(message, level, tab_id=tab_id),
+                on_warning=lambda title, message: self._show_dialog("warning", title, message),
+                debug=self.log_enabled("debug", tab_id))
+        except PayloadError as payload_err:
+            self._show_dialog("error", payload_err.title, payload_err.message)
+            self.log_message(f"Erro de valor nos filtros: {payload_err.message}", "error", tab_id=tab_id)
             return None
 
-        # Filtros de Stats Específicos
-        for stat_var, min_var, max_var in zip(tab_data['stat_entries'], tab_data['stat_min_values'], tab_data['stat_max_values']):
-            stat_name = stat_var.get()
-            min_str = min_var.get()
-            max_str = max_var.get()
-            if stat_name and (min_str or max_str):
-                stat_id = STAT_MAP.get(stat_name)
-                if stat_id:
-                    value_filter = {}
-                    try:
-                        if min_str: value_filter["min"] = float(min_str)
-                        if max_str: value_filter["max"] = float(max_str)
-                        if value_filter:
-                            stat_filters_list.append({"id": stat_id, "value": value_filter, "disabled": False})
-                            self.log_message(f"Filtro API: {stat_name} ({stat_id}) = {value_filter}", "debug", tab_id=tab_id)
-                    except ValueError:
-                        messagebox.showerror("Erro de Valor", f"Valor inválido para Mín/Máx de '{stat_name}'.")
-                        self.log_message(f"Erro de valor em Stat: {stat_name}", "error", tab_id=tab_id)
-                        return None
-                else:
-                    self.log_message(f"Aviso: ID da API não encontrado para stat '{stat_name}'. Filtro ignorado.", "warning", tab_id=tab_id)
-
-        # Remove a chave "stats" se nenhuma filtro de stat foi adicionado
-        if not stat_filters_list:
-            payload["query"].pop("stats", None)
+    def search_items(self, tab_id, incremental=False, payload=None):
+        """Executa a busca de itens para a aba especificada.
 
-        self.log_message("Payload construído.", "debug", tab_id=tab_id)
-        return payload
-
-    def search_items(self, tab_id):
-        """Executa a busca de itens para a aba especificada."""
+        Roda numa thread de trabalho da aba (busca manual ou monitoramento); o
+        ciclo em si é do ``SearchEngine`` e toda alteração de widget é agendada
+        na thread do Tk. Com ``incremental=True`` (modo delta do monitoramento)
+        mantém as linhas e análises já conhecidas e busca detalhes apenas dos IDs
+        nunca vistos.
+        """
         if tab_id not in self.search_tabs_data:
              self.log_message(f"Tentativa de busca em aba inválida: {tab_id}", "error", use_global_log=True)
              return
@@ -934,701 +1241,102 @@ IMPORTANTE:
         tab_name = tab_data['name']
 
         # Verifica cookies globais
-        if not self.poesessid.get() or not self.cf_clearance.get():
-            messagebox.showerror("Erro de Autenticação", "POESESSID e/ou cf_clearance não configurados. Verifique a aba 'Configuração'.")
+        if not self.trade_client.offline and (not self.poesessid.get() or not self.cf_clearance.get()):
+            self._show_dialog("error", "Erro de Autenticação", "POESESSID e/ou cf_clearance não configurados. Verifique a aba 'Configuração'.")
             return
 
-        # Limpa a interface DA ABA antes da busca
-        self.update_status(f"[{tab_name}] Limpando resultados...")
-        try:
-            results_tree = tab_data.get('results_tree')
-            if results_tree and results_tree.winfo_exists():
-                for item in results_tree.get_children():
-                    results_tree.delete(item)
-            tab_data['_item_details_cache'].clear()
-
-            colors = DARK_COLORS if self.dark_mode_enabled.get() else LIGHT_COLORS
-            for widget_key in ['details_text', 'analysis_text']:
-                widget = tab_data.get(widget_key)
-                if widget and widget.winfo_exists():
-                    try:
-                        widget.config(state=tk.NORMAL, bg=colors["log_bg"])
-                        widget.delete(1.0, tk.END)
-                        widget.config(state=tk.DISABLED)
-                    except Exception as e: print(f"Erro limpando {widget_key}: {e}")
-        except Exception as e_clear:
-            self.log_message(f"Erro ao limpar UI da aba: {e_clear}", "error", tab_id=tab_id)
-
-        # Garante que a limpeza seja visível antes de construir o payload
-        if hasattr(self, 'root') and self.root.winfo_exists(): self.root.update_idletasks()
-
-        self.update_status(f"[{tab_name}] Construindo payload...")
-        payload = self.build_search_payload(tab_id)
+        if payload is None:
+            self.update_status(f"[{tab_name}] Construindo payload...")
+            payload = self.build_search_payload(tab_id)
         if payload is None:
             self.update_status(f"[{tab_name}] Pronto (Falha payload)")
             return
 
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': self.useragent.get(), # Global
-            'Accept': 'application/json'
-        }
-        cookies = {
-            'POESESSID': self.poesessid.get(), # Global
-            'cf_clearance': self.cf_clearance.get() # Global
-        }
-        league = self.current_league.get().replace(" ", "%20")  # Formato para URL
-        search_url = f"https://www.pathofexile.com/api/trade2/search/poe2/{league}"
-
-        self.log_message(f"Enviando busca para: {search_url}", "info", tab_id=tab_id)
-        self.update_status(f"[{tab_name}] Enviando requisição...")
-        try:
-            # --- Requisição POST para obter IDs ---
-            search_response = requests.post(search_url, headers=headers, cookies=cookies, json=payload, timeout=45)
-            self.log_message(f"Resposta da busca recebida (Status: {search_response.status_code})", "info", tab_id=tab_id)
-
-            # Tratamento de Erros da Requisição de Busca
-            if search_response.status_code != 200:
-                error_msg = f"Erro API busca ({search_response.status_code})."
-                try:
-                    error_details = search_response.json()
-                    api_error_msg = error_details.get("error", {}).get("message", "")
-                    if api_error_msg: error_msg += f"\nAPI: {api_error_msg}"
-                    self.log_message(f"Detalhes erro API (busca): {json.dumps(error_details, indent=2)}", "error", tab_id=tab_id)
-                except json.JSONDecodeError:
-                    error_msg += f"\nResposta não JSON: {search_response.text[:200]}"
-                    self.log_message(f"Resposta não JSON (busca {search_response.status_code}): {search_response.text}", "error", tab_id=tab_id)
-                # Adiciona dicas baseadas no status code
-                if search_response.status_code == 400: error_msg += "\nVerifique os filtros (payload inválido?)."
-                elif search_response.status_code in [401, 403]: error_msg += "\nErro autenticação. Verifique os Cookies."
-                elif search_response.status_code == 429: error_msg += "\nLimite de requisições (Rate Limit). Aguarde."
-                elif search_response.status_code >= 500: error_msg += "\nErro no servidor da GGG."
-
-                self.update_status(f"[{tab_name}] Erro {search_response.status_code} busca")
-                messagebox.showerror(f"Erro {search_response.status_code} - Busca", error_msg)
-                return
-
-            # --- Processamento da Resposta da Busca ---
-            search_data = search_response.json()
-            query_id = search_data.get("id")
-            item_ids = search_data.get("result", [])
-            total_results = search_data.get("total", 0)
-
-            if not query_id:
-                self.log_message("Erro: Resposta da busca sem ID da query.", "error", tab_id=tab_id)
-                self.update_status(f"[{tab_name}] Erro: Resposta API inválida")
-                return
-
-            tab_data['query_id'] = query_id # GUARDA O ID DA BUSCA NA ABA
-            self.update_status(f"[{tab_name}] ID: {query_id[:8]}.. Total: {total_results}. Buscando detalhes...")
-            self.log_message(f"ID Query: {query_id}. Total API: {total_results}", "info", tab_id=tab_id)
-
-            if not item_ids:
-                self.update_status(f"[{tab_name}] Nenhum item encontrado.")
-                self.log_message("Nenhum resultado encontrado.", "info", tab_id=tab_id)
-                return
-
-            # --- Requisições GET para buscar detalhes em lotes ---
-            items_processed = 0
-            max_items_to_fetch = 100
-            fetch_delay = 1.1
-            item_ids_to_fetch = item_ids[:max_items_to_fetch]
-            if total_results > max_items_to_fetch:
-                self.log_message(f"Limitando detalhes aos primeiros {max_items_to_fetch} de {total_results} itens.", "warning", tab_id=tab_id)
-                self.update_status(f"[{tab_name}] ID: {query_id[:8]}.. Total: {total_results}. Buscando {max_items_to_fetch}...")
-
-            stop_flag = tab_data.get('stop_polling_flag', threading.Event())
-
-            for i in range(0, len(item_ids_to_fetch), 10): # Lotes de 10
-                if stop_flag.is_set():
-                    self.log_message("Busca interrompida pelo usuário.", "info", tab_id=tab_id)
-                    break
-
-                batch = item_ids_to_fetch[i:i + 10]
-                batch_ids_str = ",".join(batch)
-                fetch_url = f"https://www.pathofexile.com/api/trade2/fetch/{batch_ids_str}?query={tab_data['query_id']}&realm=poe2"
-                self.update_status(f"[{tab_name}] Buscando detalhes {i + 1}-{min(i + 10, len(item_ids_to_fetch))}...")
-
-                if i > 0: time.sleep(fetch_delay)
-
-                self.log_message(f"Enviando GET fetch: {fetch_url[:150]}...", "debug", tab_id=tab_id)
-                try:
-                    fetch_response = requests.get(fetch_url, headers=headers, cookies=cookies, timeout=30)
-                except requests.exceptions.Timeout:
-                    self.log_message(f"Timeout ao buscar detalhes lote {i // 10 + 1}.", "error", tab_id=tab_id)
-                    continue
-                except requests.exceptions.RequestException as fetch_req_err:
-                    self.log_message(f"Erro rede buscar detalhes lote {i // 10 + 1}: {fetch_req_err}.", "error", tab_id=tab_id)
-                    continue
-
-                self.log_message(f"Resposta fetch recebida ({fetch_response.status_code}) - Lote {i // 10 + 1}", "debug", tab_id=tab_id)
-
-                if fetch_response.status_code != 200:
-                    self.log_message(f"Erro {fetch_response.status_code} buscar detalhes lote {i // 10 + 1}.", "error", tab_id=tab_id)
-                    try:
-                        error_details = fetch_response.json()
-                        self.log_message(f"Detalhes erro fetch: {json.dumps(error_details)}", "error", tab_id=tab_id)
-                    except:
-                        self.log_message(f"Resposta erro fetch (não JSON): {fetch_response.text[:200]}", "error", tab_id=tab_id)
-
-                    # Erros críticos param a busca da aba
-                    if fetch_response.status_code in [401, 403, 429]:
-                        msg = f"Erro crítico {fetch_response.status_code} ao buscar detalhes. Verifique cookies ou aguarde (Rate Limit)."
-                        messagebox.showerror(f"Erro Crítico {fetch_response.status_code} - Fetch", msg)
-                        self.update_status(f"[{tab_name}] Erro {fetch_response.status_code} - Busca Abortada")
-                        # Se estiver no polling, para o polling da aba
-                        if tab_data.get('is_polling', False):
-                             self.stop_polling(tab_id)
-                        return # Para a busca atual
-                    continue # Continua para próximo lote se não for erro crítico
-
-                # --- Processamento dos Detalhes do Lote ---
-                try:
-                    fetch_data = fetch_response.json()
-                except json.JSONDecodeError:
-                    self.log_message(f"Erro decodificar JSON fetch lote {i // 10 + 1}.", "error", tab_id=tab_id)
-                    continue
-
-                items = fetch_data.get("result", [])
-                if not items:
-                    self.log_message(f"Lote {i // 10 + 1} não retornou itens nos detalhes.", "warning", tab_id=tab_id)
-                    continue
-
-                for item_detail in items:
-                     if stop_flag.is_set(): break
-                     if not item_detail:
-                          self.log_message(f"Item nulo/vazio no lote {i // 10 + 1}.", "warning", tab_id=tab_id)
-                          continue
-                     # Chama process_item PASSANDO O TAB_ID
-                     self.process_item(item_detail, tab_data['query_id'], tab_id)
-                     items_processed += 1
-                if stop_flag.is_set(): break # Sai do loop de lotes se interrompido
-
-            # --- Finalização da Busca ---
-            final_status_msg = f"Busca concluída. {items_processed} itens exibidos."
-            if items_processed < total_results:
-                 if items_processed >= max_items_to_fetch:
-                      final_status_msg += f" (Limite {max_items_to_fetch} de {total_results} totais)"
-                 else:
-                      final_status_msg += f" (de {total_results} totais)"
-            # Atualiza status apenas se o polling não estiver ativo (evita sobrescrever msg de espera)
-            if not tab_data.get('is_polling', False) or stop_flag.is_set():
-                self.update_status(f"[{tab_name}] {final_status_msg}")
-            self.log_message(final_status_msg, "info", tab_id=tab_id)
-
-            # Reordena o treeview DA ABA se uma coluna estava selecionada globalmente
-            if self.sort_column:
-                 # A função sort_treeview precisa saber qual treeview ordenar
-                 self.sort_treeview(self.sort_column, tab_id) # Passa tab_id
-
-        except requests.exceptions.RequestException as req_err:
-            self.update_status(f"[{tab_name}] Erro de Rede")
-            self.log_message(f"Erro de rede: {req_err}", "error", tab_id=tab_id)
-            messagebox.showerror("Erro de Rede", f"Falha na comunicação com a API:\n{req_err}")
-        except Exception as e:
-            self.update_status(f"[{tab_name}] Erro Inesperado na Busca")
-            self.log_message(f"Erro inesperado search_items: {e}\n{traceback.format_exc()}", "error", tab_id=tab_id)
-            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro inesperado:\n{e}\nVerifique o log da aba para detalhes.")
-
-    def calculate_dps(self, item_info):
-        """Calcula o DPS total, físico e elemental de um item."""
-        properties = item_info.get("properties", [])
-        extended = item_info.get("extended", {})
-        dps_val = extended.get("dps")
-        pdps_val = extended.get("pdps")
-        edps_val = extended.get("edps")
-        dps_num = float(dps_val) if isinstance(dps_val, (int, float)) else None
-        pdps_num = float(pdps_val) if isinstance(pdps_val, (int, float)) else None
-        edps_num = float(edps_val) if isinstance(edps_val, (int, float)) else None
-        
-        # Fallback calculation if pdps is missing
-        if pdps_num is None:
-            phys_dmg_min, phys_dmg_max, atk_speed = None, None, None
-            for prop in properties:
-                if not isinstance(prop, dict): continue
-                prop_name = prop.get("name", "")
-                values = prop.get("values", [])
-                if values and isinstance(values, list) and len(values) > 0 and \
-                  isinstance(values[0], list) and len(values[0]) > 0:
-                    prop_val_str = str(values[0][0])
-                    # Physical Damage check
-                    if "physical damage" in prop_name.lower() or \
-                      ("damage" in prop_name.lower() and not any(x in prop_name.lower() for x in ["elemental", "chaos", "spell"])):
-                        try:
-                            if '-' in prop_val_str:
-                                dmg_range = prop_val_str.split("-")
-                                phys_dmg_min, phys_dmg_max = map(float, dmg_range)
-                            else:
-                                phys_dmg_min = phys_dmg_max = float(prop_val_str)
-                        except (ValueError, TypeError): pass
-                    # Attack Speed check
-                    elif "attacks per second" in prop_name.lower() or \
-                         ("attack speed" in prop_name.lower()):
-                        try:
-                            atk_speed = float(prop_val_str.replace('+',''))
-                        except (ValueError, TypeError): pass
-            if phys_dmg_min is not None and phys_dmg_max is not None and atk_speed is not None and atk_speed > 0:
-                pdps_num = round(((phys_dmg_min + phys_dmg_max) / 2) * atk_speed, 1)
-                
-        # Fallback total DPS calculation
-        if dps_num is None and pdps_num is not None and edps_num is not None:
-             dps_num = round(pdps_num + edps_num, 1)
-        elif dps_num is None and pdps_num is not None:
-             dps_num = pdps_num # If only PDPS is available, use it as DPS
-             
-        return dps_num, pdps_num, edps_num
-
-    def estimate_potential_dps(self, item_data, divine_analysis_results):
-        """Estima o DPS potencial após usar Divine Orbs."""
-        item_info = item_data.get("item", {})
-        current_dps, current_pdps, _ = self.calculate_dps(item_info)
-        
-        if current_pdps is None and current_dps is None:
-            return None, None, None  # Não é possível calcular
-            
-        # Encontrar modificadores que afetam o DPS
-        dps_mods = []
-        for result in divine_analysis_results:
-            if result.get('status') == 'ok' and result.get('potential_pct') is not None:
-                mod_text = result.get('text', '').lower()
-                # Verificar se é um modificador relevante para DPS
-                if any(term in mod_text for term in ['damage', 'attack speed', 'critical']):
-                    dps_mods.append(result)
-        
-        if not dps_mods:
-            return current_dps, current_dps, current_dps  # Sem mods que afetem DPS
-            
-        # Calcular fator médio e máximo de melhoria
-        total_potential = sum(mod.get('potential_pct', 0) for mod in dps_mods) / 100  # Converter de % para decimal
-        avg_potential = total_potential / len(dps_mods) if dps_mods else 0
-        
-        # Estimar DPS com base no potencial
-        if current_pdps is not None:
-            min_pdps = current_pdps
-            max_pdps = current_pdps * (1 + avg_potential * 0.8)  # Estimativa conservadora do máximo
-            avg_pdps = current_pdps * (1 + avg_potential * 0.4)  # Estimativa média
-            
-            return min_pdps, avg_pdps, max_pdps
-        elif current_dps is not None:
-            min_dps = current_dps
-            max_dps = current_dps * (1 + avg_potential * 0.8)
-            avg_dps = current_dps * (1 + avg_potential * 0.4)
-            
-            return min_dps, avg_dps, max_dps
-            
-        return None, None, None
-
-    def estimate_price_after_divine(self, current_price, divine_potential, current_dps, max_dps):
-        """Estima o preço após o uso de Divine Orbs com base no potencial."""
-        if current_price is None or divine_potential is None:
-            return None
-            
-        # Fator base baseado no potencial de melhoria (%)
-        base_factor = 1 + (divine_potential / 100) * 0.8
-        
-        # Fator adicional baseado na melhoria de DPS (se disponível)
-        dps_factor = 1.0
-        if current_dps is not None and max_dps is not None and current_dps > 0:
-            dps_improvement = (max_dps / current_dps) - 1
-            dps_factor = 1 + dps_improvement * 0.6  # 60% do ganho de DPS
-        
-        # Custo do Divine Orb (aproximado em chaos)
-        divine_cost = 150  # Valor aproximado de um Divine Orb
-        
-        # Calculamos o preço estimado
-        estimated_price = current_price * base_factor * dps_factor
-        
-        # Ajusta deduzindo o custo do Divine
-        final_price = max(estimated_price - divine_cost, current_price)
-        
-        return round(final_price, 1)
-
-    def analyze_divine_worth(self, item_data):
-        """Analisa o item para determinar o potencial de ganho com Divine Orb."""
-        item = item_data.get("item", {})
-        explicit_mods_text = item.get("explicitMods", []) if isinstance(item.get("explicitMods"), list) else []
-        implicit_mods_text = item.get("implicitMods", []) if isinstance(item.get("implicitMods"), list) else []
-        extended_data = item.get("extended", {})
-        extended_mods = extended_data.get("mods", {})
-        extended_hashes = extended_data.get("hashes", {})
-        analysis_results = []
-        processed_text_indices = {"explicit": set(), "implicit": set()}
-        current_value_regex = re.compile(r'([-+]?\d+(?:.\d+)?)')
-        adds_value_regex = re.compile(r'[aA]dds\s+([-+]?\d+(?:.\d+)?)\s+to\s+([-+]?\d+(?:.\d+)?)')
-
-        def format_range_display(min_vals, max_vals):
-            # ... (lógica igual) ...
-            range_parts = []
-            if not isinstance(min_vals, list) or not isinstance(max_vals, list) or len(min_vals) != len(max_vals):
-                return "[Erro Range]"
-            for r_idx in range(len(min_vals)):
-                try:
-                    min_v, max_v = min_vals[r_idx], max_vals[r_idx]
-                    min_d = f"{min_v:.1f}".rstrip('0').rstrip('.') if isinstance(min_v, float) and not min_v.is_integer() else str(int(min_v))
-                    max_d = f"{max_v:.1f}".rstrip('0').rstrip('.') if isinstance(max_v, float) and not max_v.is_integer() else str(int(max_v))
-                    range_parts.append(f"{min_d}–{max_d}")
-                except (TypeError, ValueError): range_parts.append("?–?")
-            if len(range_parts) == 2: return f"[{range_parts[0]} to {range_parts[1]}]"
-            elif range_parts: return f"[{' / '.join(range_parts)}]"
-            else: return "[N/A]"
-
-        def format_current_display(values):
-            # ... (lógica igual) ...
-            current_display_parts = []
-            if not isinstance(values, list): return "?"
-            for val in values:
-                try:
-                    display = f"{val:.1f}".rstrip('0').rstrip('.') if isinstance(val, float) and not val.is_integer() else str(int(val))
-                    current_display_parts.append(display)
-                except: current_display_parts.append("?")
-            return ", ".join(current_display_parts) if current_display_parts else "?"
-
-        idx_to_details = {"explicit": {}, "implicit": {}}
-        if extended_mods and isinstance(extended_mods, dict):
-             for scope in ["explicit", "implicit"]:
-                  scope_mods = extended_mods.get(scope)
-                  if isinstance(scope_mods, list):
-                       idx_to_details[scope] = {i: mod for i, mod in enumerate(scope_mods)}
-
-        all_scopes = {"explicit": explicit_mods_text, "implicit": implicit_mods_text}
-        if extended_hashes and isinstance(extended_hashes, dict):
-             for scope, text_list in all_scopes.items():
-                  scope_hashes = extended_hashes.get(scope)
-                  if not isinstance(scope_hashes, list): continue
-                  for hash_entry in scope_hashes:
-                       summed_min_vals, summed_max_vals, current_values = [], [], []
-                       component_tiers = []; mod_text_display = "Mod Desconhecido"; tier_str = ""; tag = "divine_unknown"
-                       range_found, text_found, calculation_valid = False, False, False
-                       potential_pct = None; status = "init"; num_magnitudes_expected = 0
-                       try:
-                            if not isinstance(hash_entry, (list, tuple)) or len(hash_entry) != 2: continue
-                            stat_hash, component_indices = hash_entry
-                            if not stat_hash or not isinstance(component_indices, list) or not component_indices: continue
-                            component_details = [idx_to_details[scope].get(idx) for idx in component_indices if idx_to_details[scope].get(idx)]
-                            if not component_details: continue
-
-                            first_comp_mags = None; is_first_comp = True; valid_range_sum = True
-                            for detail_part in component_details:
-                                magnitudes = detail_part.get("magnitudes")
-                                if not isinstance(magnitudes, list):
-                                    valid_range_sum = False; break
-                                tier = detail_part.get("tier"); tier_match = re.match(r'^[SP]?(\d+)$', str(tier))
-                                if tier_match: component_tiers.append(f"T{tier_match.group(1)}")
-                                comp_mags_for_hash = [mag for mag in magnitudes if mag.get("hash") == stat_hash]
-                                if not comp_mags_for_hash: continue
-
-                                if is_first_comp:
-                                     num_magnitudes_expected = len(comp_mags_for_hash)
-                                     if num_magnitudes_expected == 0: valid_range_sum = False; break
-                                     summed_min_vals = [0.0] * num_magnitudes_expected
-                                     summed_max_vals = [0.0] * num_magnitudes_expected
-                                     is_first_comp = False
-                                elif len(comp_mags_for_hash) != num_magnitudes_expected:
-                                     valid_range_sum = False; break
-
-                                for i, mag in enumerate(comp_mags_for_hash):
-                                     try:
-                                          min_v, max_v = float(mag.get("min")), float(mag.get("max"))
-                                          if math.isnan(min_v) or math.isnan(max_v): raise ValueError("NaN")
-                                          summed_min_vals[i] += min_v; summed_max_vals[i] += max_v
-                                     except (ValueError, TypeError, AttributeError, KeyError, IndexError) as e_mag:
-                                          valid_range_sum = False; break
-                                if not valid_range_sum: break
-                            if not valid_range_sum or is_first_comp: status = "no_range"; continue
-
-                            range_found = True
-                            tier_str = f" ({'/'.join(sorted(list(set(component_tiers))))})" if component_tiers else ""
-
-                            found_match = None
-                            for text_idx, text_line in enumerate(text_list):
-                                 if text_idx in processed_text_indices[scope]: continue
-                                 temp_current_values = []
-                                 try:
-                                     adds_match_txt = adds_value_regex.search(text_line)
-                                     current_matches_txt = list(current_value_regex.finditer(text_line))
-                                     if adds_match_txt and len(current_matches_txt) >= 2 and num_magnitudes_expected == 2:
-                                          temp_current_values = [float(adds_match_txt.group(1)), float(adds_match_txt.group(2))]
-                                     elif len(current_matches_txt) == num_magnitudes_expected:
-                                          parsed_vals = []
-                                          for match in current_matches_txt:
-                                               start, end = match.span(1)
-                                               precedes = text_line[start-1:start] if start > 0 else " "
-                                               follows = text_line[end:end+1] if end < len(text_line) else " "
-                                               # Basic context check
-                                               if (precedes.isspace() or precedes in '+-') and (follows.isspace() or follows in '%'):
-                                                    parsed_vals.append(float(match.group(1)))
-                                          if len(parsed_vals) == num_magnitudes_expected: temp_current_values = parsed_vals
-                                          else: continue
-                                     else: continue
-                                 except (ValueError, IndexError): continue
-
-                                 values_in_summed_range = True
-                                 if len(temp_current_values) == num_magnitudes_expected:
-                                      for val_idx, current_val in enumerate(temp_current_values):
-                                           try:
-                                                min_bound = min(summed_min_vals[val_idx], summed_max_vals[val_idx]) - 1e-6
-                                                max_bound = max(summed_min_vals[val_idx], summed_max_vals[val_idx]) + 1e-6
-                                                if not (min_bound <= current_val <= max_bound): values_in_summed_range = False; break
-                                           except IndexError: values_in_summed_range = False; break
-                                 else: values_in_summed_range = False
-
-                                 if values_in_summed_range:
-                                     found_match = {"text": text_line, "values": temp_current_values, "index": text_idx}
-                                     break
-                            if found_match:
-                                 mod_text_display = found_match["text"]; current_values = found_match["values"]
-                                 processed_text_indices[scope].add(found_match["index"])
-                                 text_found = True; status = 'ok'
-                            else:
-                                 mod_text_display = component_details[0].get("name", f"Stat: {stat_hash}")
-                                 if mod_text_display == stat_hash and tier_str: mod_text_display += tier_str
-                                 status = 'no_text_match'
-
-                            chance_str = "N/A"; current_display = "?"; range_display = "[N/A]"; tag = "divine_unknown"
-                            if range_found:
-                                range_display = format_range_display(summed_min_vals, summed_max_vals)
-                                if text_found and current_values:
-                                     current_display = format_current_display(current_values)
-                                     calculation_valid = True
-                                     total_percentage_potential = 0.0; num_calc = len(current_values)
-                                     is_maxed = True; all_fixed = True
-                                     for idx in range(num_calc):
-                                          try:
-                                               current, min_v, max_v = current_values[idx], summed_min_vals[idx], summed_max_vals[idx]
-                                          except IndexError: calculation_valid = False; break
-                                          if not isinstance(current,(int,float)) or not isinstance(min_v,(int,float)) or not isinstance(max_v,(int,float)) or math.isnan(current) or math.isnan(min_v) or math.isnan(max_v):
-                                               calculation_valid = False; break
-                                          range_diff = max_v - min_v; tolerance = 1e-6
-                                          is_range_zero = abs(range_diff) < tolerance
-                                          if not is_range_zero:
-                                               all_fixed = False
-                                               if current < max_v - tolerance:
-                                                    percent_from_max = max(0, ((max_v - current) / range_diff)) * 100
-                                                    total_percentage_potential += percent_from_max
-                                                    is_maxed = False
-                                     if not calculation_valid:
-                                          chance_str, tag, status = "Erro Calc", "error", "calc_error"; potential_pct = None
-                                     elif is_maxed:
-                                          chance_str, tag = ("FIXO" if all_fixed else "MAX"), "divine_max"
-                                          potential_pct = 0 if not all_fixed else None # None for fixed, 0 for maxed non-fixed
-                                     else:
-                                          avg_potential_from_max = total_percentage_potential / num_calc if num_calc > 0 else 0
-                                          potential_pct = min(avg_potential_from_max, 100.0)
-                                          chance_str = f"{potential_pct:.1f}%"
-                                          if potential_pct >= 65: tag = "divine_good"
-                                          elif potential_pct >= 35: tag = "divine_medium"
-                                          else: tag = "divine_bad"
-                                else: # Range found, no text match
-                                     chance_str = "N/A"; tag = "divine_no_text"; status = 'no_text_match'; potential_pct = None; current_display = "?"
-                            else: # No range found
-                                chance_str, tag, status = "N/A", "divine_unknown", "no_range"; potential_pct = None; range_display = "[N/A]"; current_display = "?"
-
-                            analysis_results.append({
-                                'scope': scope, 'text': mod_text_display, 'current_str': current_display,
-                                'range_str': range_display, 'tier_str': tier_str,
-                                'potential_str': chance_str, 'potential_pct': potential_pct,
-                                'tag': tag, 'status': status, 'hash': stat_hash
-                            })
-                       except Exception as e_hash_proc:
-                            stat_hash_err = hash_entry[0] if isinstance(hash_entry, (list, tuple)) and len(hash_entry)>0 else "Desconhecido"
-                            print(f"Erro CRÍTICO processando hash {stat_hash_err}: {e_hash_proc}\n{traceback.format_exc()}")
-                            analysis_results.append({'scope': scope, 'text': f"Erro análise stat {stat_hash_err}", 'tag': 'error', 'status':'error_processing', 'hash': stat_hash_err})
-
-        # Add unprocessed text mods
-        for scope, text_list in all_scopes.items():
-             for idx, text in enumerate(text_list):
-                  if idx not in processed_text_indices[scope]:
-                      current_matches_txt = list(current_value_regex.finditer(text))
-                      adds_match_txt = adds_value_regex.search(text)
-                      numeric_values = []
-                      try:
-                          if adds_match_txt and len(current_matches_txt) >= 2: numeric_values = [float(adds_match_txt.group(1)), float(adds_match_txt.group(2))]
-                          elif current_matches_txt: numeric_values = [float(match.group(1)) for match in current_matches_txt]
-                      except ValueError: pass
-                      analysis_results.append({
-                           'scope': scope, 'text': text, 'current_str': format_current_display(numeric_values) if numeric_values else "?",
-                           'range_str': "[N/A]", 'tier_str': "", 'potential_str': "N/A", 'potential_pct': None,
-                           'tag': 'divine_unknown', 'status': 'unmatched_text', 'hash': None
-                      })
-
-        # Calculate Overall Worth & Sort
-        worth_divining = False; max_overall_chance = 0.0; valid_chances = []
-        for res in analysis_results:
-             potential = res.get('potential_pct')
-             if isinstance(potential, (int, float)) and res.get('status') == 'ok':
-                  valid_chances.append(potential)
-                  if potential > 0.1: worth_divining = True
-        if valid_chances: max_overall_chance = max(valid_chances)
-
-        def sort_key(res):
-            scope_order = 0 if res.get('scope') == 'implicit' else (1 if res.get('scope') == 'explicit' else 2)
-            status_prio = 0 if res.get('status') == 'ok' else (1 if res.get('status') == 'no_text_match' else (2 if res.get('status') == 'unmatched_text' else ( 3 if res.get('status') != 'error' else 4)))
-            potential = res.get('potential_pct', -1)
-            if potential is None: potential = -2
-            return (scope_order, status_prio, -potential) # Sort scope, status, then descending potential
-        analysis_results.sort(key=sort_key)
-
-        return worth_divining, max_overall_chance, analysis_results
-
-    def process_item(self, item_data, query_id, tab_id):
-        """Processa um item e o adiciona ao Treeview da aba correta."""
-        if tab_id not in self.search_tabs_data:
-             self.log_message(f"Erro: Tentando processar item para aba inexistente {tab_id}", "error", use_global_log=True)
-             return
-        tab_data = self.search_tabs_data[tab_id]
-        results_tree = tab_data.get('results_tree')
-        item_cache = tab_data.get('_item_details_cache')
-        divine_potential_min = 0
+        divine_potential_min = 0.0
         try:
             if tab_data['divine_potential_min'].get():
                 divine_potential_min = float(tab_data['divine_potential_min'].get())
         except (ValueError, TypeError):
-            divine_potential_min = 0
-            
-        if not results_tree or item_cache is None:
-            self.log_message(f"Erro: Treeview ou cache não encontrados para aba {tab_id} em process_item", "error", use_global_log=True)
+            divine_potential_min = 0.0
+
+        result = self.search_engine.run_cycle(
+            tab_data['search_session'], self.current_league.get(), payload, _TabHooks(self, tab_id),
+            stop_event=tab_data['stop_polling_flag'], incremental=incremental,
+            divine_potential_min=divine_potential_min, full_coverage=tab_data['full_coverage'].get(),
+            polling=tab_data.get('is_polling', False))
+        if result.query_id:
+            tab_data['query_id'] = result.query_id # GUARDA O ID DA BUSCA NA ABA
+
+    def _handle_auth_failure(self, tab_id, status_code, stage):
+        """Falha real de autenticação: para o monitoramento e avisa pela barra de status (sem diálogo)."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        self.log_message(f"Erro {status_code} de autenticação ({stage}). Atualize POESESSID/cf_clearance na aba 'Configuração'.", "error", tab_id=tab_id)
+        if tab_data.get('is_polling', False):
+             self.stop_polling(tab_id)
+        # Agendado depois do "Monitoramento parado" para que o aviso permaneça visível
+        auth_msg = f"[{tab_data['name']}] Erro {status_code}: autenticação recusada. Verifique os cookies."
+        self._run_on_ui(lambda: self.update_status(auth_msg), delay_ms=100)
+
+    def _remove_result_rows(self, tab_id, item_ids):
+        """Remove do cache e do Treeview da aba os itens que saíram do resultado."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        item_cache = tab_data['_item_details_cache']
+        for item_id in item_ids:
+            item_cache.pop(item_id, None)
+        self.price_index.remove(tab_id, item_ids)
+        self.ui_queue.post(EVENT_REMOVE_ROWS, tab_id, list(item_ids))
+
+    def _add_result_row(self, tab_id, item_details):
+        """Guarda o item (como ``ItemRecord`` compacto) no cache da aba e agenda a linha no Treeview."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        item_cache = tab_data.get('_item_details_cache')
+        if item_cache is None:
+            self.log_message(f"Erro: cache não encontrado para aba {tab_id}", "error", use_global_log=True)
             return
+        item_id = item_details["id"]
+        tree_values, row_tag = item_row(item_details)
+
+        # Linhas publicadas no mesmo quadro entram no Treeview num único lote
+        self.ui_queue.post(EVENT_ROW, tab_id, (item_id, tree_values, row_tag, item_details.get("sort_keys") or {}))
+        # Armazena detalhes no cache DA ABA (sem o JSON bruto expandido)
+        item_cache[item_id] = ItemRecord.from_details(item_details, self.raw_data_mode, self.item_store)
+        self.price_index.upsert(tab_id, item_id, item_details.get("price_amount"), item_details.get("price_currency"))
+
+    def _apply_exchange_rates(self):
+        """Refaz os preços normalizados e a ordem por preço de todas as abas depois de novas cotações."""
+        if not self.price_index.renormalize(): return
+        rates = self.exchange_rates
+        self.log_message(f"Cotações atualizadas ({len(rates.rates()) - 1} moedas em {rates.base}); preços renormalizados.", "info", use_global_log=True)
+        for tab_id, tab_data in self.search_tabs_data.items():
+            model = tab_data.get('results_model')
+            if model is None: continue
+            model.set_sort_keys("preco", {item_id: price_sort_key(price, amount, currency)
+                                          for item_id, (price, amount, currency) in self.price_index.tab_prices(tab_id).items()})
+            self._refresh_results_view(tab_id)
+
+    def show_cheapest_items(self):
+        """Mostra os itens mais baratos (na moeda base) entre todas as abas."""
+        base = self.exchange_rates.base
+        lines = []
+        for price, tab_id, item_id in self.price_index.cheapest(CHEAPEST_ITEMS_COUNT):
+            tab_data = self.search_tabs_data.get(tab_id)
+            item_details = tab_data['_item_details_cache'].get(item_id) if tab_data else None
+            if item_details is None: continue
+            lines.append(f"{price:,.2f} {base} - {item_details['name']} ({item_details['price']}) [{tab_data['name']}]")
+        if not lines:
+            messagebox.showinfo("Mais Baratos", "Nenhum item com cotação conhecida.\n"
+                                f"Configure a seção [Prices] (arquivo '{self.exchange_rates.path}' ou source = exchange).")
+            return
+        messagebox.showinfo("Mais Baratos", f"{len(lines)} mais baratos em {base} (todas as abas):\n\n" + "\n".join(lines))
 
-        try:
-            item_info = item_data.get("item", {})
-            listing_info = item_data.get("listing", {})
-            item_id = item_data.get("id", f"no_id_{time.time()}")
-
-            # Extrair informações básicas
-            item_name = item_info.get("name", "")
-            item_type = item_info.get("typeLine", "")
-            full_name = f"{item_name} {item_type}".strip()
-            if item_name and item_type and item_name in item_type: full_name = item_type
-            elif not item_name and item_type: full_name = item_type
-            elif item_name and not item_type: full_name = item_name
-            if not full_name: full_name = item_info.get("baseType", "Item Desconhecido")
-
-            # Informações de preço
-            price_info = listing_info.get("price", {})
-            price_text = "Sem preço"
-            price_amount = price_info.get("amount")
-            price_currency = price_info.get("currency", "")
-            price_amount_float = None
-            
-            if price_amount and price_currency:
-                try:
-                    price_amount_float = float(price_amount)
-                    price_num_str = f"{int(price_amount_float):,}" if price_amount_float == int(price_amount_float) else f"{price_amount_float:,.2f}".rstrip('0').rstrip('.')
-                    price_text = f"{price_num_str} {price_currency}"
-                except (ValueError, TypeError): 
-                    price_text = f"{price_amount} {price_currency}"
-
-            seller = listing_info.get("account", {}).get("name", "Desconhecido")
-            listing_date_str = listing_info.get("indexed", "")
-            listing_date_display, listing_timestamp = "N/A", None
-            if listing_date_str:
-                try:
-                    dt_obj = None
-                    fmts = ["%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S+00:00", "%Y-%m-%dT%H:%M:%S.%f+00:00"]
-                    for fmt in fmts:
-                        try:
-                            dt_obj = datetime.strptime(listing_date_str, fmt).replace(tzinfo=timezone.utc)
-                            break
-                        except ValueError: continue
-                    if dt_obj:
-                        listing_timestamp = dt_obj.astimezone(None) # Converte para local
-                        listing_date_display = listing_timestamp.strftime('%d/%m %H:%M')
-                    else:
-                        listing_date_display = listing_date_str.split('T')[0] if 'T' in listing_date_str else listing_date_str[:10]
-                except Exception as e_date:
-                    listing_date_display = "Data Inv."
-                    self.log_message(f"Erro ao parsear data '{listing_date_str}': {e_date}", "warning", tab_id=tab_id)
-
-            whisper = listing_info.get("whisper", "N/A")
-
-            # Calcula DPS e Divine Worth
-            dps_num, pdps_num, edps_num = self.calculate_dps(item_info)
-            worth_divining, max_chance, divine_analysis_results = self.analyze_divine_worth(item_data)
-            
-            # Estima o DPS potencial e o preço
-            min_dps, avg_dps, max_dps = self.estimate_potential_dps(item_data, divine_analysis_results)
-            estimated_price = None
-            if price_amount_float is not None and max_chance > 0:
-                estimated_price = self.estimate_price_after_divine(price_amount_float, max_chance, dps_num, max_dps)
-                
-            # Verifica filtro de potencial mínimo para divine
-            if divine_potential_min > 0 and (max_chance is None or max_chance < divine_potential_min):
-                return  # Pula o item se não atende ao critério mínimo de potencial
-                
-            # Monta valores para o Treeview
-            league_url_part = self.current_league.get().replace(" ", "%20")
-            item_link = f"https://www.pathofexile.com/trade/search/poe2/{league_url_part}/{query_id}/{item_id}"
-            dps_display = f"{dps_num:.1f}" if dps_num is not None else "-"
-            pdps_display = f"{pdps_num:.1f}" if pdps_num is not None else "-"
-            dps_pdps_str = f"{dps_display}"
-            if pdps_display != "-" and pdps_display != dps_display: dps_pdps_str += f" / {pdps_display}"
-            
-            # Adiciona informação de potencial de divine
-            divine_potential_str = "-"
-            if max_chance is not None:
-                divine_potential_str = f"{max_chance:.1f}%"
-                if estimated_price is not None:
-                    divine_potential_str += f" ({estimated_price})"
-            
-            tree_values = (full_name, price_text, dps_pdps_str, pdps_display, divine_potential_str, seller, listing_date_display, "Copiar")
-
-            # Define a tag da linha baseado no divine worth
-            row_tag = 'not_worth'
-            if worth_divining:
-                 if max_chance >= 65: row_tag = 'worth_good'
-                 elif max_chance >= 35: row_tag = 'worth_medium'
-                 else: row_tag = 'worth_bad'
-
-            # Função para atualizar o Treeview na thread principal
-            def _update_treeview():
-                try:
-                    if tab_id not in self.search_tabs_data: return
-                    current_tab_data = self.search_tabs_data[tab_id]
-                    current_tree = current_tab_data.get('results_tree')
-                    if not current_tree or not current_tree.winfo_exists(): return
-
-                    current_tree.tag_configure(row_tag)
-                    display_tag = row_tag
-
-                    if not current_tree.exists(item_id):
-                        current_tree.insert("", tk.END, iid=item_id, values=tree_values, tags=(display_tag,))
-                    else:
-                        current_tree.item(item_id, values=tree_values, tags=(display_tag,))
-                except tk.TclError as e_tcl:
-                     if "invalid command name" not in str(e_tcl): self.log_message(f"Erro Tcl Treeview: {e_tcl}", "warning", tab_id=tab_id)
-                except Exception as e_tree:
-                     self.log_message(f"Erro Treeview genérico: {e_tree}", "error", tab_id=tab_id)
-
-            if hasattr(self, 'root') and self.root.winfo_exists(): self.root.after(0, _update_treeview)
-
-            # Armazena detalhes no cache DA ABA
-            item_details = {
-                "id": item_id, "name": full_name, "price": price_text, "price_amount": price_amount_float,
-                "price_currency": price_currency, "seller": seller,
-                "listing_date": listing_date_display, "listing_timestamp": listing_timestamp,
-                "whisper": whisper, "link": item_link,
-                "properties": item_info.get("properties", []),
-                "mods": item_info.get("explicitMods", []),
-                "implicit_mods": item_info.get("implicitMods", []),
-                "item_level": item_info.get("ilvl", "?"),
-                "rarity": item_info.get("rarity", "normal").capitalize(),
-                "frameType": item_info.get("frameType", 0),
-                "dps": dps_num, "pdps": pdps_num, "edps": edps_num,
-                "min_dps": min_dps, "avg_dps": avg_dps, "max_dps": max_dps,
-                "estimated_price": estimated_price,
-                "worth_divining": worth_divining,
-                "max_divine_chance": max_chance,
-                "divine_analysis": divine_analysis_results,
-                "raw_data": item_data
-            }
-            item_cache[item_id] = item_details
-
-        except Exception as e_process:
-             item_id_err = item_data.get("id", "ID_DESCONHECIDO") if isinstance(item_data, dict) else "ID_DESCONHECIDO"
-             self.log_message(f"Erro crítico processando item {item_id_err}: {e_process}\n{traceback.format_exc()}", "error", tab_id=tab_id)
-
-    def sort_treeview(self, column, tab_id=None):
-         """Ordena o treeview da aba especificada ou da ativa."""
+    def sort_treeview(self, column, tab_id=None, toggle=True):
+         """Ordena o treeview da aba especificada ou da ativa.
+
+         ``toggle=False`` reaplica a ordenação atual sem inverter a direção.
+         """
          if not tab_id: tab_id = self.active_tab_id
          if not tab_id or tab_id not in self.search_tabs_data:
               return
@@ -1643,70 +1351,12 @@ IMPORTANTE:
          # Determina a direção da ordenação
          reverse = False
          if self.sort_column == column:
-              reverse = not self.sort_reverse
+              reverse = not self.sort_reverse if toggle else self.sort_reverse
 
-         # Pega os itens do treeview
+         # Ordena os arrays da lista virtual pelas chaves tipadas (poe2_analysis.item_sort_keys)
          try:
-             items = [(tree.set(k, column), k) for k in tree.get_children('')]
-         except Exception as e_get:
-             self.log_message(f"Erro ao obter itens do Treeview para ordenar: {e_get}", "error", tab_id=tab_id)
-             return
-
-         # Define a função de chave de ordenação
-         sort_key_func = None
-         if column == 'preco':
-             def price_sort_key(item_tuple):
-                 price_str = item_tuple[0]; parts = price_str.split(); amount = float('-inf'); currency = ""
-                 if len(parts) >= 1:
-                     currency = parts[-1].lower()
-                     num_str = ''.join(filter(lambda c: c.isdigit() or c in '.-', parts[0]))
-                     try: amount = float(num_str) if num_str else float('-inf')
-                     except ValueError: amount = float('-inf')
-                     if currency not in CURRENCIES: currency = ""
-                 currency_order = {c: i for i, c in enumerate(CURRENCIES)}
-                 order = currency_order.get(currency, 999)
-                 return (order, amount)
-             sort_key_func = price_sort_key
-         elif column == 'dps':
-             def dps_sort_key(item_tuple):
-                 dps_pdps_str = item_tuple[0]; parts = dps_pdps_str.split('/'); dps_str = parts[0].strip()
-                 try: return float(dps_str)
-                 except ValueError: return float('-inf')
-             sort_key_func = dps_sort_key
-         elif column == 'pdps':
-             def pdps_sort_key(item_tuple):
-                 pdps_str = item_tuple[0]
-                 try: return float(pdps_str)
-                 except ValueError: return float('-inf')
-             sort_key_func = pdps_sort_key
-         elif column == 'divine_potential':
-             def divine_sort_key(item_tuple):
-                 potential_str = item_tuple[0]
-                 try:
-                     # Tenta extrair a porcentagem
-                     if '%' in potential_str:
-                         percent_value = float(potential_str.split('%')[0])
-                         return percent_value
-                     return float('-inf')
-                 except (ValueError, IndexError):
-                     return float('-inf')
-             sort_key_func = divine_sort_key
-         elif column == 'data_listagem':
-             def date_sort_key(item_tuple):
-                 item_iid = item_tuple[1]; details = item_cache.get(item_iid)
-                 ts = details.get("listing_timestamp") if details else None
-                 if ts and isinstance(ts, datetime):
-                      try: return ts.astimezone(timezone.utc)
-                      except Exception: pass
-                 return datetime.min.replace(tzinfo=timezone.utc) if not reverse else datetime.max.replace(tzinfo=timezone.utc)
-             sort_key_func = date_sort_key
-         else: # Default (nome, vendedor)
-             def default_sort_key(item_tuple): return str(item_tuple[0]).lower()
-             sort_key_func = default_sort_key
-
-         # Ordena os itens
-         try:
-             items.sort(key=sort_key_func, reverse=reverse)
+             tab_data['results_model'].sort(column, reverse)
+             self._refresh_results_view(tab_id)
          except TypeError as e_sort_type:
              self.log_message(f"Erro de tipo ao ordenar '{column}': {e_sort_type}.", "error", tab_id=tab_id)
              return
@@ -1714,16 +1364,6 @@ IMPORTANTE:
              self.log_message(f"Erro inesperado ao ordenar '{column}': {e_sort}", "error", tab_id=tab_id)
              return
 
-         # Move itens no treeview DA ABA
-         try:
-             if not tree or not tree.winfo_exists(): return
-             for index, (val, k) in enumerate(items):
-                  tree.move(k, '', index)
-         except tk.TclError as e_move:
-             if "invalid command name" not in str(e_move): self.log_message(f"Erro Tcl ao mover item Treeview: {e_move}", "warning", tab_id=tab_id)
-         except Exception as e_move_gen:
-              self.log_message(f"Erro geral ao mover item Treeview: {e_move_gen}", "error", tab_id=tab_id)
-
          # Atualiza cabeçalhos no treeview DA ABA (indicador de ordenação)
          try:
              if not tree or not tree.winfo_exists(): return
@@ -1960,7 +1600,11 @@ IMPORTANTE:
                 details_widget.insert(tk.END, f"({rarity_str})", (rarity_tag, "title"))
                 details_widget.insert(tk.END, " ===\n", ("title",))
                 # Resto dos detalhes
-                details_widget.insert(tk.END, f"Preço: {item_details['price']}\n")
+                price_normalized = self.exchange_rates.normalize(item_details.get('price_amount'), item_details.get('price_currency'))
+                if price_normalized is not None and item_details.get('price_currency') != self.exchange_rates.base:
+                    details_widget.insert(tk.END, f"Preço: {item_details['price']} (≈ {price_normalized:,.1f} {self.exchange_rates.base})\n")
+                else:
+                    details_widget.insert(tk.END, f"Preço: {item_details['price']}\n")
                 details_widget.insert(tk.END, f"Vendedor: {item_details['seller']}\n")
                 details_widget.insert(tk.END, f"Listado: {item_details['listing_date']}\n")
                 details_widget.insert(tk.END, f"iLvl: {item_details['item_level']}\n")
@@ -2024,6 +1668,9 @@ IMPORTANTE:
          if tab_data.get('is_polling', False):
              self.log_message("Monitoramento já ativo para esta aba.", "info", tab_id=tab_id)
              return
+         if tab_data.get('is_searching', False):
+             self.log_message("Aguarde a busca manual terminar (ou clique em Parar) antes de monitorar.", "warning", tab_id=tab_id)
+             return
 
          # Valida intervalo
          interval = 5
@@ -2038,27 +1685,98 @@ IMPORTANTE:
              tab_data['polling_interval'].set("5"); interval = 5
 
          # Valida cookies globais
-         if not self.poesessid.get() or not self.cf_clearance.get():
+         if not self.trade_client.offline and (not self.poesessid.get() or not self.cf_clearance.get()):
               messagebox.showerror("Erro Autenticação", "Cookies POESESSID/cf_clearance não configurados.")
               return
 
          tab_data['is_polling'] = True
          tab_data['stop_polling_flag'].clear() # Reseta a flag DA ABA
+         self._set_tab_job_buttons(tab_id, running=True)
 
-         # Atualiza botões DA ABA
-         try:
-             start_btn = tab_data.get('start_polling_button')
-             stop_btn = tab_data.get('stop_polling_button')
-             if start_btn and start_btn.winfo_exists(): start_btn.config(state=tk.DISABLED)
-             if stop_btn and stop_btn.winfo_exists(): stop_btn.config(state=tk.NORMAL)
-         except tk.TclError: pass
-
-         self.log_message(f"Iniciando monitoramento a cada {interval}s.", "info", tab_id=tab_id)
+         priority_label = tab_data['polling_priority'].get()
+         self.log_message(f"Iniciando monitoramento a cada {interval}s (prioridade {priority_label}).", "info", tab_id=tab_id)
          self.update_status(f"[{tab_name}] Monitorando (Intervalo: {interval}s)...")
 
-         # Inicia a thread de polling DA ABA
-         tab_data['polling_thread'] = threading.Thread(target=self.polling_worker, args=(tab_id, interval,), daemon=True)
-         tab_data['polling_thread'].start()
+         # Registra a busca no agendador central (sem thread dedicada)
+         self.scheduler.add(tab_id, interval, lambda tid=tab_id: self.polling_cycle(tid),
+                            priority=PRIORITY_LABELS.get(priority_label, PRIORITY_NORMAL))
+
+    def _on_polling_priority_change(self, tab_id):
+         """Aplica a nova classe de prioridade se a aba já estiver sendo monitorada."""
+         tab_data = self.search_tabs_data.get(tab_id)
+         if not tab_data or not tab_data.get('is_polling', False) or not self.scheduler: return
+         priority = PRIORITY_LABELS.get(tab_data['polling_priority'].get(), PRIORITY_NORMAL)
+         self.scheduler.update(tab_id, priority=priority)
+
+    def start_manual_search(self, tab_id):
+         """Inicia uma busca única da aba numa thread de trabalho (não bloqueia a UI)."""
+         if tab_id not in self.search_tabs_data: return
+         tab_data = self.search_tabs_data[tab_id]
+         tab_name = tab_data['name']
+
+         if tab_data.get('is_polling', False) or tab_data.get('is_searching', False):
+             self.log_message("Já existe uma busca em andamento nesta aba.", "info", tab_id=tab_id)
+             return
+
+         if not self.trade_client.offline and (not self.poesessid.get() or not self.cf_clearance.get()):
+             messagebox.showerror("Erro de Autenticação", "POESESSID e/ou cf_clearance não configurados. Verifique a aba 'Configuração'.")
+             return
+
+         # O payload é montado aqui (thread do Tk), já que lê as variáveis da aba
+         payload = self.build_search_payload(tab_id)
+         if payload is None:
+             self.update_status(f"[{tab_name}] Pronto (Falha payload)")
+             return
+
+         tab_data['is_searching'] = True
+         self._set_tab_job_buttons(tab_id, running=True)
+         self.update_status(f"[{tab_name}] Buscando...")
+         self._start_tab_worker(tab_id, self.manual_search_worker, payload)
+
+    def manual_search_worker(self, tab_id, payload):
+        """Worker da busca manual: executa search_items e restaura os botões ao final."""
+        try:
+            self.search_items(tab_id, payload=payload)
+        except Exception as search_err:
+            self.log_message(f"Erro durante busca manual: {search_err}", "error", tab_id=tab_id)
+        finally:
+            def _finish():
+                tab_data = self.search_tabs_data.get(tab_id)
+                if not tab_data: return
+                tab_data['is_searching'] = False
+                if not tab_data.get('is_polling', False):
+                    self._set_tab_job_buttons(tab_id, running=False)
+            self._run_on_ui(_finish)
+
+    def _start_tab_worker(self, tab_id, target, *args):
+        """Inicia a thread de trabalho da aba (busca manual ou monitoramento)."""
+        tab_data = self.search_tabs_data[tab_id]
+        tab_data['stop_polling_flag'].clear() # Reseta a flag DA ABA
+        tab_data['worker_thread'] = threading.Thread(target=target, args=(tab_id,) + args, daemon=True)
+        tab_data['worker_thread'].start()
+
+    def stop_tab_job(self, tab_id=None):
+        """Botão Parar: interrompe a busca manual em andamento e/ou o monitoramento da aba."""
+        if not tab_id: tab_id = self.active_tab_id
+        if not tab_id or tab_id not in self.search_tabs_data: return
+        tab_data = self.search_tabs_data[tab_id]
+        if tab_data.get('is_polling', False):
+            self.stop_polling(tab_id)
+        elif tab_data.get('is_searching', False):
+            tab_data['stop_polling_flag'].set()
+            self.log_message("Sinal de parada enviado para a busca.", "info", tab_id=tab_id)
+            self.update_status(f"[{tab_data['name']}] Interrompendo busca...")
+
+    def _set_tab_job_buttons(self, tab_id, running):
+        """Habilita/desabilita os botões de ação da aba conforme há trabalho em andamento."""
+        tab_data = self.search_tabs_data.get(tab_id)
+        if not tab_data: return
+        try:
+            for key, enabled in (('search_button', not running), ('start_polling_button', not running),
+                                 ('stop_polling_button', running)):
+                button = tab_data.get(key)
+                if button and button.winfo_exists(): button.config(state=tk.NORMAL if enabled else tk.DISABLED)
+        except tk.TclError: pass
 
     def stop_polling(self, tab_id=None, join_thread=False):
         """Para o monitoramento da aba especificada ou ativa."""
@@ -2081,18 +1799,12 @@ IMPORTANTE:
         self.log_message("Sinal de parada enviado.", "info", tab_id=tab_id)
         self.update_status(f"[{tab_name}] Parando monitoramento...")
 
-        # Opcional: Aguardar a thread finalizar (útil ao remover aba)
-        thread_to_join = tab_data.get('polling_thread')
-        if join_thread and thread_to_join and thread_to_join.is_alive():
-            try:
-                thread_to_join.join(timeout=2.0) # Espera até 2s
-                if thread_to_join.is_alive():
-                    self.log_message("Aviso: Thread de polling da aba não finalizou no tempo.", "warning", tab_id=tab_id)
-            except Exception as e_join:
-                self.log_message(f"Erro ao aguardar thread da aba: {e_join}", "error", tab_id=tab_id)
-
-        # --- Atualiza botões e status via `after` para thread safety ---
-        # É importante verificar se a aba ainda existe no momento da execução do after()
+        # Remove do agendador; opcionalmente aguarda o ciclo em andamento (útil ao remover aba)
+        if self.scheduler and not self.scheduler.remove(tab_id, wait=join_thread, timeout=2.0):
+            self.log_message("Aviso: Ciclo de monitoramento da aba não finalizou no tempo.", "warning", tab_id=tab_id)
+
+        # --- Atualiza botões e status pela fila da interface (stop_polling também roda em workers) ---
+        # É importante verificar se a aba ainda existe no momento da execução
         def _update_ui_after_stop():
             if tab_id in self.search_tabs_data: # Verifica se aba ainda existe
                  current_tab_data = self.search_tabs_data[tab_id]
@@ -2100,68 +1812,37 @@ IMPORTANTE:
                  if self.active_tab_id == tab_id and not current_tab_data.get('is_polling', True): # Re-verifica is_polling
                       self.update_status(f"[{current_tab_data['name']}] Monitoramento parado.")
                  # Atualiza Botões da Aba
-                 try:
-                     start_btn = current_tab_data.get('start_polling_button')
-                     stop_btn = current_tab_data.get('stop_polling_button')
-                     if start_btn and start_btn.winfo_exists(): start_btn.config(state=tk.NORMAL)
-                     if stop_btn and stop_btn.winfo_exists(): stop_btn.config(state=tk.DISABLED)
-                 except tk.TclError: pass # Ignora erro se widget destruído
-                 except AttributeError: pass # Ignora erro se widget não encontrado
+                 self._set_tab_job_buttons(tab_id, running=False)
             # else: Aba foi removida, não faz nada na UI
 
-        if hasattr(self, 'root') and self.root.winfo_exists():
-            self.root.after(50, _update_ui_after_stop) # Delay pequeno
+        self._run_on_ui(_update_ui_after_stop, delay_ms=50) # Delay pequeno
 
-    def polling_worker(self, tab_id, interval):
-        """Worker da thread de polling para uma aba específica."""
-        # Verifica se a aba existe no início
+    def polling_cycle(self, tab_id):
+        """Um ciclo de monitoramento da aba, executado por um worker do agendador."""
         if tab_id not in self.search_tabs_data:
-             print(f"ERRO FATAL: polling_worker iniciado para tab_id inexistente {tab_id}")
+             self.scheduler.remove(tab_id)
              return
         tab_data = self.search_tabs_data[tab_id]
         tab_name = tab_data['name']
         stop_flag = tab_data['stop_polling_flag']
+        if stop_flag.is_set() or not tab_data.get('is_polling', False):
+             return
 
-        self.log_message("Thread de monitoramento iniciada.", "debug", tab_id=tab_id)
-
-        while not stop_flag.is_set():
-            # Re-verifica a existência da aba a cada iteração
-            if tab_id not in self.search_tabs_data:
-                 self.log_message(f"Aba {tab_name} removida, finalizando thread.", "info", use_global_log=True)
-                 break
-
-            self.update_status(f"[{tab_name}] Monitorando: Buscando...")
-            self.log_message("Iniciando busca.", "debug", tab_id=tab_id)
-            try:
-                 # Chama search_items para ESTA aba
-                 self.search_items(tab_id)
-            except Exception as search_err:
-                 self.log_message(f"Erro durante busca no polling: {search_err}", "error", tab_id=tab_id)
-                 if not stop_flag.is_set(): # Evita sleep se já pediu pra parar
-                      time.sleep(min(interval, 5)) # Pequeno delay em caso de erro
-
-            # Verifica parada logo após a busca
-            if stop_flag.is_set():
-                 self.log_message("Parada detectada após busca.", "debug", tab_id=tab_id)
-                 break
-
-            # Verifica novamente existência da aba antes de esperar
-            if tab_id not in self.search_tabs_data:
-                 self.log_message(f"Aba {tab_name} removida durante busca, finalizando thread.", "info", use_global_log=True)
-                 break
-
-            self.update_status(f"[{tab_name}] Monitorando: Aguardando {interval}s...")
-            self.log_message(f"Aguardando {interval}s...", "debug", tab_id=tab_id)
-
-            # Espera pelo intervalo ou pelo sinal de parada DA ABA
-            stopped_during_wait = stop_flag.wait(timeout=interval)
+        self.update_status(f"[{tab_name}] Monitorando: Buscando...")
+        self.log_message("Iniciando busca.", "debug", tab_id=tab_id)
+        try:
+             # Chama search_items para ESTA aba (modo delta: só busca IDs novos)
+             self.search_items(tab_id, incremental=tab_data['delta_polling'].get())
+        except Exception as search_err:
+             self.log_message(f"Erro durante busca no polling: {search_err}", "error", tab_id=tab_id)
 
-            if stopped_during_wait:
-                 self.log_message("Parada detectada durante espera.", "debug", tab_id=tab_id)
-                 break
+        if stop_flag.is_set() or tab_id not in self.search_tabs_data:
+             self.log_message("Parada detectada após busca.", "debug", tab_id=tab_id)
+             return
 
-        # --- Finalização da Thread ---
-        self.log_message("Thread de monitoramento finalizada.", "debug", tab_id=tab_id)
+        interval = tab_data['polling_interval'].get()
+        self.update_status(f"[{tab_name}] Monitorando: Aguardando ~{interval}s...")
+        self.log_message(f"Próximo ciclo em ~{interval}s.", "debug", tab_id=tab_id)
 
     def apply_theme(self):
         """Aplica o tema a todos os widgets, incluindo os das abas."""
@@ -2177,6 +1858,7 @@ IMPORTANTE:
         self.style.configure('TLabelframe.Label', background=colors["bg"], foreground=colors.get("labelframe_fg", colors["fg"]))
         self.style.configure('TButton', background=colors["button_bg"], foreground=colors["button_fg"], font=("Segoe UI", 9))
         self.style.map('TButton', background=[('active', colors["button_hover_bg"]), ('disabled', colors["button_bg"])]) # Handle disabled state
+        self.style.configure('TCheckbutton', background=colors["bg"], foreground=colors["fg"])
         self.style.configure('Toolbutton', background=colors["status_bg"], foreground=colors["fg"])
         self.style.map('Toolbutton', background=[('active', colors["widget_bg"])])
         self.style.configure('TEntry', fieldbackground=colors["widget_bg"], foreground=colors["widget_fg"], insertcolor=colors["fg"])
@@ -2259,9 +1941,14 @@ IMPORTANTE:
                    if tab_id in self.search_tabs_data and self.search_tabs_data[tab_id].get('is_polling', False):
                         self.log_message(f"Parando polling da aba '{self.search_tabs_data[tab_id]['name']}' para sair.", "info", tab_id=tab_id)
                         self.stop_polling(tab_id) # Envia sinal de parada
-                        thread = self.search_tabs_data[tab_id].get('polling_thread')
-                        if thread and thread.is_alive():
-                             threads_to_join.append((self.search_tabs_data[tab_id]['name'], thread))
+                   elif tab_id in self.search_tabs_data and self.search_tabs_data[tab_id].get('is_searching', False):
+                        self.search_tabs_data[tab_id]['stop_polling_flag'].set() # Interrompe busca manual
+                   thread = self.search_tabs_data[tab_id].get('worker_thread')
+                   if thread and thread.is_alive():
+                        threads_to_join.append((self.search_tabs_data[tab_id]['name'], thread))
+
+              # Encerra o agendador aguardando os ciclos em andamento
+              if self.scheduler: self.scheduler.shutdown(wait=True, timeout=2.0)
 
               # Espera um pouco pelas threads finalizarem
               if threads_to_join:
@@ -2280,13 +1967,17 @@ IMPORTANTE:
                   if still_alive:
                       self.log_message(f"Aviso: Threads das abas {', '.join(still_alive)} não finalizaram.", "warning", use_global_log=True)
 
-              # Salva config e destrói a janela
+              # Salva config, encerra o pool HTTP e destrói a janela
               self.save_config()
+              self.trade_client.close()
+              self.analysis_pool.shutdown(wait=False)
+              if self.item_store: self.item_store.close()
               self.root.destroy()
 
 
 # --- Bloco Principal de Execução ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Processos de análise no executável empacotado (Windows)
     try:
         root = tk.Tk()
         # --- Aplicação do Tema Base ttk ---
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Decodificação incremental das respostas de ``/fetch``.
+
+Em vez de baixar o corpo inteiro e chamar ``response.json()``, os elementos do
+array ``result`` são entregues um a um assim que o trecho correspondente chega
+pela rede, e cada item segue direto para a normalização/análise. Usa o
+``ijson`` (backend C ``yajl2_c``) quando instalado; sem ele, o scanner em C do
+módulo ``json`` (``JSONDecoder.raw_decode``) é aplicado sobre um buffer que
+cresce por blocos. Respostas já carregadas em memória (modo replay) são lidas
+do conteúdo pronto.
+"""
+import codecs
+import json
+from typing import Iterator
+
+try:
+    import ijson
+except ImportError:  # ijson é opcional
+    ijson = None
+
+STREAM_CHUNK_SIZE = 16 * 1024
+RESULT_KEY = "result"
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class _ChunkReader:
+    """Adapta ``iter_content`` à interface ``read()`` esperada pelo ijson."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0: return b""   # O ijson lê 0 bytes para detectar bytes/str
+        return next(self._chunks, b"")
+
+
+def _response_chunks(response, chunk_size: int) -> Iterator[bytes]:
+    # Respostas sem corpo pendente na rede (replay/gravação) já têm o conteúdo em memória
+    if getattr(response, "raw", None) is None:
+        content = response.content or b""
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+        return
+    for chunk in response.iter_content(chunk_size):
+        if chunk: yield chunk
+
+
+def _skip_whitespace(buffer: str, position: int) -> int:
+    while position < len(buffer) and buffer[position] in _WHITESPACE:
+        position += 1
+    return position
+
+
+def _followed_by_delimiter(buffer: str, position: int, finished: bool) -> bool:
+    """Confirma que o valor decodificado terminou (um número pode continuar no próximo bloco)."""
+    if position < len(buffer) and buffer[position] in ",]}": return True
+    if finished: raise ValueError("JSON inválido na resposta de /fetch")
+    return False
+
+
+def _iter_stdlib(chunks: Iterator[bytes]) -> Iterator[dict]:
+    """Lê ``{"result": [ ... ]}`` elemento a elemento com o scanner do módulo json."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, position, state = "", 0, "object"
+    finished = False
+    while True:
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += decoder.decode(b"", final=True); finished = True
+        else:
+            buffer += decoder.decode(chunk)
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position >= len(buffer): break
+            if state == "object":
+                if buffer[position] != "{": raise ValueError("Resposta de /fetch não é um objeto JSON")
+                position += 1; state = "key"
+            elif state == "key":
+                if buffer[position] == "}": return
+                try:
+                    key, end = _DECODER.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break
+                end = _skip_whitespace(buffer, end)
+                if end >= len(buffer): break
+                if buffer[end] != ":": raise ValueError("JSON inválido na resposta de /fetch")
+                if key == RESULT_KEY:
+                    position = end + 1; state = "array"
+                else:
+                    # Outra chave antes de "result": decodifica o valor inteiro e segue
+                    value_start = _skip_whitespace(buffer, end + 1)
+                    try:
+                        _, value_end = _DECODER.raw_decode(buffer, value_start)
+                    except json.JSONDecodeError:
+                        break
+                    value_end = _skip_whitespace(buffer, value_end)
+                    if not _followed_by_delimiter(buffer, value_end, finished): break
+                    position = value_end + 1 if buffer[value_end] == "," else value_end
+            elif state == "array":
+                if buffer[position] != "[": raise ValueError("Campo 'result' da resposta de /fetch não é uma lista")
+                position += 1; state = "item"
+            elif state == "item":
+                if buffer[position] == "]":
+                    return
+                if buffer[position] == ",":
+                    position += 1; continue
+                try:
+                    item, end = _DECODER.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break   # Item ainda incompleto: lê mais um bloco
+                end = _skip_whitespace(buffer, end)
+                if not _followed_by_delimiter(buffer, end, finished): break
+                yield item
+                position = end
+        # Descarta o que já foi consumido para o buffer não crescer com o corpo inteiro
+        buffer, position = buffer[position:], 0
+        if finished:
+            if state != "item" and not buffer.strip():
+                return   # Corpo sem "result" (ex.: objeto vazio)
+            raise ValueError("Resposta de /fetch truncada")
+
+
+def iter_fetch_results(response, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """Gera cada elemento de ``result`` de uma resposta de ``/fetch`` conforme é decodificado.
+
+    Levanta ``ValueError`` se o corpo não for JSON válido (itens anteriores ao
+    erro já terão sido entregues).
+    """
+    chunks = _response_chunks(response, chunk_size)
+    if ijson is not None:
+        try:
+            yield from ijson.items(_ChunkReader(chunks), f"{RESULT_KEY}.item", use_float=True)
+        except ijson.JSONError as e_json:
+            raise ValueError(f"JSON inválido na resposta de /fetch: {e_json}") from e_json
+        return
+    yield from _iter_stdlib(chunks)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""Normalização rápida dos campos de anúncio (data, preço, moeda e nome).
+
+Todo resultado do ``/fetch`` passa por aqui antes da análise. Em vez de tentar
+até quatro formatos de ``strptime`` na data de ``listing.indexed`` e montar o
+texto de preço e o nome completo a cada item, o anúncio é convertido numa
+única passada em campos tipados (``ListingFields``): data em epoch-ms (o
+formato usual é lido por fatias, com o dia e o fuso local em cache; uma regex
+cobre as outras variações da API e ``strptime`` só o que fugir dela), preço em
+float, código numérico da moeda e nome internado. Texto de preço e nome se
+repetem muito entre anúncios e ficam em caches pequenos.
+
+``python poe2_listing.py`` roda um micro-benchmark com itens sintéticos
+(``poe2_fake_trade``), comparando o custo da normalização com o da análise.
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional
+
+CURRENCIES = [
+    "divine", "exalted", "chaos", "alchemy", "annulment", "regal", "vaal",
+    "augmentation", "transmutation", "mirror", "gold"
+]
+CURRENCY_SORT_ORDER = {currency: index for index, currency in enumerate(CURRENCIES)}
+CURRENCY_UNKNOWN = 999   # Código de moedas fora de CURRENCIES
+LISTING_DATE_FORMATS = ["%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S+00:00", "%Y-%m-%dT%H:%M:%S.%f+00:00"]
+
+# Mesmos formatos de LISTING_DATE_FORMATS numa única regex
+LISTING_DATE_RE = re.compile(r"(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?(?:Z|\+00:00)")
+
+NO_PRICE_TEXT = "Sem preço"
+NO_DATE_TEXT = "N/A"
+UNKNOWN_SELLER = "Desconhecido"
+UNKNOWN_ITEM_NAME = "Item Desconhecido"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MS = timedelta(milliseconds=1)
+LOCAL_TZ_BLOCK_MS = 15 * 60 * 1000   # Fusos/horário de verão mudam em múltiplos de 15 min
+DATE_CACHE_SIZE = 4096               # Entradas de cada cache de datas (dias e fusos)
+
+_day_ms = {}
+_local_tz_by_block = {}
+
+
+class ListingFields:
+    """Campos tipados de um anúncio, prontos para o registro de detalhes."""
+    __slots__ = ("name", "price_amount", "price_currency", "currency_code", "price_text", "seller",
+                 "indexed_ms", "listed_at", "listing_date", "whisper")
+
+    def __init__(self, name, price_amount, price_currency, currency_code, price_text, seller,
+                 indexed_ms, listed_at, listing_date, whisper):
+        self.name = name
+        self.price_amount = price_amount          # float ou None
+        self.price_currency = price_currency      # Texto da API (internado)
+        self.currency_code = currency_code        # Índice em CURRENCIES ou CURRENCY_UNKNOWN
+        self.price_text = price_text
+        self.seller = seller
+        self.indexed_ms = indexed_ms              # Epoch em ms (UTC) ou None
+        self.listed_at = listed_at                # datetime local ou None
+        self.listing_date = listing_date          # Texto de exibição
+        self.whisper = whisper
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+@lru_cache(maxsize=8192)
+def full_item_name(item_name, item_type, base_type) -> str:
+    """Nome exibido (nome + base, sem repetir), internado."""
+    full_name = f"{item_name} {item_type}".strip()
+    if item_name and item_type and item_name in item_type: full_name = item_type
+    elif not item_name and item_type: full_name = item_type
+    elif item_name and not item_type: full_name = item_name
+    if not full_name: full_name = base_type
+    return _intern(full_name)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _price_fields(price_amount, price_currency):
+    """(valor float, texto) de um preço; valores/moedas se repetem muito entre anúncios."""
+    if not (price_amount and price_currency):
+        return None, NO_PRICE_TEXT
+    amount = None
+    try:
+        amount = float(price_amount)
+        price_num_str = f"{int(amount):,}" if amount == int(amount) else f"{amount:,.2f}".rstrip('0').rstrip('.')
+        return amount, sys.intern(f"{price_num_str} {price_currency}")
+    except (ValueError, TypeError):  # Texto não numérico (ou NaN, que mantém o valor)
+        return amount, f"{price_amount} {price_currency}"
+
+
+def price_fields(price_amount, price_currency):
+    try:
+        return _price_fields(price_amount, price_currency)
+    except TypeError:  # Valor não hasheável: sem cache
+        return _price_fields.__wrapped__(price_amount, price_currency)
+
+
+def parse_listing_date(indexed: str) -> Optional[datetime]:
+    """Data UTC de ``listing.indexed`` (None se nenhum formato conhecido servir)."""
+    match = LISTING_DATE_RE.fullmatch(indexed)
+    if match is not None:
+        year, month, day, hour, minute, second, fraction = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                            int(fraction.ljust(6, "0")) if fraction else 0, tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    # Variações que a regex não cobre (ex.: mês com um dígito)
+    for fmt in LISTING_DATE_FORMATS:
+        try:
+            return datetime.strptime(indexed, fmt).replace(tzinfo=timezone.utc)
+        except ValueError: continue
+    return None
+
+
+def _fast_epoch_ms(indexed: str) -> Optional[int]:
+    """Epoch-ms do formato usual da API (``AAAA-MM-DDTHH:MM:SSZ``) sem datetime por item; None se for outro."""
+    if len(indexed) != 20 or indexed[19] != "Z" or indexed[10] != "T" or indexed[13] != ":" or indexed[16] != ":":
+        return None
+    clock = indexed[11:13] + indexed[14:16] + indexed[17:19]
+    if not (clock.isascii() and clock.isdigit()): return None
+    hour, minute, second = int(clock[0:2]), int(clock[2:4]), int(clock[4:6])
+    if hour > 23 or minute > 59 or second > 59: return None
+    day = indexed[:10]
+    day_ms = _day_ms.get(day)
+    if day_ms is None:
+        midnight = parse_listing_date(day + "T00:00:00Z")
+        if midnight is None: return None
+        if len(_day_ms) >= DATE_CACHE_SIZE: _day_ms.clear()
+        day_ms = _day_ms[day] = (midnight - EPOCH) // ONE_MS
+    return day_ms + ((hour * 60 + minute) * 60 + second) * 1000
+
+
+def _local_tzinfo(epoch_ms: int):
+    """Fuso local (deslocamento fixo) vigente no instante, guardado por bloco de 15 minutos."""
+    block = epoch_ms // LOCAL_TZ_BLOCK_MS
+    tzinfo = _local_tz_by_block.get(block)
+    if tzinfo is None:
+        if len(_local_tz_by_block) >= DATE_CACHE_SIZE: _local_tz_by_block.clear()
+        utc_date = datetime.fromtimestamp(epoch_ms // 1000, timezone.utc)
+        tzinfo = _local_tz_by_block[block] = utc_date.astimezone(None).tzinfo
+    return tzinfo
+
+
+def listing_time(indexed: str) -> Optional[tuple]:
+    """(epoch-ms, datetime local) de ``listing.indexed``, ou None se a data não for reconhecida."""
+    epoch_ms = _fast_epoch_ms(indexed)
+    if epoch_ms is not None:
+        return epoch_ms, datetime.fromtimestamp(epoch_ms // 1000, _local_tzinfo(epoch_ms))
+    utc_date = parse_listing_date(indexed)
+    if utc_date is None: return None
+    epoch_ms = (utc_date - EPOCH) // ONE_MS
+    return epoch_ms, utc_date.astimezone(_local_tzinfo(epoch_ms))
+
+
+def _display_date(listed_at: datetime) -> str:
+    # Mesmo texto de strftime('%d/%m %H:%M'), sem o custo do strftime
+    return f"{listed_at.day:02d}/{listed_at.month:02d} {listed_at.hour:02d}:{listed_at.minute:02d}"
+
+
+def normalize_listing(item_data: dict, on_warning: Optional[Callable[[str], None]] = None) -> ListingFields:
+    """Converte ``listing`` e o nome de um resultado do ``/fetch`` em ``ListingFields``."""
+    item_info = item_data.get("item", {})
+    listing_info = item_data.get("listing", {})
+
+    name = full_item_name(item_info.get("name", ""), item_info.get("typeLine", ""),
+                          item_info.get("baseType", UNKNOWN_ITEM_NAME))
+
+    price_info = listing_info.get("price", {})
+    price_currency = price_info.get("currency", "")
+    price_amount, price_text = price_fields(price_info.get("amount"), price_currency)
+
+    indexed = listing_info.get("indexed", "")
+    indexed_ms, listed_at, listing_date = None, None, NO_DATE_TEXT
+    if indexed:
+        try:
+            parsed = listing_time(indexed)
+            if parsed is not None:
+                indexed_ms, listed_at = parsed
+                listing_date = _display_date(listed_at)
+            else:
+                listing_date = indexed.split('T')[0] if 'T' in indexed else indexed[:10]
+        except Exception as e_date:
+            indexed_ms, listed_at, listing_date = None, None, "Data Inv."
+            if on_warning: on_warning(f"Erro ao parsear data '{indexed}': {e_date}")
+
+    return ListingFields(name, price_amount, _intern(price_currency),
+                         CURRENCY_SORT_ORDER.get(price_currency, CURRENCY_UNKNOWN), price_text,
+                         _intern(listing_info.get("account", {}).get("name", UNKNOWN_SELLER)),
+                         indexed_ms, listed_at, listing_date, listing_info.get("whisper", "N/A"))
+
+
+def normalize_listings(item_datas: Iterable[dict],
+                       on_warning: Optional[Callable[[str], None]] = None) -> List[Optional[ListingFields]]:
+    """``normalize_listing`` de um lote (ex.: um ``/fetch``); itens malformados viram None."""
+    listings = []
+    for item_data in item_datas:
+        try:
+            listings.append(normalize_listing(item_data, on_warning))
+        except Exception:
+            listings.append(None)   # normalize_item refaz e registra o erro do item
+    return listings
+
+
+def _benchmark(item_count: int, repeat: int, seed: int):
+    import random
+    from poe2_analysis import analyze_item
+    from poe2_fake_trade import synthetic_item
+
+    rng = random.Random(seed)
+    now = time.time()
+    items = [synthetic_item(rng, index, now) for index in range(item_count)]
+    for item_data in items:   # Espalha as datas pela última semana, como num histórico real
+        listed = now - rng.uniform(0, 7 * 86400)
+        item_data["listing"]["indexed"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(listed))
+
+    def best_of(run):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - started)
+        return best * 1e6 / item_count   # µs por anúncio
+
+    single = best_of(lambda: [normalize_listing(item_data) for item_data in items])
+    batch = best_of(lambda: normalize_listings(items))
+    analysis = best_of(lambda: [analyze_item(item_data) for item_data in items])
+    print(f"{item_count} anúncios, melhor de {repeat}:")
+    print(f"  normalize_listing:  {single:8.2f} µs/anúncio")
+    print(f"  normalize_listings: {batch:8.2f} µs/anúncio")
+    print(f"  analyze_item:       {analysis:8.2f} µs/anúncio")
+    print(f"  normalização = {single / (single + analysis):.1%} do custo por item")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark da normalização de anúncios.")
+    parser.add_argument("--items", type=int, default=5000, help="Quantidade de anúncios sintéticos")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale a melhor)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    _benchmark(max(1, args.items), max(1, args.repeat), args.seed)
+
+
+if __name__ == "__main__":
+    main()
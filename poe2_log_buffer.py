@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Log das abas em memória limitada.
+
+Cada aba guarda as últimas linhas num buffer circular (``deque`` com tamanho
+máximo) em vez de acumular tudo no widget de texto durante o monitoramento.
+Um nível mínimo ajustável em tempo de execução descarta as mensagens abaixo
+dele antes mesmo de serem formatadas, e o widget mostra só o final do buffer.
+"""
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LOG_LEVEL_LABELS = ["debug", "info", "warning", "error"]
+DEFAULT_LOG_LEVEL = "info"
+DEFAULT_LOG_CAPACITY = 5000      # Linhas mantidas em memória por aba
+DEFAULT_VISIBLE_LINES = 500      # Linhas de log mantidas no widget da aba
+
+LogEntry = Tuple[str, str, str]  # (nível, horário, mensagem)
+
+
+def level_value(level: str) -> int:
+    """Valor numérico do nível (níveis desconhecidos contam como 'info')."""
+    return LOG_LEVELS.get(level, LOG_LEVELS["info"])
+
+
+class TabLogBuffer:
+    """Buffer circular thread-safe das linhas de log de uma aba."""
+
+    def __init__(self, capacity: int = DEFAULT_LOG_CAPACITY, level: str = DEFAULT_LOG_LEVEL):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=max(1, int(capacity)))
+        self.threshold = level_value(level)
+        self.dropped = 0   # Linhas descartadas por falta de espaço
+
+    @property
+    def level(self) -> str:
+        for name, value in LOG_LEVELS.items():
+            if value == self.threshold: return name
+        return DEFAULT_LOG_LEVEL
+
+    def set_level(self, level: str):
+        self.threshold = level_value(level)
+
+    def resize(self, capacity: int):
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=max(1, int(capacity)))
+
+    def enabled(self, level: str) -> bool:
+        return level_value(level) >= self.threshold
+
+    def append(self, entry: LogEntry):
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen: self.dropped += 1
+            self._entries.append(entry)
+
+    def tail(self, count: int, min_level: Optional[str] = None) -> List[LogEntry]:
+        """Últimas ``count`` linhas (opcionalmente só a partir de ``min_level``)."""
+        with self._lock:
+            entries = list(self._entries)
+        if min_level is not None:
+            threshold = level_value(min_level)
+            entries = [entry for entry in entries if level_value(entry[0]) >= threshold]
+        return entries[-count:] if count > 0 else []
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""Cotações entre moedas e índice de preços normalizados entre abas.
+
+Os anúncios trazem preço em moedas diferentes (``price_amount`` +
+``price_currency``) e a ordenação por preço só agrupava por moeda, então
+2 divine e 300 exalted nunca eram comparados. ``ExchangeRates`` guarda quanto
+vale cada moeda numa moeda base (padrão: exalted), com validade (TTL); a
+tabela vem de um arquivo JSON local ou do endpoint ``/exchange`` da trade2
+(mediana das melhores ofertas de cada moeda), e a consulta ao endpoint é
+gravada no mesmo arquivo para a próxima execução.
+
+``PriceIndex`` mantém o preço normalizado de todos os itens exibidos, de todas
+as abas, numa lista ordenada (``bisect``), para consultas por faixa de preço e
+dos N mais baratos sem percorrer as abas.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from statistics import median
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from poe2_listing import CURRENCIES, CURRENCY_SORT_ORDER, CURRENCY_UNKNOWN
+
+DEFAULT_BASE_CURRENCY = "exalted"
+DEFAULT_RATES_FILE = "poe2_exchange_rates.json"
+DEFAULT_RATES_TTL = 3600.0        # Segundos até a tabela ser considerada vencida
+EXCHANGE_SAMPLE_OFFERS = 10       # Ofertas (as mais baratas) usadas na mediana de cada moeda
+
+# Origem da tabela de cotações
+SOURCE_FILE = "file"              # Só o arquivo local (editado à mão ou por outra ferramenta)
+SOURCE_EXCHANGE = "exchange"      # Endpoint /exchange da trade2 (com o arquivo como cache)
+SOURCE_NONE = "none"              # Sem normalização
+RATE_SOURCES = (SOURCE_FILE, SOURCE_EXCHANGE, SOURCE_NONE)
+
+_NO_PRICE = float('-inf')
+
+
+def exchange_payload(have: str, want: str) -> dict:
+    """Consulta do /exchange: vendedores que entregam ``want`` em troca de ``have``."""
+    return {"query": {"status": {"option": "online"}, "have": [have], "want": [want]},
+            "sort": {"have": "asc"}, "engine": "new"}
+
+
+def rate_from_exchange(exchange_data: dict, currency: str, base: str,
+                       sample: int = EXCHANGE_SAMPLE_OFFERS) -> Optional[float]:
+    """Valor de 1 ``currency`` em ``base`` (mediana das ofertas mais baratas), ou None sem ofertas."""
+    ratios = []
+    for listing_entry in (exchange_data.get("result") or {}).values():
+        for offer in ((listing_entry or {}).get("listing") or {}).get("offers") or []:
+            paid, received = offer.get("exchange") or {}, offer.get("item") or {}
+            if paid.get("currency") != base or received.get("currency") != currency: continue
+            try:
+                paid_amount, received_amount = float(paid.get("amount")), float(received.get("amount"))
+            except (TypeError, ValueError):
+                continue
+            if paid_amount > 0 and received_amount > 0:
+                ratios.append(paid_amount / received_amount)
+    if not ratios: return None
+    return median(sorted(ratios)[:max(1, sample)])
+
+
+def price_sort_key(price_normalized: Optional[float], price_amount, price_currency):
+    """Chave da coluna de preço: preços convertidos pelo valor na moeda base, depois os sem cotação por moeda/valor."""
+    if price_normalized is not None:
+        return (0, price_normalized)
+    return (1, CURRENCY_SORT_ORDER.get(price_currency, CURRENCY_UNKNOWN),
+            price_amount if price_amount is not None else _NO_PRICE)
+
+
+class ExchangeRates:
+    """Tabela de cotações (moeda -> valor na moeda base) com validade, thread-safe."""
+
+    def __init__(self, base: str = DEFAULT_BASE_CURRENCY, source: str = SOURCE_FILE,
+                 path: str = DEFAULT_RATES_FILE, ttl: float = DEFAULT_RATES_TTL):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.base = base
+        self.source = source if source in RATE_SOURCES else SOURCE_FILE
+        self.path = path
+        self.ttl = max(0.0, float(ttl))
+        self._rates: Dict[str, float] = {}
+        self.updated_at = 0.0          # Horário (epoch) em que as cotações foram obtidas
+        self.version = 0               # Muda a cada tabela nova (preços normalizados precisam ser refeitos)
+
+    def configure(self, base: Optional[str] = None, source: Optional[str] = None,
+                  path: Optional[str] = None, ttl: Optional[float] = None):
+        with self._lock:
+            if source is not None: self.source = source if source in RATE_SOURCES else SOURCE_FILE
+            if path is not None: self.path = path
+            if ttl is not None: self.ttl = max(0.0, float(ttl))
+            if base is not None and base != self.base:
+                self.base = base
+                self._rates, self.updated_at = {}, 0.0
+                self.version += 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.source != SOURCE_NONE
+
+    @property
+    def stale(self) -> bool:
+        return not self._rates or time.time() - self.updated_at >= self.ttl
+
+    def rates(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._rates)
+
+    def rate(self, currency: str) -> Optional[float]:
+        if currency == self.base: return 1.0
+        return self._rates.get(currency)
+
+    def normalize(self, amount, currency: str) -> Optional[float]:
+        """Preço convertido para a moeda base (None sem valor ou sem cotação da moeda)."""
+        if amount is None or not self.enabled: return None
+        rate = self.rate(currency)
+        if rate is None: return None
+        try:
+            return float(amount) * rate
+        except (TypeError, ValueError):
+            return None
+
+    def set_rates(self, rates: Dict[str, float], updated_at: Optional[float] = None):
+        """Substitui a tabela (valores na moeda base; a própria base vale 1)."""
+        clean = {}
+        for currency, value in (rates or {}).items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if value > 0: clean[str(currency)] = value
+        with self._lock:
+            clean[self.base] = 1.0
+            self._rates = clean
+            self.updated_at = time.time() if updated_at is None else float(updated_at)
+            self.version += 1
+
+    def load_file(self) -> bool:
+        """Lê ``{"base": ..., "updated": epoch, "rates": {moeda: valor}}``; False se ausente/inválido/outra base."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as rates_file:
+                data = json.load(rates_file)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or not isinstance(data.get("rates"), dict): return False
+        if data.get("base", self.base) != self.base: return False
+        try:
+            updated_at = float(data.get("updated") or os.path.getmtime(self.path))
+        except (TypeError, ValueError, OSError):
+            updated_at = time.time()
+        if updated_at <= self.updated_at and self._rates: return False   # Nada mais novo que a tabela atual
+        self.set_rates(data["rates"], updated_at)
+        return True
+
+    def save_file(self):
+        with self._lock:
+            data = {"base": self.base, "updated": round(self.updated_at, 3), "rates": dict(self._rates)}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as rates_file:
+            json.dump(data, rates_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def refresh_from_exchange(self, client, league: str, currencies: Optional[Iterable[str]] = None,
+                              stop_event: Optional[threading.Event] = None,
+                              on_wait: Optional[Callable[[float], None]] = None) -> int:
+        """Consulta o /exchange para cada moeda; retorna quantas cotações foram obtidas.
+
+        Moedas sem oferta mantêm a cotação anterior. Erros de rede e
+        ``CircuitOpenError`` são repassados ao chamador.
+        """
+        currencies = [c for c in (currencies or CURRENCIES) if c != self.base]
+        fresh = {}
+        for currency in currencies:
+            if stop_event is not None and stop_event.is_set(): break
+            response = client.exchange(league, exchange_payload(self.base, currency), stop_event=stop_event, on_wait=on_wait)
+            if response is None: break   # Interrompido aguardando o rate limit
+            if response.status_code != 200: continue
+            try:
+                rate = rate_from_exchange(response.json(), currency, self.base)
+            except ValueError:
+                continue
+            if rate is not None: fresh[currency] = rate
+        if fresh:
+            merged = self.rates()
+            merged.update(fresh)
+            self.set_rates(merged)
+        return len(fresh)
+
+    def refresh_if_stale(self, client=None, league: Optional[str] = None,
+                         stop_event: Optional[threading.Event] = None,
+                         on_wait: Optional[Callable[[float], None]] = None,
+                         log: Optional[Callable[[str, str], None]] = None) -> bool:
+        """Atualiza a tabela vencida pela origem configurada; True se ela mudou.
+
+        Só uma thread atualiza por vez; as outras seguem com a tabela atual.
+        """
+        if not self.enabled or not self.stale: return False
+        if not self._refresh_lock.acquire(blocking=False): return False
+        try:
+            version = self.version
+            # O arquivo é a origem (file) ou o cache da última consulta ao /exchange
+            if self.load_file() and log:
+                log(f"Cotações carregadas de '{self.path}' ({len(self._rates) - 1} moedas em {self.base}).", "info")
+            if self.source == SOURCE_EXCHANGE and self.stale and client is not None and league:
+                try:
+                    count = self.refresh_from_exchange(client, league, stop_event=stop_event, on_wait=on_wait)
+                except Exception as e_exchange:
+                    if log: log(f"Falha ao consultar cotações no /exchange: {e_exchange}. Mantendo a tabela atual.", "warning")
+                    count = 0
+                if count:
+                    if log: log(f"Cotações atualizadas pelo /exchange: {count} moedas em {self.base}.", "info")
+                    try:
+                        self.save_file()
+                    except OSError as e_save:
+                        if log: log(f"Não foi possível gravar '{self.path}': {e_save}", "warning")
+            return self.version != version
+        finally:
+            self._refresh_lock.release()
+
+
+class _MaxKey:
+    """Sentinela maior que qualquer aba/id (limite superior de ``bisect_right``)."""
+
+    def __lt__(self, other): return False
+
+    def __gt__(self, other): return True
+
+    def __eq__(self, other): return isinstance(other, _MaxKey)
+
+    __hash__ = object.__hash__
+
+
+_MAX_KEY = _MaxKey()
+
+
+class PriceIndex:
+    """Preços normalizados dos itens exibidos em todas as abas, em ordem crescente.
+
+    Os itens são identificados por ``(aba, id)``. Itens sem cotação ficam
+    guardados (para entrar no índice quando a tabela mudar), mas fora da lista
+    ordenada.
+    """
+
+    def __init__(self, rates: ExchangeRates):
+        self.rates = rates
+        self._lock = threading.Lock()
+        self._entries: List[Tuple[float, Hashable, Hashable]] = []   # (preço base, aba, id)
+        self._items: Dict[Tuple[Hashable, Hashable], tuple] = {}     # (aba, id) -> (preço base, valor, moeda)
+        self.rates_version = rates.version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key):
+        previous = self._items.pop(key, None)
+        if previous is None or previous[0] is None: return
+        entry = (previous[0], key[0], key[1])
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def upsert(self, tab_id: Hashable, item_id: Hashable, amount, currency: str) -> Optional[float]:
+        """Indexa (ou atualiza) um item; retorna o preço normalizado (None sem cotação)."""
+        normalized = self.rates.normalize(amount, currency)
+        key = (tab_id, item_id)
+        with self._lock:
+            self._discard(key)
+            self._items[key] = (normalized, amount, currency)
+            if normalized is not None: insort(self._entries, (normalized, tab_id, item_id))
+        return normalized
+
+    def remove(self, tab_id: Hashable, item_ids: Iterable[Hashable]):
+        with self._lock:
+            for item_id in item_ids:
+                self._discard((tab_id, item_id))
+
+    def clear_tab(self, tab_id: Hashable):
+        with self._lock:
+            self._items = {key: value for key, value in self._items.items() if key[0] != tab_id}
+            self._entries = [entry for entry in self._entries if entry[1] != tab_id]
+
+    def renormalize(self) -> bool:
+        """Refaz os preços com a tabela atual (se ela mudou desde a última vez); True se refez."""
+        with self._lock:
+            if self.rates_version == self.rates.version: return False
+            self.rates_version = self.rates.version
+            normalize = self.rates.normalize
+            self._items = {key: (normalize(amount, currency), amount, currency)
+                           for key, (_, amount, currency) in self._items.items()}
+            self._entries = sorted((price, key[0], key[1]) for key, (price, _, _) in self._items.items()
+                                   if price is not None)
+        return True
+
+    def price(self, tab_id: Hashable, item_id: Hashable) -> Optional[float]:
+        entry = self._items.get((tab_id, item_id))
+        return entry[0] if entry else None
+
+    def tab_prices(self, tab_id: Hashable) -> Dict[Hashable, tuple]:
+        """``{id: (preço base, valor, moeda)}`` dos itens de uma aba."""
+        with self._lock:
+            return {key[1]: value for key, value in self._items.items() if key[0] == tab_id}
+
+    def in_range(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                 tab_ids: Optional[Iterable[Hashable]] = None) -> List[Tuple[float, Hashable, Hashable]]:
+        """``(preço base, aba, id)`` com preço entre os limites (inclusivos), do mais barato ao mais caro."""
+        tabs = set(tab_ids) if tab_ids is not None else None
+        with self._lock:
+            start = 0 if min_price is None else bisect_left(self._entries, (min_price,))
+            end = len(self._entries) if max_price is None else bisect_right(self._entries, (max_price, _MAX_KEY))
+            selected = self._entries[start:end]
+        return selected if tabs is None else [entry for entry in selected if entry[1] in tabs]
+
+    def cheapest(self, count: int, tab_ids: Optional[Iterable[Hashable]] = None) -> List[Tuple[float, Hashable, Hashable]]:
+        """Os ``count`` itens mais baratos (na moeda base), opcionalmente só de algumas abas."""
+        tabs = set(tab_ids) if tab_ids is not None else None
+        with self._lock:
+            if tabs is None: return self._entries[:max(0, count)]
+            found = []
+            for entry in self._entries:
+                if len(found) >= count: break
+                if entry[1] in tabs: found.append(entry)
+            return found
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Controle global de rate limit para a API de trade2 do Path of Exile.
+
+A GGG informa as regras de limite em cada resposta através dos headers
+``X-Rate-Limit-*``. Este módulo interpreta esses headers e mantém, para cada
+janela de cada regra, um balde de tokens compartilhado por todas as abas (e
+pelo ``api_server.py``), de modo que toda requisição de ``/search``,
+``/fetch`` e ``/exchange`` passe pelo mesmo controle.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Políticas conhecidas (cada endpoint possui a sua própria no servidor)
+POLICY_SEARCH = "search"
+POLICY_FETCH = "fetch"
+POLICY_EXCHANGE = "exchange"
+
+# Regras usadas antes da primeira resposta do servidor (conservadoras).
+# Formato igual ao header: "max_hits:periodo_s:penalidade_s" separados por vírgula.
+DEFAULT_RULES = {
+    POLICY_SEARCH: {"Ip": "5:10:60,15:60:300,30:300:1800"},
+    POLICY_FETCH: {"Ip": "12:4:10,16:12:300"},
+    POLICY_EXCHANGE: {"Ip": "7:15:60,15:90:120,45:300:1800"},
+}
+
+# Folga (s) adicionada ao período para compensar diferença de relógio/latência
+PERIOD_PADDING = 0.25
+
+
+def parse_rule_windows(header_value: str) -> List[Tuple[int, float, float]]:
+    """Converte '8:10:60,15:60:120' em [(8, 10.0, 60.0), (15, 60.0, 120.0)]."""
+    windows = []
+    for part in (header_value or "").split(","):
+        fields = part.strip().split(":")
+        if len(fields) != 3: continue
+        try:
+            windows.append((int(fields[0]), float(fields[1]), float(fields[2])))
+        except ValueError:
+            continue
+    return windows
+
+
+def parse_rate_limit_headers(headers) -> Dict[str, Dict[str, List[Tuple[int, float, float]]]]:
+    """Extrai regras e estados dos headers X-Rate-Limit-* de uma resposta.
+
+    Retorna ``{"rules": {nome: janelas}, "state": {nome: janelas}}``. No estado
+    cada janela é (hits_atuais, periodo, penalidade_ativa).
+    """
+    parsed = {"rules": {}, "state": {}}
+    if not headers: return parsed
+    rule_names = headers.get("X-Rate-Limit-Rules", "")
+    for rule_name in [r.strip() for r in rule_names.split(",") if r.strip()]:
+        rules = parse_rule_windows(headers.get(f"X-Rate-Limit-{rule_name}", ""))
+        state = parse_rule_windows(headers.get(f"X-Rate-Limit-{rule_name}-State", ""))
+        if rules: parsed["rules"][rule_name] = rules
+        if state: parsed["state"][rule_name] = state
+    return parsed
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Retorna o valor de Retry-After em segundos (ou None)."""
+    if not headers: return None
+    value = headers.get("Retry-After")
+    if value is None: return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RuleBucket:
+    """Balde de tokens de uma janela de regra (ex.: 8 hits em 10s).
+
+    Cada token consumido só volta ao balde quando sai da janela, o que
+    reproduz a contagem em janela deslizante feita pelo servidor.
+    """
+
+    def __init__(self, max_hits: int, period: float, penalty: float = 0.0):
+        self.max_hits = max(1, int(max_hits))
+        self.period = float(period)
+        self.penalty = float(penalty)
+        self._hits = deque()
+
+    def _expire(self, now: float):
+        window = self.period + PERIOD_PADDING
+        while self._hits and now - self._hits[0] >= window:
+            self._hits.popleft()
+
+    def available(self, now: float) -> int:
+        self._expire(now)
+        return self.max_hits - len(self._hits)
+
+    def time_until_available(self, now: float) -> float:
+        self._expire(now)
+        if len(self._hits) < self.max_hits: return 0.0
+        # Precisa esperar o token mais antigo (entre os excedentes) sair da janela
+        oldest_needed = self._hits[len(self._hits) - self.max_hits]
+        return max(0.0, oldest_needed + self.period + PERIOD_PADDING - now)
+
+    def consume(self, now: float):
+        self._hits.append(now)
+
+    def sync(self, current_hits: int, now: float):
+        """Ajusta a contagem local ao estado informado pelo servidor (nunca reduz)."""
+        self._expire(now)
+        missing = min(int(current_hits), self.max_hits + 1) - len(self._hits)
+        for _ in range(max(0, missing)):
+            self._hits.append(now)
+
+
+class RatePolicy:
+    """Conjunto de baldes (todas as regras/janelas) de um endpoint."""
+
+    def __init__(self, name: str, rules: Dict[str, List[Tuple[int, float, float]]]):
+        self.name = name
+        self.buckets: Dict[Tuple[str, float], RuleBucket] = {}
+        self.blocked_until = 0.0
+        self.set_rules(rules)
+
+    def set_rules(self, rules: Dict[str, List[Tuple[int, float, float]]]):
+        new_buckets = {}
+        for rule_name, windows in rules.items():
+            for max_hits, period, penalty in windows:
+                key = (rule_name, period)
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = RuleBucket(max_hits, period, penalty)
+                else:
+                    bucket.max_hits = max(1, int(max_hits)); bucket.penalty = penalty
+                new_buckets[key] = bucket
+        if new_buckets:
+            self.buckets = new_buckets
+
+    def time_until_available(self, now: float) -> float:
+        wait = max(0.0, self.blocked_until - now)
+        for bucket in self.buckets.values():
+            wait = max(wait, bucket.time_until_available(now))
+        return wait
+
+    def consume(self, now: float):
+        for bucket in self.buckets.values():
+            bucket.consume(now)
+
+
+class RateLimiter:
+    """Governador de taxa compartilhado pelo processo inteiro.
+
+    ``acquire()`` bloqueia até que todas as janelas da política permitam uma
+    nova requisição; ``update_from_response()`` realimenta regras, estados e
+    Retry-After a partir dos headers recebidos.
+    """
+
+    def __init__(self, default_rules: Optional[Dict[str, Dict[str, str]]] = None):
+        self._cond = threading.Condition()
+        self._policies: Dict[str, RatePolicy] = {}
+        for policy_name, rules in (default_rules or DEFAULT_RULES).items():
+            parsed = {rule: parse_rule_windows(value) for rule, value in rules.items()}
+            self._policies[policy_name] = RatePolicy(policy_name, parsed)
+
+    def _policy(self, name: str) -> RatePolicy:
+        policy = self._policies.get(name)
+        if policy is None:
+            policy = RatePolicy(name, {})
+            self._policies[name] = policy
+        return policy
+
+    def estimated_wait(self, policy_name: str) -> float:
+        """Tempo (s) que uma chamada a acquire() esperaria agora."""
+        with self._cond:
+            return self._policy(policy_name).time_until_available(time.monotonic())
+
+    def acquire(self, policy_name: str, stop_event: Optional[threading.Event] = None,
+                timeout: Optional[float] = None) -> bool:
+        """Reserva um hit na política. Retorna False se interrompido/expirado."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            policy = self._policy(policy_name)
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                now = time.monotonic()
+                wait = policy.time_until_available(now)
+                if wait <= 0:
+                    policy.consume(now)
+                    return True
+                if deadline is not None:
+                    if now >= deadline: return False
+                    wait = min(wait, deadline - now)
+                # Acorda periodicamente para checar o stop_event
+                self._cond.wait(timeout=min(wait, 0.5))
+
+    def update_from_response(self, policy_name: str, headers, status_code: Optional[int] = None):
+        """Atualiza regras/estado da política com os headers de uma resposta."""
+        parsed = parse_rate_limit_headers(headers)
+        retry_after = parse_retry_after(headers)
+        with self._cond:
+            policy = self._policy(policy_name)
+            now = time.monotonic()
+            if parsed["rules"]:
+                policy.set_rules(parsed["rules"])
+            for rule_name, windows in parsed["state"].items():
+                for current_hits, period, active_penalty in windows:
+                    bucket = policy.buckets.get((rule_name, period))
+                    if bucket is not None:
+                        bucket.sync(current_hits, now)
+                    if active_penalty > 0:
+                        policy.blocked_until = max(policy.blocked_until, now + active_penalty)
+            if retry_after is not None:
+                policy.blocked_until = max(policy.blocked_until, now + retry_after)
+            elif status_code == 429:
+                # 429 sem Retry-After: usa a maior penalidade conhecida
+                penalties = [b.penalty for b in policy.buckets.values()] or [60.0]
+                policy.blocked_until = max(policy.blocked_until, now + max(penalties))
+            self._cond.notify_all()
+
+
+# Instância única usada por todo o processo
+RATE_LIMITER = RateLimiter()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Gravação e reprodução de respostas da API de trade2.
+
+``RecordingAdapter`` é um transporte do ``requests`` que repassa as chamadas
+ao servidor real e grava cada par requisição/resposta (com headers e tempo de
+resposta) num corpus compacto em disco (JSON lines + gzip). ``ReplayAdapter``
+responde a partir desse corpus sem rede nem cookies, com o tempo original de
+cada resposta ou o mais rápido possível, permitindo medir vazão e latência do
+tracker e do ``api_server.py`` com payloads reais e de forma reproduzível.
+
+Uso em linha de comando para resumir um corpus::
+
+    python poe2_replay.py trade2_corpus.jsonl.gz
+"""
+import gzip
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CORPUS_FILE = 'trade2_corpus.jsonl.gz'
+
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+TIMING_ORIGINAL = "original"
+TIMING_FAST = "fast"
+
+# Headers da requisição que nunca vão para o corpus
+_PRIVATE_HEADERS = {"cookie", "authorization"}
+
+_SAVED_RATE_LIMITER_ATTR = "_live_rate_limiter"   # Rate limiter guardado no cliente durante o replay rápido
+
+
+def request_key(method: str, url: str, body) -> str:
+    """Chave de correspondência: método + caminho/query + corpo JSON canônico."""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    if isinstance(body, bytes): body = body.decode("utf-8", "replace")
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    return f"{method.upper()} {path} {body or ''}".rstrip()
+
+
+def _endpoint_of(url: str) -> str:
+    path = urlsplit(url).path
+    for endpoint in ("search", "fetch", "exchange"):
+        if f"/{endpoint}/" in path or path.endswith(f"/{endpoint}"): return endpoint
+    return "other"
+
+
+def load_corpus(path: str) -> List[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    entries = []
+    with opener(path, "rt", encoding="utf-8") as corpus:
+        for line in corpus:
+            line = line.strip()
+            if line: entries.append(json.loads(line))
+    return entries
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transporte real que também grava cada troca no corpus."""
+
+    def __init__(self, corpus_path: str = DEFAULT_CORPUS_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.corpus_path = corpus_path
+        self._write_lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        sent_at = time.monotonic()
+        sent_wall = time.time()
+        response = super().send(request, **kwargs)
+        response.content  # Garante o corpo em memória antes de gravar
+        entry = {
+            "t": round(sent_wall, 3),
+            "elapsed": round(time.monotonic() - sent_at, 4),
+            "endpoint": _endpoint_of(request.url),
+            "key": request_key(request.method, request.url, request.body),
+            "method": request.method,
+            "url": request.url,
+            "request_headers": {k: v for k, v in request.headers.items() if k.lower() not in _PRIVATE_HEADERS},
+            "body": request.body.decode("utf-8", "replace") if isinstance(request.body, bytes) else request.body,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "response": response.content.decode("utf-8", "replace"),
+        }
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        opener = gzip.open if self.corpus_path.endswith(".gz") else open
+        with self._write_lock:
+            with opener(self.corpus_path, "at", encoding="utf-8") as corpus:
+                corpus.write(line)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transporte offline que responde com as trocas gravadas.
+
+    Gravações com a mesma chave são devolvidas em sequência (a última se
+    repete quando acabam). Chaves desconhecidas recebem um 404 sintético.
+    """
+
+    def __init__(self, corpus_path: str = DEFAULT_CORPUS_FILE, timing: str = TIMING_ORIGINAL, speed: float = 1.0):
+        super().__init__()
+        self.corpus_path = corpus_path
+        self.timing = timing
+        self.speed = max(0.01, float(speed))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        for entry in load_corpus(corpus_path):
+            self._entries[entry["key"]].append(entry)
+        self.served = 0
+        self.missed = 0
+
+    def _next_entry(self, key: str) -> Optional[dict]:
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                self.missed += 1
+                return None
+            position = self._cursor[key]
+            self._cursor[key] = min(position + 1, len(recorded) - 1)
+            self.served += 1
+            return recorded[position]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self._next_entry(request_key(request.method, request.url, request.body))
+        if entry is None:
+            entry = {"status": 404, "reason": "Not Recorded", "elapsed": 0.0,
+                     "headers": {"Content-Type": "application/json"},
+                     "response": json.dumps({"error": {"code": 404, "message": "Requisição não gravada no corpus"}})}
+        if self.timing == TIMING_ORIGINAL and entry.get("elapsed"):
+            time.sleep(entry["elapsed"] / self.speed)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason") or ""
+        response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        response._content = (entry.get("response") or "").encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=entry.get("elapsed") or 0.0)
+        return response
+
+    def close(self):
+        pass
+
+
+def _restore_rate_limiter(client):
+    """Devolve ao cliente o rate limiter retirado pelo replay rápido (se houver)."""
+    if hasattr(client, _SAVED_RATE_LIMITER_ATTR):
+        client.rate_limiter = getattr(client, _SAVED_RATE_LIMITER_ATTR)
+        delattr(client, _SAVED_RATE_LIMITER_ATTR)
+
+
+def install_transport(client, mode: str, corpus_path: str = DEFAULT_CORPUS_FILE,
+                      timing: str = TIMING_ORIGINAL) -> str:
+    """Instala o transporte de gravação/reprodução num ``TradeClient``. Retorna o modo efetivo."""
+    # Todo modo começa do rate limiter real; só o replay rápido o retira de novo
+    _restore_rate_limiter(client)
+    if mode == MODE_RECORD:
+        client.set_transport(lambda **pool: RecordingAdapter(corpus_path, **pool), mode)
+    elif mode == MODE_REPLAY:
+        replay = ReplayAdapter(corpus_path, timing)
+        client.set_transport(lambda **pool: replay, mode)
+        if timing == TIMING_FAST:
+            # Sem espera real: o rate limit (de relógio) mascararia a vazão medida
+            setattr(client, _SAVED_RATE_LIMITER_ATTR, client.rate_limiter)
+            client.rate_limiter = None
+    else:
+        mode = MODE_LIVE
+        client.set_transport(None, mode)
+    return mode
+
+
+def summarize_corpus(path: str) -> Dict[str, dict]:
+    """Contagem, status e latência (média/p50/p95) por endpoint."""
+    by_endpoint = defaultdict(list)
+    for entry in load_corpus(path):
+        by_endpoint[entry.get("endpoint", "other")].append(entry)
+    summary = {}
+    for endpoint, entries in by_endpoint.items():
+        latencies = sorted(e.get("elapsed", 0.0) for e in entries)
+        statuses = defaultdict(int)
+        for e in entries: statuses[e["status"]] += 1
+        summary[endpoint] = {
+            "count": len(entries),
+            "status": dict(statuses),
+            "mean": sum(latencies) / len(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "span": max(e.get("t", 0.0) for e in entries) - min(e.get("t", 0.0) for e in entries),
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    corpus_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS_FILE
+    for endpoint_name, stats in sorted(summarize_corpus(corpus_file).items()):
+        print(f"{endpoint_name:8s} {stats['count']:5d} req  status={stats['status']}  "
+              f"lat média={stats['mean']*1000:.0f}ms p50={stats['p50']*1000:.0f}ms p95={stats['p95']*1000:.0f}ms  "
+              f"janela={stats['span']:.1f}s")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Lista de resultados virtualizada.
+
+O ``ttk.Treeview`` cria um item Tcl por linha, o que fica lento com dezenas de
+milhares de anúncios. Aqui as linhas vivem em arrays Python (``ResultsModel``):
+valores exibidos, tag, chaves de ordenação e texto de filtro de cada item, com
+a ordem mantida por ``SortedRowIndex``. O ``VirtualTreeview`` materializa no
+widget apenas a janela visível (algumas dezenas de linhas) e troca essa janela
+ao rolar; ordenar e filtrar mexem só nos arrays.
+"""
+import itertools
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from poe2_analysis import NO_VALUE
+from poe2_sort_index import SortedRowIndex
+
+ARRIVAL_COLUMN = "_chegada"   # Ordem padrão (chegada dos itens) enquanto nenhuma coluna foi escolhida
+DEFAULT_ROW_HEIGHT = 22
+FILTERABLE_COLUMNS = (0, 5)   # Nome e vendedor entram no texto do filtro
+
+
+class ResultsModel:
+    """Linhas de resultado de uma aba, ordenadas e filtradas fora do widget.
+
+    Guarda em memória só o que a lista exibe e ordena (valores, tag, chaves de
+    ordenação e texto do filtro), não o JSON do item: o Treeview fica pequeno,
+    mas a memória da aba ainda cresce linearmente com o número de linhas.
+    """
+
+    def __init__(self):
+        self._rows: Dict[Hashable, Tuple[tuple, str, dict, str]] = {}
+        self._arrival = itertools.count()
+        self.index = SortedRowIndex()
+        self.index.rebuild(ARRIVAL_COLUMN, False, [])
+        self.filter_text = ""
+        self._view: Optional[List[Hashable]] = None
+        self.version = 0   # Muda a cada alteração (o widget só redesenha se mudou)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._rows
+
+    def _key(self, sort_keys: dict):
+        return sort_keys.get(self.index.column, NO_VALUE)
+
+    def _changed(self):
+        self._view = None
+        self.version += 1
+
+    def upsert(self, item_id: Hashable, values: tuple, tag: str, sort_keys: Optional[dict] = None):
+        sort_keys = dict(sort_keys or {})
+        previous = self._rows.get(item_id)
+        # A ordem de chegada é fixada na primeira vez que o item aparece
+        sort_keys[ARRIVAL_COLUMN] = previous[2][ARRIVAL_COLUMN] if previous else next(self._arrival)
+        search_text = " ".join(str(values[i]) for i in FILTERABLE_COLUMNS if i < len(values)).lower()
+        self._rows[item_id] = (values, tag, sort_keys, search_text)
+        if previous is None or previous[2].get(self.index.column) != sort_keys.get(self.index.column):
+            self.index.insert(item_id, self._key(sort_keys))
+        self._changed()
+
+    def remove(self, item_ids: Iterable[Hashable]):
+        for item_id in item_ids:
+            if self._rows.pop(item_id, None) is not None:
+                self.index.remove(item_id)
+        self._changed()
+
+    def clear(self):
+        self._rows.clear()
+        self.index.clear()
+        self._changed()
+
+    def sort(self, column: Optional[str], reverse: bool = False):
+        """Reordena pelos valores já tipados; ``None`` volta à ordem de chegada."""
+        column = column or ARRIVAL_COLUMN
+        self.index.rebuild(column, reverse, ((item_id, row[2].get(column, NO_VALUE)) for item_id, row in self._rows.items()))
+        self._changed()
+
+    def set_sort_keys(self, column: str, keys: Dict[Hashable, object]):
+        """Troca a chave de ``column`` das linhas indicadas (ex.: preços renormalizados)."""
+        changed = False
+        for item_id, key in keys.items():
+            row = self._rows.get(item_id)
+            if row is None or row[2].get(column, NO_VALUE) == key: continue
+            row[2][column] = key
+            changed = True
+        if not changed: return
+        if self.index.column == column:
+            self.sort(column, self.index.reverse)
+        else:
+            self._changed()
+
+    def set_filter(self, text: str):
+        text = (text or "").strip().lower()
+        if text == self.filter_text: return
+        self.filter_text = text
+        self._changed()
+
+    def view(self) -> List[Hashable]:
+        """IDs na ordem de exibição, já filtrados (calculado uma vez por alteração)."""
+        if self._view is None:
+            ordered = self.index.ordered_ids()
+            if self.filter_text:
+                needle = self.filter_text
+                rows = self._rows
+                ordered = [item_id for item_id in ordered if needle in rows[item_id][3]]
+            self._view = ordered
+        return self._view
+
+    def row(self, item_id: Hashable) -> Optional[Tuple[tuple, str]]:
+        row = self._rows.get(item_id)
+        return (row[0], row[1]) if row else None
+
+
+class VirtualTreeview:
+    """Treeview que só contém as linhas visíveis de um ``ResultsModel``."""
+
+    def __init__(self, tree: ttk.Treeview, vsb: ttk.Scrollbar, model: ResultsModel):
+        self.tree = tree
+        self.vsb = vsb
+        self.model = model
+        self.offset = 0
+        self.visible_rows = int(tree.cget('height') or 10)
+        self._rendered: Tuple[int, int, int] = (-1, -1, -1)   # (versão, início, linhas)
+        vsb.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        tree.bind("<Button-4>", lambda e: self._scroll_units(-3), add="+")
+        tree.bind("<Button-5>", lambda e: self._scroll_units(3), add="+")
+        tree.bind("<Down>", lambda e: self._move_focus(1), add="+")
+        tree.bind("<Up>", lambda e: self._move_focus(-1), add="+")
+        tree.bind("<Next>", lambda e: self._scroll_units(self.visible_rows), add="+")
+        tree.bind("<Prior>", lambda e: self._scroll_units(-self.visible_rows), add="+")
+
+    # --- Rolagem ---
+    def yview(self, *args):
+        """Comando da barra de rolagem ('moveto' fração / 'scroll' n unidades|páginas)."""
+        total = len(self.model.view())
+        if not args: return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.offset += amount * (self.visible_rows if args[2] == "pages" else 1)
+        self.render()
+
+    def _scroll_units(self, amount: int):
+        self.offset += amount
+        self.render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll_units(-3 if event.delta > 0 else 3)
+
+    def _move_focus(self, step: int):
+        """Setas no limite da janela rolam a lista em vez de parar na última linha materializada."""
+        children = self.tree.get_children()
+        focused = self.tree.focus()
+        if not children or focused not in children: return None
+        position = children.index(focused) + step
+        if 0 <= position < len(children): return None
+        view = self.model.view()
+        try: absolute = view.index(focused) + step
+        except ValueError: return "break"
+        if not 0 <= absolute < len(view): return "break"
+        self.offset += step
+        self.render()
+        target = view[absolute]
+        if self.tree.exists(target):
+            self.tree.selection_set(target); self.tree.focus(target)
+        return "break"
+
+    def _on_configure(self, event):
+        row_height = DEFAULT_ROW_HEIGHT
+        try:
+            row_height = int(ttk.Style(self.tree).lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT)
+        except (tk.TclError, ValueError): pass
+        # Desconta o cabeçalho (aprox. uma linha)
+        rows = max(1, event.height // row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    # --- Desenho ---
+    def scroll_to(self, item_id: Hashable):
+        view = self.model.view()
+        try: position = view.index(item_id)
+        except ValueError: return
+        if not self.offset <= position < self.offset + self.visible_rows:
+            self.offset = max(0, position - self.visible_rows // 2)
+            self.render()
+
+    def render(self, force: bool = False):
+        """Materializa a janela visível; nada é feito se a janela não mudou."""
+        view = self.model.view()
+        total = len(view)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        state = (self.model.version, self.offset, self.visible_rows)
+        if state == self._rendered and not force:
+            return
+        self._rendered = state
+        window = view[self.offset:self.offset + self.visible_rows]
+        tree = self.tree
+        selected = set(tree.selection())
+        focused = tree.focus()
+        if tuple(window) != tree.get_children():
+            tree.delete(*tree.get_children())
+            for item_id in window:
+                values, tag = self.model.row(item_id)
+                tree.insert("", tk.END, iid=item_id, values=values, tags=(tag,))
+        else:
+            # Mesmas linhas: só atualiza valores (ex.: item reanalisado)
+            for item_id in window:
+                values, tag = self.model.row(item_id)
+                tree.item(item_id, values=values, tags=(tag,))
+        keep_selected = [item_id for item_id in window if item_id in selected]
+        if keep_selected: tree.selection_set(keep_selected)
+        if focused and tree.exists(focused): tree.focus(focused)
+        if total:
+            self.vsb.set(self.offset / total, min(1.0, (self.offset + len(window)) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
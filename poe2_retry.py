@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Política de novas tentativas para a API de trade2.
+
+Respostas 429 e 5xx (e falhas de rede) não interrompem mais o monitoramento:
+a requisição é repetida respeitando ``Retry-After`` ou, na falta dele, com
+backoff exponencial com jitter. Cada endpoint tem um disjuntor (circuit
+breaker) que, após falhas consecutivas, recusa chamadas por um tempo e depois
+libera uma tentativa de teste; o próximo ciclo de monitoramento retoma sozinho.
+Somente falhas de autenticação (401/403) são repassadas ao chamador como erro.
+"""
+import random
+import threading
+import time
+from typing import Optional
+
+from poe2_rate_limiter import parse_retry_after
+
+DEFAULT_MAX_ATTEMPTS = 4         # Tentativas por requisição (incluindo a primeira)
+DEFAULT_BASE_DELAY = 2.0         # Segundos antes da 2ª tentativa (dobra a cada falha)
+DEFAULT_MAX_DELAY = 120.0
+DEFAULT_FAILURE_THRESHOLD = 5    # Falhas seguidas que abrem o disjuntor
+DEFAULT_RESET_TIMEOUT = 60.0     # Tempo aberto antes da tentativa de teste (dobra se falhar)
+DEFAULT_MAX_RESET_TIMEOUT = 900.0
+
+AUTH_STATUS_CODES = (401, 403)
+
+# Estados do disjuntor
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+def is_retryable_status(status_code: Optional[int]) -> bool:
+    """429 e erros 5xx são transitórios e podem ser repetidos."""
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def is_auth_failure(status_code: Optional[int]) -> bool:
+    return status_code in AUTH_STATUS_CODES
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o disjuntor do endpoint está aberto."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Endpoint '{endpoint}' instável; nova tentativa em {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """Calcula o atraso entre tentativas (Retry-After ou backoff exponencial com jitter)."""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+
+    def delay_for(self, attempt: int, headers=None) -> float:
+        """Atraso antes da tentativa ``attempt + 1`` (attempt começa em 1)."""
+        retry_after = parse_retry_after(headers)
+        if retry_after is not None:
+            return min(retry_after, DEFAULT_MAX_RESET_TIMEOUT)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # "Equal jitter": metade fixa, metade aleatória, para dessincronizar as abas
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """Disjuntor de um endpoint (fechado -> aberto -> meio-aberto -> fechado)."""
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_reset_timeout = float(reset_timeout)
+        self.max_reset_timeout = float(max_reset_timeout)
+        self.reset_timeout = self.base_reset_timeout
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Levanta CircuitOpenError se a chamada não puder ser feita agora."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == BREAKER_OPEN:
+                if now < self.opened_until:
+                    raise CircuitOpenError(self.name, self.opened_until - now)
+                self.state = BREAKER_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == BREAKER_HALF_OPEN:
+                # Só uma chamada de teste por vez enquanto meio-aberto
+                if self._probe_in_flight:
+                    raise CircuitOpenError(self.name, 1.0)
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_in_flight = False
+
+    def release(self):
+        """Libera a tentativa de teste sem contar sucesso nem falha (ex.: chamada interrompida)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, min_open: float = 0.0):
+        """Conta uma falha; abre o disjuntor no limite (ou se a tentativa de teste falhar)."""
+        with self._lock:
+            self.failures += 1
+            if self.state == BREAKER_HALF_OPEN:
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self._open(min_open)
+            elif self.failures >= self.failure_threshold:
+                self._open(min_open)
+
+    def _open(self, min_open: float):
+        self.state = BREAKER_OPEN
+        self._probe_in_flight = False
+        self.opened_until = time.monotonic() + max(self.reset_timeout, min_open)
+
+    def seconds_until_closed(self) -> float:
+        with self._lock:
+            if self.state != BREAKER_OPEN: return 0.0
+            return max(0.0, self.opened_until - time.monotonic())
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Agendador central de monitoramento.
+
+Substitui a thread dedicada por aba: um único despachante mantém uma fila de
+prioridade com o próximo horário de cada busca salva, aplica jitter para que
+as abas não disparem juntas e executa os ciclos num pool pequeno de workers.
+Quando várias buscas estão atrasadas, a escolha segue uma fila justa ponderada
+pela classe de prioridade, dividindo o orçamento de requisições entre elas.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_LABELS = {"Alta": PRIORITY_HIGH, "Normal": PRIORITY_NORMAL, "Baixa": PRIORITY_LOW}
+# Peso de cada classe na divisão justa (alta recebe 4x a fatia da baixa)
+PRIORITY_WEIGHTS = {PRIORITY_HIGH: 4.0, PRIORITY_NORMAL: 2.0, PRIORITY_LOW: 1.0}
+
+DEFAULT_MAX_CONCURRENT = 2   # Ciclos de busca executando ao mesmo tempo
+DEFAULT_JITTER = 0.1         # Variação de ±10% no intervalo de cada busca
+
+
+class ScheduledSearch:
+    """Estado de agendamento de uma busca monitorada."""
+
+    def __init__(self, key: Hashable, interval: float, callback: Callable[[], None], priority: int):
+        self.key = key
+        self.interval = float(interval)
+        self.callback = callback
+        self.priority = priority
+        self.next_due = 0.0
+        self.virtual_time = 0.0   # Serviço acumulado / peso (fila justa)
+        self.running = False
+        self.removed = False
+        self.runs = 0
+        self.idle = threading.Event()
+        self.idle.set()
+
+
+class PollingScheduler:
+    """Despachante único para todas as buscas monitoradas."""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, jitter: float = DEFAULT_JITTER):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.jitter = max(0.0, float(jitter))
+        self._cond = threading.Condition()
+        self._searches: Dict[Hashable, ScheduledSearch] = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._running_count = 0
+        self._virtual_clock = 0.0
+        self._shutdown = False
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="poe2-poll")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="poe2-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    # --- API pública ---
+    def add(self, key: Hashable, interval: float, callback: Callable[[], None],
+            priority: int = PRIORITY_NORMAL, run_now: bool = True):
+        """Agenda (ou reagenda) uma busca. A primeira execução recebe um pequeno atraso aleatório."""
+        with self._cond:
+            old = self._searches.get(key)
+            if old is not None: old.removed = True
+            search = ScheduledSearch(key, interval, callback, priority)
+            # Nova busca entra na fila justa no "tempo virtual" atual, sem crédito acumulado
+            search.virtual_time = self._virtual_clock
+            first_delay = random.uniform(0, min(2.0, self.jitter * search.interval)) if run_now else self._jittered(search.interval)
+            search.next_due = time.monotonic() + first_delay
+            self._searches[key] = search
+            self._push(search)
+            self._cond.notify_all()
+
+    def update(self, key: Hashable, interval: Optional[float] = None, priority: Optional[int] = None):
+        with self._cond:
+            search = self._searches.get(key)
+            if search is None: return
+            if interval is not None: search.interval = float(interval)
+            if priority is not None: search.priority = priority
+            self._cond.notify_all()
+
+    def remove(self, key: Hashable, wait: bool = False, timeout: float = 2.0) -> bool:
+        """Remove a busca. Com ``wait=True`` aguarda o ciclo em andamento terminar."""
+        with self._cond:
+            search = self._searches.pop(key, None)
+            if search is None: return True
+            search.removed = True
+            self._cond.notify_all()
+        if wait:
+            return search.idle.wait(timeout)
+        return True
+
+    def is_scheduled(self, key: Hashable) -> bool:
+        with self._cond:
+            return key in self._searches
+
+    def seconds_until_due(self, key: Hashable) -> Optional[float]:
+        with self._cond:
+            search = self._searches.get(key)
+            if search is None or search.running: return None
+            return max(0.0, search.next_due - time.monotonic())
+
+    def shutdown(self, wait: bool = True, timeout: float = 2.0):
+        """Para o despachante; opcionalmente aguarda os ciclos em andamento."""
+        with self._cond:
+            self._shutdown = True
+            running = [s for s in self._searches.values() if s.running]
+            for search in self._searches.values(): search.removed = True
+            self._searches.clear()
+            self._cond.notify_all()
+        if wait:
+            deadline = time.monotonic() + timeout
+            for search in running:
+                search.idle.wait(max(0.05, deadline - time.monotonic()))
+        self._pool.shutdown(wait=False)
+
+    # --- Internos ---
+    def _jittered(self, interval: float) -> float:
+        return max(0.5, interval * (1.0 + random.uniform(-self.jitter, self.jitter)))
+
+    def _push(self, search: ScheduledSearch):
+        heapq.heappush(self._heap, (search.next_due, next(self._seq), search))
+
+    def _pick_due(self, now: float) -> Optional[ScheduledSearch]:
+        """Entre as buscas vencidas, escolhe a de menor tempo virtual (desempate: prioridade)."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, search = heapq.heappop(self._heap)
+            if search.removed or search.running: continue
+            due.append(search)
+        if not due: return None
+        due.sort(key=lambda s: (s.virtual_time, s.priority, s.next_due))
+        chosen = due[0]
+        for search in due[1:]:
+            self._push(search) # Continuam vencidas, aguardando um slot
+        return chosen
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._shutdown:
+                now = time.monotonic()
+                chosen = self._pick_due(now) if self._running_count < self.max_concurrent else None
+                if chosen is not None:
+                    chosen.running = True
+                    chosen.idle.clear()
+                    self._running_count += 1
+                    self._virtual_clock = max(self._virtual_clock, chosen.virtual_time)
+                    self._pool.submit(self._run_search, chosen)
+                    continue
+                # Dorme até o próximo vencimento (ou até alguém notificar)
+                timeout = None
+                if self._heap and self._running_count < self.max_concurrent:
+                    timeout = max(0.0, self._heap[0][0] - now)
+                self._cond.wait(timeout=timeout if timeout is not None else 1.0)
+
+    def _run_search(self, search: ScheduledSearch):
+        try:
+            if not search.removed:
+                search.callback()
+        except Exception as e_cycle:
+            print(f"Erro no ciclo agendado '{search.key}': {e_cycle}")
+        finally:
+            with self._cond:
+                search.running = False
+                search.runs += 1
+                search.virtual_time += 1.0 / PRIORITY_WEIGHTS.get(search.priority, 1.0)
+                self._running_count -= 1
+                if not search.removed and not self._shutdown:
+                    search.next_due = time.monotonic() + self._jittered(search.interval)
+                    self._push(search)
+                search.idle.set()
+                self._cond.notify_all()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Cache de resultados de ``/search`` por hash canônico do payload.
+
+O POST de busca é a chamada com a regra de rate limit mais restritiva, e cada
+ciclo de monitoramento reenvia exatamente o mesmo payload. Este cache guarda a
+resposta (query_id + lista de IDs) por um TTL configurável e faz com que
+payloads idênticos - da mesma aba em ciclos seguidos ou de abas diferentes com
+os mesmos filtros - compartilhem uma única requisição ao servidor. Chamadas
+simultâneas para o mesmo payload são agrupadas: só a primeira vai à rede e as
+demais aguardam a resposta dela.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_SEARCH_CACHE_TTL = 15.0   # Segundos (0 desativa o cache)
+
+# Origem da resposta devolvida por get_or_search
+SOURCE_UPSTREAM = "upstream"
+SOURCE_CACHE = "cache"
+SOURCE_COALESCED = "coalesced"
+
+
+def canonical_payload(payload: dict) -> str:
+    """Serializa o payload de forma estável (chaves ordenadas, sem espaços)."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def search_cache_key(league: str, payload: dict) -> str:
+    """Hash canônico de (liga, payload) usado como chave do cache."""
+    canonical = f"{league}\n{canonical_payload(payload)}"
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    """Busca em andamento: os seguidores aguardam o evento e leem a resposta."""
+    __slots__ = ("done", "response")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+
+class SearchCache:
+    """Cache TTL com agrupamento de buscas idênticas em voo."""
+
+    def __init__(self, ttl: float = DEFAULT_SEARCH_CACHE_TTL):
+        self.ttl = max(0.0, float(ttl))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, object]] = {}
+        self._in_flight: Dict[str, _InFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def set_ttl(self, ttl: float):
+        with self._lock:
+            self.ttl = max(0.0, float(ttl))
+            if self.ttl == 0: self._entries.clear()
+
+    def invalidate(self, key: Optional[str] = None):
+        """Remove uma entrada (ou todas, se ``key`` for None)."""
+        with self._lock:
+            if key is None: self._entries.clear()
+            else: self._entries.pop(key, None)
+
+    def _lookup(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None: return None
+        stored_at, response = entry
+        if now - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+        return response
+
+    def get_or_search(self, key: str, do_search: Callable[[], object],
+                      stop_event: Optional[threading.Event] = None) -> Tuple[object, str]:
+        """Retorna ``(resposta, origem)`` para a chave, indo à rede só se necessário.
+
+        ``do_search`` deve devolver a resposta HTTP (ou None se interrompida).
+        Apenas respostas 200 são armazenadas; erros são repassados aos
+        seguidores em voo, mas não ficam no cache.
+        """
+        while True:
+            with self._lock:
+                if self.ttl > 0:
+                    cached = self._lookup(key, time.monotonic())
+                    if cached is not None:
+                        self.hits += 1
+                        return cached, SOURCE_CACHE
+                flight = self._in_flight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _InFlight()
+                    self._in_flight[key] = flight
+                    self.misses += 1
+
+            if leader:
+                response = None
+                try:
+                    response = do_search()
+                    return response, SOURCE_UPSTREAM
+                finally:
+                    with self._lock:
+                        if response is not None and getattr(response, "status_code", None) == 200 and self.ttl > 0:
+                            self._entries[key] = (time.monotonic(), response)
+                        self._in_flight.pop(key, None)
+                    flight.response = response
+                    flight.done.set()
+
+            # Seguidor: aguarda a busca do líder (checando o stop_event)
+            while not flight.done.wait(0.5):
+                if stop_event is not None and stop_event.is_set():
+                    return None, SOURCE_COALESCED
+            if flight.response is not None:
+                with self._lock: self.coalesced += 1
+                return flight.response, SOURCE_COALESCED
+            # O líder foi interrompido antes de obter resposta: tenta de novo
+            if stop_event is not None and stop_event.is_set():
+                return None, SOURCE_COALESCED
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "coalesced": self.coalesced, "entries": len(self._entries)}
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Fatiamento de buscas por faixa de preço.
+
+A API de ``/search`` devolve no máximo 100 IDs por consulta. Quando o total
+informado é maior que isso, a busca é dividida em sub-faixas do filtro
+``trade_filters.price`` (bisseção da faixa min/max; faixas abertas crescem
+geometricamente) até que cada fatia caiba no limite. Cada fatia é uma busca
+normal (passa pelo rate limit, cache e novas tentativas do ``TradeClient``) e
+os IDs de todas são mesclados sem duplicatas, mantendo o query_id de origem de
+cada um para o ``/fetch``.
+"""
+import copy
+from typing import Callable, List, Optional, Tuple
+
+API_RESULT_CAP = 100             # IDs devolvidos por /search
+DEFAULT_MAX_SHARDS = 24          # Buscas extras permitidas por ciclo (a regra de /search é a mais restrita)
+DEFAULT_MAX_SHARDED_ITEMS = 1000 # Itens buscados em detalhe no modo de cobertura completa
+MIN_PRICE_STEP = 0.01            # Faixas mais estreitas que isso não são mais divididas
+OPEN_RANGE_FIRST_SPLIT = 10.0    # Primeiro corte de uma faixa sem preço máximo
+
+
+class ShardSearchError(Exception):
+    """Falha em uma fatia. ``fatal`` interrompe o fatiamento (ex.: autenticação)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, fatal: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.fatal = fatal
+
+
+def get_price_band(payload: dict) -> Tuple[float, Optional[float]]:
+    """Faixa (min, max) de preço do payload; max None = sem limite superior."""
+    price = payload.get("query", {}).get("filters", {}).get("trade_filters", {}).get("filters", {}).get("price", {})
+    low = price.get("min")
+    high = price.get("max")
+    return (float(low) if low is not None else 0.0, float(high) if high is not None else None)
+
+
+def with_price_band(payload: dict, low: float, high: Optional[float]) -> dict:
+    """Cópia do payload com o filtro de preço restrito à faixa informada."""
+    sharded = copy.deepcopy(payload)
+    filters = sharded.setdefault("query", {}).setdefault("filters", {})
+    price = filters.setdefault("trade_filters", {"filters": {}}).setdefault("filters", {}).setdefault("price", {})
+    price["min"] = round(low, 2)
+    if high is None: price.pop("max", None)
+    else: price["max"] = round(high, 2)
+    return sharded
+
+
+def split_band(low: float, high: Optional[float]) -> Optional[List[Tuple[float, Optional[float]]]]:
+    """Divide a faixa em duas; None se ela não puder mais ser dividida."""
+    if high is None:
+        cut = max(low * 4, OPEN_RANGE_FIRST_SPLIT) if low > 0 else OPEN_RANGE_FIRST_SPLIT
+        return [(low, cut), (cut, None)]
+    if high - low < 2 * MIN_PRICE_STEP:
+        return None
+    middle = round((low + high) / 2, 2)
+    return [(low, middle), (middle, high)]
+
+
+class ShardResult:
+    """IDs mesclados (com o query_id de origem) e estatísticas do fatiamento."""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str]] = []
+        self.searches = 0
+        self.failed_bands = 0
+        self.unsplittable_bands = 0
+        self.skipped_bands = 0
+        self.interrupted = False
+        self.fatal_error: Optional[ShardSearchError] = None
+
+    @property
+    def complete(self) -> bool:
+        return not (self.failed_bands or self.unsplittable_bands or self.skipped_bands or self.interrupted)
+
+
+class PriceShardedSearch:
+    """Expande uma busca truncada em fatias de preço até cobrir todo o resultado.
+
+    ``search_fn(payload)`` deve devolver ``(query_id, ids, total)``, ``None`` se
+    interrompida, ou levantar ``ShardSearchError``.
+    """
+
+    def __init__(self, search_fn: Callable[[dict], Optional[Tuple[str, List[str], int]]],
+                 max_shards: int = DEFAULT_MAX_SHARDS, max_items: int = DEFAULT_MAX_SHARDED_ITEMS):
+        self.search_fn = search_fn
+        self.max_shards = max(0, int(max_shards))
+        self.max_items = max(API_RESULT_CAP, int(max_items))
+
+    def expand(self, payload: dict, query_id: str, item_ids: List[str], total: int,
+               on_progress: Optional[Callable[[ShardResult], None]] = None) -> ShardResult:
+        """Parte do resultado da busca original e acrescenta as fatias necessárias."""
+        result = ShardResult()
+        seen = set()
+
+        def merge(band_query_id, band_ids):
+            for item_id in band_ids:
+                if item_id in seen: continue
+                seen.add(item_id)
+                result.entries.append((item_id, band_query_id))
+
+        merge(query_id, item_ids)
+        if total <= len(item_ids):
+            return result
+
+        # Pilha em ordem de preço crescente: as fatias mais baratas são resolvidas primeiro
+        root_children = split_band(*get_price_band(payload))
+        if root_children is None:
+            result.unsplittable_bands += 1
+            return result
+        pending = list(reversed(root_children))
+        while pending:
+            if len(result.entries) >= self.max_items or result.searches >= self.max_shards:
+                result.skipped_bands += len(pending)
+                break
+            low, high = pending.pop()
+            try:
+                band = self.search_fn(with_price_band(payload, low, high))
+            except ShardSearchError as shard_err:
+                if shard_err.fatal:
+                    result.fatal_error = shard_err
+                    break
+                result.failed_bands += 1
+                continue
+            finally:
+                result.searches += 1
+            if band is None:
+                result.interrupted = True
+                break
+            band_query_id, band_ids, band_total = band
+            merge(band_query_id, band_ids)
+            if band_total > len(band_ids):
+                children = split_band(low, high)
+                if children is None: result.unsplittable_bands += 1
+                else: pending.extend(reversed(children))
+            if on_progress is not None: on_progress(result)
+        del result.entries[self.max_items:]
+        return result
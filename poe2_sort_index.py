@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Índice ordenado das linhas de resultado de uma aba.
+
+As chaves de ordenação de cada item são calculadas uma vez (``item_sort_keys``
+em ``poe2_analysis``) e guardadas com os detalhes do item. Este índice mantém a
+lista ``(chave, id)`` da coluna ativa em ordem crescente; novas linhas entram
+na posição certa por ``bisect`` em vez de reordenar o Treeview inteiro a cada
+busca, e a direção decrescente é só a leitura espelhada da mesma lista.
+"""
+from bisect import bisect_left
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SortedRowIndex:
+    """Ordem das linhas de um Treeview para uma coluna e direção."""
+
+    def __init__(self):
+        self.column: Optional[str] = None
+        self.reverse = False
+        self._entries: List[Tuple[object, Hashable]] = []
+        self._keys: Dict[Hashable, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def matches(self, column: Optional[str], reverse: bool) -> bool:
+        return self.column == column and self.reverse == reverse
+
+    def rebuild(self, column: str, reverse: bool, rows: Iterable[Tuple[Hashable, object]]) -> List[Hashable]:
+        """Reordena tudo a partir de ``(id, chave)``; retorna os IDs na ordem de exibição."""
+        self.column, self.reverse = column, reverse
+        self._keys = dict(rows)
+        self._entries = sorted((key, row_id) for row_id, key in self._keys.items())
+        return self.ordered_ids()
+
+    def ordered_ids(self) -> List[Hashable]:
+        ids = [row_id for _, row_id in self._entries]
+        if self.reverse: ids.reverse()
+        return ids
+
+    def insert(self, row_id: Hashable, key) -> int:
+        """Insere (ou reposiciona) a linha; retorna o índice de exibição dela."""
+        if row_id in self._keys: self.remove(row_id)
+        entry = (key, row_id)
+        position = bisect_left(self._entries, entry)
+        self._entries.insert(position, entry)
+        self._keys[row_id] = key
+        return len(self._entries) - 1 - position if self.reverse else position
+
+    def remove(self, row_id: Hashable):
+        if row_id not in self._keys: return
+        key = self._keys.pop(row_id)
+        entry = (key, row_id)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def clear(self):
+        """Esvazia as linhas mantendo a coluna e a direção ativas."""
+        self._entries = []
+        self._keys = {}
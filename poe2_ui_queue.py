@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Fila única de atualizações da interface.
+
+As threads de trabalho (buscas, monitoramento, pipeline de ``/fetch``) não
+agendam mais um ``root.after`` por item, por linha de log ou por mudança de
+status. Elas publicam eventos nesta fila, que a thread do Tk esvazia num ritmo
+fixo de quadros: eventos consecutivos do mesmo tipo e do mesmo destino viram
+uma operação em lote (várias linhas do Treeview, várias linhas de log num só
+``insert``) e só o último status publicado em cada quadro é exibido.
+"""
+import threading
+from collections import deque
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+DEFAULT_FRAME_MS = 50                # Intervalo entre esvaziamentos da fila (~20 quadros/s)
+DEFAULT_MAX_EVENTS_PER_FRAME = 2000  # Eventos aplicados por quadro; o restante fica para o próximo
+
+# Tipos de evento
+EVENT_CALL = "call"          # Callback arbitrário (ordem preservada)
+EVENT_LOG = "log"            # Linha de log de uma aba
+EVENT_ROW = "row"            # Inserção/atualização de linha do Treeview de uma aba
+EVENT_REMOVE_ROWS = "remove" # Remoção de linhas do Treeview de uma aba
+
+
+class UIUpdateQueue:
+    """Fila thread-safe de eventos de interface, esvaziada pela thread do Tk."""
+
+    def __init__(self, max_events_per_frame: int = DEFAULT_MAX_EVENTS_PER_FRAME):
+        self.max_events_per_frame = max(1, int(max_events_per_frame))
+        self._lock = threading.Lock()
+        self._events = deque()
+        self._status: Optional[str] = None
+        self.posted = 0
+        self.applied_batches = 0
+        self.collapsed_status = 0
+        self.backlog = 0   # Eventos que não couberam no último quadro
+
+    def post(self, kind: str, target: Hashable, payload: Any):
+        with self._lock:
+            self._events.append((kind, target, payload))
+            self.posted += 1
+
+    def call(self, callback: Callable[[], None]):
+        self.post(EVENT_CALL, None, callback)
+
+    def set_status(self, message: str):
+        """Publica o texto da barra de status; só o último de cada quadro é aplicado."""
+        with self._lock:
+            if self._status is not None: self.collapsed_status += 1
+            self._status = message
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events) + (self._status is not None)
+
+    def drain(self) -> Tuple[Optional[str], List[Tuple[str, Hashable, list]]]:
+        """Retira os eventos do quadro, agrupando os consecutivos de mesmo tipo e destino.
+
+        Retorna ``(status, lotes)``, onde cada lote é ``(tipo, destino, [payloads])``.
+        Só eventos vizinhos são agrupados, então a ordem relativa entre
+        limpezas, inserções e remoções é preservada.
+        """
+        with self._lock:
+            count = min(len(self._events), self.max_events_per_frame)
+            events = [self._events.popleft() for _ in range(count)]
+            self.backlog = len(self._events)
+            status, self._status = self._status, None
+        batches = []
+        for kind, target, payload in events:
+            if batches and batches[-1][0] == kind and batches[-1][1] == target:
+                batches[-1][2].append(payload)
+            else:
+                batches.append((kind, target, [payload]))
+        self.applied_batches += len(batches)
+        return status, batches